@@ -0,0 +1,241 @@
+"""Gerador de carga que repete o ciclo de vida completo de torneios.
+
+Cada torneio virtual cria o torneio, cadastra os competidores, sorteia pelo
+GET /match, lança todos os resultados rodada a rodada e busca o /result.
+Vários torneios rodam ao mesmo tempo, um por worker. No fim sai a vazão e a
+latência p50/p95/p99 por rota de torneios/urls.py.
+
+Por padrão a API roda no próprio processo (test client do Flask); com
+--servidor ela sobe num servidor Werkzeug local e as requisições passam por
+HTTP de verdade. A base apontada por --url é recriada.
+
+    python benchmarks/carga.py --torneios 50 --concorrencia 8 --pensar 20
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from torneios import create_app, db  # noqa: E402
+from torneios.config import TestingConfig, config  # noqa: E402
+
+
+class ClienteInterno:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        response = self.client.open(caminho, method=metodo, json=corpo)
+        return response.status_code, response.get_json(silent=True)
+
+
+class ClienteHTTP:
+    def __init__(self, host, porta):
+        # Uma conexão keep-alive por worker
+        self.conexao = http.client.HTTPConnection(host, porta)
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        cabecalhos = {}
+        if corpo is not None:
+            corpo = json.dumps(corpo)
+            cabecalhos["Content-Type"] = "application/json"
+        self.conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+        response = self.conexao.getresponse()
+        dados = response.read()
+        try:
+            return response.status, json.loads(dados) if dados else None
+        except ValueError:
+            return response.status, None
+
+
+class Coletor:
+    def __init__(self, app):
+        self.rotas = app.url_map.bind("localhost")
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.trava = threading.Lock()
+
+    def rota(self, metodo, caminho):
+        regra, _ = self.rotas.match(caminho.split("?")[0], metodo, return_rule=True)
+        return f"{metodo} {regra.rule}"
+
+    def registrar(self, rota, segundos, status_code):
+        with self.trava:
+            self.latencias[rota].append(segundos)
+            if status_code >= 400:
+                self.erros[rota] += 1
+
+    def relatorio(self, duracao):
+        rotas = {}
+        for rota, tempos in sorted(self.latencias.items()):
+            p50, p95, p99 = (
+                [tempos[0]] * 3
+                if len(tempos) == 1
+                else [
+                    statistics.quantiles(tempos, n=100, method="inclusive")[p - 1]
+                    for p in (50, 95, 99)
+                ]
+            )
+            rotas[rota] = {
+                "requisicoes": len(tempos),
+                "erros": self.erros[rota],
+                "por_segundo": round(len(tempos) / duracao, 2),
+                "p50_ms": round(p50 * 1000, 3),
+                "p95_ms": round(p95 * 1000, 3),
+                "p99_ms": round(p99 * 1000, 3),
+            }
+        total = sum(len(tempos) for tempos in self.latencias.values())
+        return {
+            "duracao_segundos": round(duracao, 3),
+            "requisicoes": total,
+            "por_segundo": round(total / duracao, 2),
+            "rotas": rotas,
+        }
+
+
+def aguarda_resultado(chave):
+    return chave["adversario_a"] and chave["adversario_b"] and not chave["vencedor"]
+
+
+class TorneioVirtual:
+    def __init__(self, cliente, coletor, qtd_competidores, pensar):
+        self.cliente = cliente
+        self.coletor = coletor
+        self.qtd_competidores = qtd_competidores
+        self.pensar = pensar
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        if self.pensar:
+            time.sleep(random.uniform(0, 2 * self.pensar))
+        rota = self.coletor.rota(metodo, caminho)
+        inicio = time.perf_counter()
+        status_code, dados = self.cliente.requisitar(metodo, caminho, corpo)
+        self.coletor.registrar(rota, time.perf_counter() - inicio, status_code)
+        return status_code, dados
+
+    def jogar(self, numero):
+        _, dados = self.requisitar(
+            "POST", "/tournament", {"nome_torneio": f"Carga {numero}"}
+        )
+        torneio = f"/tournament/{dados['id']}"
+        for i in range(self.qtd_competidores):
+            self.requisitar(
+                "POST", f"{torneio}/competidor", {"nome_competidor": f"Competidor {i}"}
+            )
+        while True:
+            _, dados = self.requisitar("GET", f"{torneio}/match")
+            chaves = dados["chaveamentos"]
+            pendentes = [chave["id"] for chave in chaves if aguarda_resultado(chave)]
+            if not pendentes:
+                break
+            for id_partida in pendentes:
+                placar = random.sample(range(10), 2)
+                self.requisitar(
+                    "POST",
+                    f"{torneio}/match/{id_partida}",
+                    {"resultado_comp_a": placar[0], "resultado_comp_b": placar[1]},
+                )
+        self.requisitar("GET", f"{torneio}/result")
+
+
+def rodar_carga(app, torneios, competidores, concorrencia, pensar, servidor):
+    """Joga ``torneios`` torneios em ``concorrencia`` workers e devolve o relatório.
+
+    ``pensar`` é a pausa média entre requisições de um torneio, em segundos.
+    """
+    if servidor:
+        # O log de acesso do Werkzeug por requisição atrapalharia a medida
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        servidor_http = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=servidor_http.serve_forever, daemon=True).start()
+        porta = servidor_http.server_port
+        workers = threading.local()
+
+        def cliente():
+            if not hasattr(workers, "cliente"):
+                workers.cliente = ClienteHTTP("127.0.0.1", porta)
+            return workers.cliente
+
+    else:
+
+        def cliente():
+            return ClienteInterno(app)
+
+    coletor = Coletor(app)
+
+    def jogar(numero):
+        TorneioVirtual(cliente(), coletor, competidores, pensar).jogar(numero)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(jogar, range(torneios)))
+    relatorio = coletor.relatorio(time.perf_counter() - inicio)
+    if servidor:
+        servidor_http.shutdown()
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/carga.db")
+    parser.add_argument("--torneios", type=int, default=20)
+    parser.add_argument("--competidores", type=int, default=16)
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument(
+        "--pensar",
+        type=float,
+        default=0,
+        help="pausa média entre requisições de um torneio, em milissegundos",
+    )
+    parser.add_argument(
+        "--servidor", action="store_true", help="sobe um servidor Werkzeug local"
+    )
+    parser.add_argument("--json", action="store_true", help="relatório em JSON")
+    args = parser.parse_args()
+
+    config["carga"] = type(
+        "CargaConfig", (TestingConfig,), {"SQLALCHEMY_DATABASE_URI": args.url}
+    )
+    app = create_app("carga")
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    relatorio = rodar_carga(
+        app,
+        args.torneios,
+        args.competidores,
+        args.concorrencia,
+        args.pensar / 1000,
+        args.servidor,
+    )
+
+    if args.json:
+        print(json.dumps(relatorio, indent=2))
+        return
+    print(
+        f"{relatorio['requisicoes']} requisições em {relatorio['duracao_segundos']}s "
+        f"({relatorio['por_segundo']} req/s)"
+    )
+    for rota, dados in relatorio["rotas"].items():
+        print(
+            f"{rota}: {dados['requisicoes']} req, {dados['erros']} erros, "
+            f"{dados['por_segundo']} req/s, p50 {dados['p50_ms']} ms, "
+            f"p95 {dados['p95_ms']} ms, p99 {dados['p99_ms']} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
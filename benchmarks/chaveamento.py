@@ -0,0 +1,218 @@
+"""Tempo, queries e pico de memória do chaveamento por tamanho de torneio.
+
+Para cada tamanho roda, numa base SQLite recriada do zero: o sorteio (que já
+resolve os byes), a leitura e serialização do chaveamento completo (montado em
+memória e em streaming), todos os resultados rodada a rodada pelo lançamento em
+lote e a classificação final. O resultado sai em JSON para ser guardado e
+comparado entre commits:
+
+    python benchmarks/chaveamento.py --saida base.json
+    python benchmarks/chaveamento.py --comparar base.json
+
+Tempo e queries vêm de uma passada sem tracemalloc, que deixa as etapas com
+ORM várias vezes mais lentas; o pico de memória, de uma segunda passada com ele
+(``--sem-memoria`` pula essa). Com --comparar, a saída é 1 quando alguma etapa
+ficou mais lenta ou gastou mais memória que a tolerância, ou passou a fazer mais
+queries.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from torneios import create_app, db, models_pydantic  # noqa: E402
+from torneios.config import TestingConfig, config  # noqa: E402
+from torneios.models import Chave, Torneio  # noqa: E402
+from torneios.service import (  # noqa: E402
+    ChaveamentoService,
+    CompetidorService,
+    ResultadoService,
+)
+from torneios.urls import gerar_json_chaveamento, serializar_chave  # noqa: E402
+
+TAMANHOS = (8, 64, 1024, 16384, 65536)
+METRICAS = ("segundos", "queries", "pico_memoria_bytes")
+
+
+class Medidor:
+    def __init__(self, engine):
+        self.queries = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries += 1
+
+    @contextmanager
+    def medir(self, etapas, nome, memoria=False):
+        """Tempo e queries da etapa; com ``memoria``, só o pico do tracemalloc"""
+        db.session.expire_all()
+        if memoria:
+            tracemalloc.start()
+        queries = self.queries
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            if memoria:
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                etapas[nome] = {"pico_memoria_bytes": pico}
+            else:
+                etapas[nome] = {
+                    "segundos": round(segundos, 6),
+                    "queries": self.queries - queries,
+                }
+
+
+def jogar_rodadas(torneio_id):
+    # Como a mesa de súmula: um lote por rodada, o perdedor sempre o competidor b
+    rodadas = [
+        rodada
+        for (rodada,) in db.session.query(Chave.rodada)
+        .filter_by(torneio_id=torneio_id)
+        .distinct()
+        .order_by(Chave.rodada.desc())
+    ]
+    for rodada in rodadas:
+        ids = [
+            id_partida
+            for (id_partida,) in db.session.query(Chave.id).filter_by(
+                torneio_id=torneio_id, rodada=rodada, bye=False
+            )
+        ]
+        lote = models_pydantic.ResultadosLoteRequest(
+            resultados=[
+                {"id_partida": id_partida, "resultado_comp_a": 1, "resultado_comp_b": 0}
+                for id_partida in ids
+            ]
+        )
+        gravados = ResultadoService.cadastrar_resultados_em_lote(lote, torneio_id)
+        erros = [erro for _, erro in gravados if erro is not None]
+        if erros:
+            raise RuntimeError(f"rodada {rodada}: {erros[0].message}")
+
+
+def passada(medidor, qtd_competidores, memoria):
+    db.drop_all()
+    db.create_all()
+    torneio = Torneio(nome_torneio=f"Benchmark {qtd_competidores}")
+    db.session.add(torneio)
+    db.session.commit()
+    nomes = models_pydantic.CompetidoresLoteRequest(
+        nomes=[f"Competidor {i}" for i in range(qtd_competidores)]
+    )
+    CompetidorService.cadastrar_competidores_em_lote(nomes, torneio.id)
+
+    etapas = {}
+    with medidor.medir(etapas, "sorteio", memoria):
+        ChaveamentoService.preparar_chaveamento(torneio.id)
+    with medidor.medir(etapas, "leitura_chaveamento", memoria):
+        chaves = ChaveamentoService.buscar_chaveamento_completo(torneio.id)
+        json.dumps({"chaveamentos": [serializar_chave(chave) for chave in chaves]})
+        del chaves
+    with medidor.medir(etapas, "leitura_chaveamento_stream", memoria):
+        lotes = ChaveamentoService.iterar_chaveamento(torneio.id)
+        for _ in gerar_json_chaveamento(lotes):
+            pass
+    with medidor.medir(etapas, "resultados", memoria):
+        jogar_rodadas(torneio.id)
+    with medidor.medir(etapas, "classificacao", memoria):
+        ResultadoService.buscar_resultado_top(torneio.id)
+    return etapas
+
+
+def medir_tamanho(medidor, qtd_competidores, memoria=True):
+    etapas = passada(medidor, qtd_competidores, memoria=False)
+    if memoria:
+        for etapa, metricas in passada(medidor, qtd_competidores, True).items():
+            etapas[etapa].update(metricas)
+    return etapas
+
+
+def comparar(base, atual, tolerancia):
+    regressoes = []
+    for tamanho, etapas in atual["tamanhos"].items():
+        for etapa, metricas in etapas.items():
+            anteriores = base["tamanhos"].get(tamanho, {}).get(etapa)
+            if not anteriores:
+                continue
+            for metrica in METRICAS:
+                if metrica not in anteriores or metrica not in metricas:
+                    continue
+                antes, depois = anteriores[metrica], metricas[metrica]
+                limite = antes if metrica == "queries" else antes * (1 + tolerancia)
+                if depois > limite:
+                    regressoes.append(
+                        f"{tamanho} competidores, {etapa}, {metrica}: "
+                        f"{antes} -> {depois}"
+                    )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/benchmark_chaveamento.db")
+    parser.add_argument(
+        "--tamanhos",
+        default=",".join(map(str, TAMANHOS)),
+        help="quantidades de competidores separadas por vírgula",
+    )
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument(
+        "--sem-memoria",
+        action="store_true",
+        help="só tempo e queries, sem a passada com tracemalloc",
+    )
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=0.2,
+        help="aumento relativo de tempo e memória aceito no --comparar",
+    )
+    args = parser.parse_args()
+
+    config["benchmark"] = type(
+        "BenchmarkConfig", (TestingConfig,), {"SQLALCHEMY_DATABASE_URI": args.url}
+    )
+    app = create_app("benchmark")
+    resultado = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "tamanhos": {},
+    }
+    with app.app_context():
+        medidor = Medidor(db.engine)
+        for tamanho in map(int, args.tamanhos.split(",")):
+            resultado["tamanhos"][str(tamanho)] = medir_tamanho(
+                medidor, tamanho, not args.sem_memoria
+            )
+            print(f"{tamanho} competidores medidos", file=sys.stderr)
+
+    saida = json.dumps(resultado, indent=2)
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            arquivo.write(saida + "\n")
+    else:
+        print(saida)
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            regressoes = comparar(json.load(arquivo), resultado, args.tolerancia)
+        for regressao in regressoes:
+            print(f"regressão: {regressao}", file=sys.stderr)
+        sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
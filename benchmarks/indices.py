@@ -0,0 +1,150 @@
+"""Plano e latência das consultas quentes de chave/competidor, sem e com índices.
+
+Popula uma base com milhões de chaves espalhadas em vários torneios, roda as
+consultas usadas pelo serviço sem os índices compostos, cria os índices e
+roda de novo. A base apontada por --url é apagada e recriada.
+
+    python benchmarks/indices.py --url sqlite:////tmp/indices.db --chaves 2000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, insert, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from torneios import db  # noqa: E402
+from torneios.models import Chave, Competidor, Torneio  # noqa: E402
+
+CONSULTAS = {
+    "chaves do torneio": "SELECT * FROM chave WHERE torneio_id = :torneio_id",
+    "chaves por rodada e grupo": (
+        "SELECT * FROM chave WHERE torneio_id = :torneio_id "
+        "AND rodada = :rodada AND grupo = 'a'"
+    ),
+    "final e terceiro lugar": (
+        "SELECT * FROM chave WHERE torneio_id = :torneio_id "
+        "AND rodada IN (0, 1) ORDER BY rodada"
+    ),
+    "competidores do torneio": (
+        "SELECT * FROM competidor WHERE torneio_id = :torneio_id ORDER BY id"
+    ),
+}
+LOTE = 50_000
+
+
+def popular(engine, qtd_chaves, chaves_por_torneio):
+    qtd_torneios = qtd_chaves // chaves_por_torneio
+    with engine.begin() as conexao:
+        conexao.execute(
+            insert(Torneio.__table__),
+            [
+                {"id": i, "nome_torneio": f"Torneio {i}", "is_chaveado": True}
+                for i in range(1, qtd_torneios + 1)
+            ],
+        )
+    competidores, chaves = [], []
+    for torneio_id in range(1, qtd_torneios + 1):
+        for i in range(chaves_por_torneio):
+            competidores.append({"nome_competidor": f"c{i}", "torneio_id": torneio_id})
+        # Rodadas de grupo dobrando de tamanho, depois final (1) e terceiro (0)
+        rodada, restantes = 2, chaves_por_torneio - 2
+        while restantes > 0:
+            for grupo in "ab":
+                for _ in range(min(2 ** (rodada - 2), restantes)):
+                    chaves.append(
+                        {"torneio_id": torneio_id, "rodada": rodada, "grupo": grupo}
+                    )
+                    restantes -= 1
+            rodada += 1
+        chaves.append({"torneio_id": torneio_id, "rodada": 1, "grupo": "f"})
+        chaves.append({"torneio_id": torneio_id, "rodada": 0, "grupo": "f"})
+        if len(chaves) >= LOTE:
+            gravar(engine, competidores, chaves)
+            competidores, chaves = [], []
+    gravar(engine, competidores, chaves)
+    return qtd_torneios
+
+
+def gravar(engine, competidores, chaves):
+    with engine.begin() as conexao:
+        if competidores:
+            conexao.execute(insert(Competidor.__table__), competidores)
+        if chaves:
+            conexao.execute(insert(Chave.__table__), chaves)
+
+
+def explicar(conexao, sql, parametros):
+    if conexao.dialect.name == "sqlite":
+        linhas = conexao.execute(text("EXPLAIN QUERY PLAN " + sql), parametros)
+        return [linha[-1] for linha in linhas]
+    return [linha[0] for linha in conexao.execute(text("EXPLAIN " + sql), parametros)]
+
+
+def medir(engine, qtd_torneios, repeticoes):
+    resultados = {}
+    with engine.connect() as conexao:
+        for nome, sql in CONSULTAS.items():
+            parametros = {"torneio_id": qtd_torneios // 2, "rodada": 2}
+            plano = explicar(conexao, sql, parametros)
+            tempos = []
+            for _ in range(repeticoes):
+                parametros["torneio_id"] = random.randint(1, qtd_torneios)
+                inicio = time.perf_counter()
+                conexao.execute(text(sql), parametros).fetchall()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            resultados[nome] = (plano, statistics.median(tempos), max(tempos))
+    return resultados
+
+
+def imprimir(titulo, resultados):
+    print(f"\n== {titulo} ==")
+    for nome, (plano, mediana, maximo) in resultados.items():
+        print(f"{nome}: mediana {mediana:.3f} ms, máximo {maximo:.3f} ms")
+        for linha in plano:
+            print(f"    {linha}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/indices.db")
+    parser.add_argument("--chaves", type=int, default=2_000_000)
+    parser.add_argument("--chaves-por-torneio", type=int, default=64)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    indices = [
+        indice
+        for tabela in (Chave.__table__, Competidor.__table__)
+        for indice in tabela.indexes
+    ]
+    with engine.begin() as conexao:
+        for indice in indices:
+            indice.drop(conexao)
+
+    inicio = time.perf_counter()
+    qtd_torneios = popular(engine, args.chaves, args.chaves_por_torneio)
+    print(
+        f"{args.chaves} chaves em {qtd_torneios} torneios populadas em "
+        f"{time.perf_counter() - inicio:.1f}s"
+    )
+    imprimir("sem índices", medir(engine, qtd_torneios, args.repeticoes))
+
+    inicio = time.perf_counter()
+    with engine.begin() as conexao:
+        for indice in indices:
+            indice.create(conexao)
+        conexao.execute(text("ANALYZE"))
+    print(f"\níndices criados em {time.perf_counter() - inicio:.1f}s")
+    imprimir("com índices", medir(engine, qtd_torneios, args.repeticoes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Vazão da carga de benchmarks/carga.py com cada perfil de engine da config.
+
+Para cada perfil (as classes de torneios/config.py, e ``biblioteca`` com os
+padrões do SQLAlchemy e do banco) a base é recriada do zero e a mesma carga de
+torneios completos roda em paralelo. Sai, por perfil, a vazão, os erros (pool
+esgotado e "database is locked" aparecem como 500) e o pior p95 entre as rotas:
+
+    python benchmarks/perfis.py --concorrencia 16
+    python benchmarks/perfis.py --url postgresql://localhost/bench --perfis production
+"""
+import argparse
+import json
+import os
+import sys
+
+from sqlalchemy.engine import make_url
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga import rodar_carga  # noqa: E402
+from torneios import create_app, db  # noqa: E402
+from torneios.config import Config, config  # noqa: E402
+
+PERFIS = {"biblioteca": Config, **config}
+
+
+def apagar_sqlite(url):
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or not url.database:
+        return
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(url.database + sufixo):
+            os.remove(url.database + sufixo)
+
+
+def medir_perfil(nome, args):
+    apagar_sqlite(args.url)
+    config[f"perfil_{nome}"] = type(
+        f"Perfil{nome.title()}Config",
+        (PERFIS[nome],),
+        {"SQLALCHEMY_DATABASE_URI": args.url, "METRICAS": False},
+    )
+    app = create_app(f"perfil_{nome}")
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    try:
+        relatorio = rodar_carga(
+            app,
+            args.torneios,
+            args.competidores,
+            args.concorrencia,
+            0,
+            args.servidor,
+        )
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+    return {
+        "por_segundo": relatorio["por_segundo"],
+        "requisicoes": relatorio["requisicoes"],
+        "erros": sum(rota["erros"] for rota in relatorio["rotas"].values()),
+        "pior_p95_ms": max(rota["p95_ms"] for rota in relatorio["rotas"].values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/perfis.db")
+    parser.add_argument(
+        "--perfis",
+        default=",".join(PERFIS),
+        help="perfis separados por vírgula: " + ", ".join(PERFIS),
+    )
+    parser.add_argument("--torneios", type=int, default=40)
+    parser.add_argument("--competidores", type=int, default=16)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument(
+        "--servidor", action="store_true", help="sobe um servidor Werkzeug local"
+    )
+    parser.add_argument("--json", action="store_true", help="relatório em JSON")
+    args = parser.parse_args()
+
+    resultado = {nome: medir_perfil(nome, args) for nome in args.perfis.split(",")}
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+    for nome, dados in resultado.items():
+        print(
+            f"{nome}: {dados['por_segundo']} req/s, {dados['requisicoes']} req, "
+            f"{dados['erros']} erros, pior p95 {dados['pior_p95_ms']} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -87,11 +87,20 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info("No changes in schema detected.")
 
+    connectable = get_engine()
+
+    # indexes that only exist on PostgreSQL (e.g. the pg_trgm GIN index on
+    # torneio.nome_normalizado) must not show up as missing on other databases
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == "index" and connectable.dialect.name != "postgresql":
+            return not object.dialect_options["postgresql"]["using"]
+        return True
+
     conf_args = current_app.extensions["migrate"].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
-
-    connectable = get_engine()
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     with connectable.connect() as connection:
         context.configure(
@@ -0,0 +1,82 @@
+"""busca indexada pelo nome do torneio
+
+Revision ID: 1350d74ec6ad
+Revises: 56acc353d39e
+Create Date: 2026-10-18 10:02:55.418210
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "1350d74ec6ad"
+down_revision = "56acc353d39e"
+branch_labels = None
+depends_on = None
+
+LOTE = 5000
+
+
+def normalizar_nome(nome):
+    # Cópia de torneios.models.normalizar_nome, congelada para esta revisão
+    sem_acentos = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore")
+    return " ".join(re.findall(r"[a-z0-9]+", sem_acentos.decode().lower()))
+
+
+def upgrade():
+    with op.batch_alter_table("torneio", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("nome_normalizado", sa.String(), nullable=True))
+
+    conexao = op.get_bind()
+    torneio = sa.table(
+        "torneio",
+        sa.column("id", sa.Integer),
+        sa.column("nome_torneio", sa.String),
+        sa.column("nome_normalizado", sa.String),
+    )
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(torneio.c.id, torneio.c.nome_torneio)
+            .where(torneio.c.id > ultimo_id)
+            .order_by(torneio.c.id)
+            .limit(LOTE)
+        ).all()
+        if not linhas:
+            break
+        conexao.execute(
+            torneio.update()
+            .where(torneio.c.id == sa.bindparam("id_torneio"))
+            .values(nome_normalizado=sa.bindparam("nome")),
+            [
+                {"id_torneio": id_torneio, "nome": normalizar_nome(nome or "")}
+                for id_torneio, nome in linhas
+            ],
+        )
+        ultimo_id = linhas[-1].id
+
+    op.create_index(
+        "ix_torneio_nome_normalizado", "torneio", ["nome_normalizado"], unique=False
+    )
+    if conexao.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_torneio_nome_normalizado_trgm",
+            "torneio",
+            ["nome_normalizado"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"nome_normalizado": "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_torneio_nome_normalizado_trgm", table_name="torneio")
+    op.drop_index("ix_torneio_nome_normalizado", table_name="torneio")
+    with op.batch_alter_table("torneio", schema=None) as batch_op:
+        batch_op.drop_column("nome_normalizado")
@@ -0,0 +1,44 @@
+"""ponteiros para a próxima chave
+
+Revision ID: 22804781cab3
+Revises: 96fb5b7aa072
+Create Date: 2026-10-18 09:14:02.118954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "22804781cab3"
+down_revision = "96fb5b7aa072"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chave", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("proxima_chave_id", sa.Integer(), nullable=True))
+        batch_op.add_column(
+            sa.Column("vaga_proxima_chave", sa.String(length=1), nullable=True)
+        )
+        batch_op.add_column(sa.Column("chave_perdedor_id", sa.Integer(), nullable=True))
+        batch_op.add_column(
+            sa.Column("vaga_chave_perdedor", sa.String(length=1), nullable=True)
+        )
+        batch_op.create_foreign_key(
+            "fk_chave_proxima_chave_id_chave", "chave", ["proxima_chave_id"], ["id"]
+        )
+        batch_op.create_foreign_key(
+            "fk_chave_chave_perdedor_id_chave", "chave", ["chave_perdedor_id"], ["id"]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("chave", schema=None) as batch_op:
+        batch_op.drop_constraint("fk_chave_chave_perdedor_id_chave", type_="foreignkey")
+        batch_op.drop_constraint("fk_chave_proxima_chave_id_chave", type_="foreignkey")
+        batch_op.drop_column("vaga_chave_perdedor")
+        batch_op.drop_column("chave_perdedor_id")
+        batch_op.drop_column("vaga_proxima_chave")
+        batch_op.drop_column("proxima_chave_id")
@@ -0,0 +1,34 @@
+"""índices de chave e competidor
+
+Revision ID: 56acc353d39e
+Revises: 22804781cab3
+Create Date: 2026-10-18 09:20:37.664012
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "56acc353d39e"
+down_revision = "22804781cab3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # torneio_id + rodada + grupo atende o chaveamento do torneio, os filtros por
+    # rodada/grupo e o "rodada IN (0, 1)" da classificação
+    op.create_index(
+        "ix_chave_torneio_id_rodada_grupo",
+        "chave",
+        ["torneio_id", "rodada", "grupo"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_competidor_torneio_id_id", "competidor", ["torneio_id", "id"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_competidor_torneio_id_id", table_name="competidor")
+    op.drop_index("ix_chave_torneio_id_rodada_grupo", table_name="chave")
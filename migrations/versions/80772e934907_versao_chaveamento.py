@@ -0,0 +1,33 @@
+"""versão do chaveamento do torneio
+
+Revision ID: 80772e934907
+Revises: 1350d74ec6ad
+Create Date: 2026-10-18 10:41:09.772531
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "80772e934907"
+down_revision = "1350d74ec6ad"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("torneio", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "versao_chaveamento",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("torneio", schema=None) as batch_op:
+        batch_op.drop_column("versao_chaveamento")
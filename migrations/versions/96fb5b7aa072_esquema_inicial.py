@@ -0,0 +1,61 @@
+"""esquema inicial
+
+Revision ID: 96fb5b7aa072
+Revises: 
+Create Date: 2026-10-18 09:12:41.503327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "96fb5b7aa072"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "torneio",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome_torneio", sa.String(), nullable=True),
+        sa.Column("qtd_competidores", sa.Integer(), nullable=True),
+        sa.Column("is_chaveado", sa.Boolean(), nullable=True),
+        sa.Column("is_finalizado", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "competidor",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome_competidor", sa.String(), nullable=True),
+        sa.Column("torneio_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["torneio_id"], ["torneio.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "chave",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("torneio_id", sa.Integer(), nullable=True),
+        sa.Column("competidor_a_id", sa.Integer(), nullable=True),
+        sa.Column("competidor_b_id", sa.Integer(), nullable=True),
+        sa.Column("rodada", sa.Integer(), nullable=True),
+        sa.Column("grupo", sa.String(), nullable=True),
+        sa.Column("bye", sa.Boolean(), nullable=True),
+        sa.Column("classificado_bye", sa.Boolean(), nullable=True),
+        sa.Column("resultado_comp_a", sa.Integer(), nullable=True),
+        sa.Column("resultado_comp_b", sa.Integer(), nullable=True),
+        sa.Column("vencedor_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["competidor_a_id"], ["competidor.id"]),
+        sa.ForeignKeyConstraint(["competidor_b_id"], ["competidor.id"]),
+        sa.ForeignKeyConstraint(["torneio_id"], ["torneio.id"]),
+        sa.ForeignKeyConstraint(["vencedor_id"], ["competidor.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("chave")
+    op.drop_table("competidor")
+    op.drop_table("torneio")
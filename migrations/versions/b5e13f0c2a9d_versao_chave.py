@@ -0,0 +1,28 @@
+"""versão da chave para trava otimista
+
+Revision ID: b5e13f0c2a9d
+Revises: 80772e934907
+Create Date: 2026-10-18 11:02:37.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b5e13f0c2a9d"
+down_revision = "80772e934907"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chave", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("versao", sa.Integer(), nullable=False, server_default="1")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("chave", schema=None) as batch_op:
+        batch_op.drop_column("versao")
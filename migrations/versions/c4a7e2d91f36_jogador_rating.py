@@ -0,0 +1,52 @@
+"""jogadores entre torneios e rating
+
+Revision ID: c4a7e2d91f36
+Revises: b5e13f0c2a9d
+Create Date: 2026-10-18 11:24:09.581307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c4a7e2d91f36"
+down_revision = "b5e13f0c2a9d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jogador",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nome", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "rating",
+        sa.Column("jogador_id", sa.Integer(), nullable=False),
+        sa.Column("pontos", sa.Float(), nullable=False),
+        sa.Column("partidas", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["jogador_id"], ["jogador.id"]),
+        sa.PrimaryKeyConstraint("jogador_id"),
+    )
+    op.create_index("ix_rating_pontos", "rating", ["pontos"], unique=False)
+    with op.batch_alter_table("competidor", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("jogador_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_competidor_jogador_id_jogador", "jogador", ["jogador_id"], ["id"]
+        )
+    with op.batch_alter_table("chave", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("registrado_em", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("chave", schema=None) as batch_op:
+        batch_op.drop_column("registrado_em")
+    with op.batch_alter_table("competidor", schema=None) as batch_op:
+        batch_op.drop_constraint("fk_competidor_jogador_id_jogador", type_="foreignkey")
+        batch_op.drop_column("jogador_id")
+    op.drop_index("ix_rating_pontos", table_name="rating")
+    op.drop_table("rating")
+    op.drop_table("jogador")
@@ -0,0 +1,67 @@
+"""busca por prefixo de cada palavra do nome do torneio
+
+Revision ID: e3b8d5a41c07
+Revises: c4a7e2d91f36
+Create Date: 2026-10-18 14:12:37.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3b8d5a41c07"
+down_revision = "c4a7e2d91f36"
+branch_labels = None
+depends_on = None
+
+LOTE = 5000
+
+
+def upgrade():
+    termo_torneio = op.create_table(
+        "torneio_termo",
+        sa.Column(
+            "termo",
+            sa.String().with_variant(sa.String(collation="C"), "postgresql"),
+            nullable=False,
+        ),
+        sa.Column("torneio_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["torneio_id"], ["torneio.id"]),
+        sa.PrimaryKeyConstraint("termo", "torneio_id"),
+    )
+
+    conexao = op.get_bind()
+    torneio = sa.table(
+        "torneio",
+        sa.column("id", sa.Integer),
+        sa.column("nome_normalizado", sa.String),
+    )
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(torneio.c.id, torneio.c.nome_normalizado)
+            .where(torneio.c.id > ultimo_id)
+            .order_by(torneio.c.id)
+            .limit(LOTE)
+        ).all()
+        if not linhas:
+            break
+        termos = [
+            {"termo": termo, "torneio_id": id_torneio}
+            for id_torneio, nome in linhas
+            for termo in set((nome or "").split())
+        ]
+        if termos:
+            conexao.execute(termo_torneio.insert(), termos)
+        ultimo_id = linhas[-1].id
+
+    # O b-tree do nome inteiro só servia à busca por prefixo
+    op.drop_index("ix_torneio_nome_normalizado", table_name="torneio")
+
+
+def downgrade():
+    op.create_index(
+        "ix_torneio_nome_normalizado", "torneio", ["nome_normalizado"], unique=False
+    )
+    op.drop_table("torneio_termo")
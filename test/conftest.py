@@ -1,7 +1,10 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from torneios import db, create_app
+from torneios.config import TestingConfig, config
+from torneios.eventos import Distribuidor
+from torneios.models import Competidor, Torneio
 
 
 @pytest.fixture
@@ -22,6 +25,71 @@ def app():
     yield app
 
 
+@pytest.fixture
+def criar_app(monkeypatch):
+    """App novo com a config de teste ajustada: ``criar_app(DEBUG=True)``"""
+
+    def criar(**configuracoes):
+        monkeypatch.setitem(
+            config, "ajustado", type("AjustadoConfig", (TestingConfig,), configuracoes)
+        )
+        return create_app("ajustado")
+
+    return criar
+
+
+@pytest.fixture
+def criar_torneio(app, db_session):
+    """Grava um torneio e devolve o id: ``criar_torneio("Copa", 8)`` inscreve ``c0``
+    a ``c7``; uma lista no lugar do número dá os nomes dos competidores"""
+
+    def criar(nome, competidores=0, app=app):
+        if isinstance(competidores, int):
+            competidores = [f"c{i}" for i in range(competidores)]
+        with app.app_context():
+            torneio = Torneio(nome_torneio=nome)
+            torneio.qtd_competidores = len(competidores)
+            db.session.add(torneio)
+            db.session.flush()
+            db.session.add_all(
+                Competidor(nome_competidor=nome_competidor, torneio_id=torneio.id)
+                for nome_competidor in competidores
+            )
+            db.session.commit()
+            return torneio.id
+
+    return criar
+
+
+@pytest.fixture(autouse=True)
+def limpa_cache_chaveamento(app):
+    """Ids de torneio se repetem entre testes, pois as tabelas são recriadas"""
+    app.extensions["cache_chaveamento"].limpar()
+
+
+@pytest.fixture(autouse=True)
+def limpa_eventos(app):
+    """Pelo mesmo motivo, os canais de eventos começam vazios a cada teste"""
+    app.extensions["eventos"] = Distribuidor(
+        app.config["EVENTOS_BUFFER"], app.config["EVENTOS_CANAIS"]
+    )
+
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture
+def queries_executadas(app):
+    """Coleta os statements SQL emitidos pela engine do app"""
+    statements = []
+
+    def registra(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", registra)
+    yield statements
+    event.remove(engine, "before_cursor_execute", registra)
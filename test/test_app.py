@@ -1,4 +1,8 @@
-from torneios.models import Torneio
+import json
+
+from torneios.binario import TIPO_CONTEUDO as TIPO_BINARIO
+from torneios.binario import decodificar_chaveamento
+from torneios.models import Competidor, Jogador, Rating, Torneio
 from unittest.mock import patch
 
 from torneios.service import PendingClassification, ResultadoService
@@ -71,3 +75,452 @@ def test_listar_torneios_torneio_not_found(client, db_session, app):
         response = client.get("/tournament", json={"id": 1})
         assert response.status_code == 200
         assert response.json == {"torneios": []}
+
+
+def test_cadastrar_competidores_em_lote_return_201(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Lote")
+        payload = {"nomes": ["Clara", "Santos", "Frida"]}
+        response = client.post(
+            f"/tournament/{torneio_id}/competidores:bulk", json=payload
+        )
+        assert response.status_code == 201
+        ids = response.json["ids"]
+        assert len(ids) == 3
+        response = client.get(f"/tournament/{torneio_id}/competidores")
+        nomes = {c["id"]: c["nome"] for c in response.json["competidores"]}
+        assert [nomes[i] for i in ids] == payload["nomes"]
+
+
+def test_cadastrar_competidores_em_lote_lista_vazia(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Lote")
+        response = client.post(
+            f"/tournament/{torneio_id}/competidores:bulk", json={"nomes": []}
+        )
+        assert response.status_code == 422
+
+
+def contar_queries_get_chaveamento(
+    app, client, criar_torneio, qtd_competidores, queries
+):
+    torneio_id = criar_torneio("Contagem", qtd_competidores)
+    client.get(f"/tournament/{torneio_id}/match")  # dispara o sorteio
+    app.extensions["cache_chaveamento"].limpar()
+    queries.clear()
+    response = client.get(f"/tournament/{torneio_id}/match")
+    assert response.status_code == 200
+    assert len(response.json["chaveamentos"]) == qtd_competidores
+    return len(queries)
+
+
+def test_buscar_chaveamento_qtd_queries_constante(
+    client, app, queries_executadas, criar_torneio
+):
+    queries_8 = contar_queries_get_chaveamento(
+        app, client, criar_torneio, 8, queries_executadas
+    )
+    queries_64 = contar_queries_get_chaveamento(
+        app, client, criar_torneio, 64, queries_executadas
+    )
+    assert queries_8 == queries_64
+
+
+def test_buscar_chaveamento_nao_escreve_no_banco(
+    client, app, queries_executadas, criar_torneio
+):
+    with app.app_context():
+        # grupos de 5, com byes em duas rodadas
+        torneio_id = criar_torneio("Somente leitura", 10)
+        primeira = client.get(f"/tournament/{torneio_id}/match")  # dispara o sorteio
+        queries_executadas.clear()
+        for _ in range(3):
+            app.extensions["cache_chaveamento"].limpar()
+            response = client.get(f"/tournament/{torneio_id}/match")
+            assert response.status_code == 200
+            assert response.json == primeira.json
+            assert response.headers["ETag"] == primeira.headers["ETag"]
+        escritas = [
+            query
+            for query in queries_executadas
+            if query.lstrip().split()[0].upper() in ("INSERT", "UPDATE", "DELETE")
+        ]
+        assert escritas == []
+
+
+def test_inserir_resultados_em_lote(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Lote", list("abcd"))
+        chaves = client.get(f"/tournament/{torneio_id}/match").json["chaveamentos"]
+        etag = client.get(f"/tournament/{torneio_id}/match").headers["ETag"]
+        semi_finais = [chave["id"] for chave in chaves if chave["rodada"] == 2]
+        placar = {"resultado_comp_a": 1, "resultado_comp_b": 0}
+        response = client.post(
+            f"/tournament/{torneio_id}/match:bulk",
+            json={
+                "resultados": [
+                    {"id_partida": id_partida, **placar}
+                    for id_partida in semi_finais + [999]
+                ]
+            },
+        )
+        assert response.status_code == 200
+        assert [item["status_code"] for item in response.json["resultados"]] == [
+            201,
+            201,
+            401,
+        ]
+        response = client.get(
+            f"/tournament/{torneio_id}/match", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        finais = [c for c in response.json["chaveamentos"] if c["rodada"] != 2]
+        assert all(chave["adversario_a"] and chave["adversario_b"] for chave in finais)
+
+
+def test_inserir_resultados_em_lote_torneio_not_found(client, db_session, app):
+    with app.app_context():
+        response = client.post(
+            "/tournament/999/match:bulk",
+            json={
+                "resultados": [
+                    {"id_partida": 1, "resultado_comp_a": 1, "resultado_comp_b": 0}
+                ]
+            },
+        )
+        assert response.status_code == 404
+
+
+def test_sortear_torneios_em_lote_admin(client, app, monkeypatch, criar_torneio):
+    with app.app_context():
+        ids = [criar_torneio(f"Fechamento {i}", 5) for i in range(2)]
+        ids.append(criar_torneio("Fechamento 2"))
+        payload = {"ids": ids, "workers": 2}
+
+        response = client.post("/admin/tournament/match:draw", json=payload)
+        assert response.status_code == 403
+        monkeypatch.setitem(app.config, "ADMIN_TOKEN", "segredo")
+        response = client.post(
+            "/admin/tournament/match:draw",
+            json=payload,
+            headers={"X-Admin-Token": "errado"},
+        )
+        assert response.status_code == 403
+
+        response = client.post(
+            "/admin/tournament/match:draw",
+            json=payload,
+            headers={"X-Admin-Token": "segredo"},
+        )
+        assert response.status_code == 200
+        resultados = response.json["resultados"]
+        assert [item["id_torneio"] for item in resultados] == payload["ids"]
+        assert [item["status_code"] for item in resultados] == [201, 201, 422]
+        assert all(item["segundos"] > 0 for item in resultados)
+        # O GET /match já encontra o chaveamento pronto
+        response = client.get(f"/tournament/{ids[0]}/match")
+        assert response.json["chaveamentos"]
+
+
+def test_ranking_de_jogadores(client, db_session, app):
+    with app.app_context():
+        ids = [
+            client.post("/player", json={"nome": nome}).json["id"]
+            for nome in ("Ana", "Bia")
+        ]
+        response = client.post("/tournament", json={"nome_torneio": "Ranking"})
+        torneio_id = response.json["id"]
+        for id_jogador in ids:
+            response = client.post(
+                f"/tournament/{torneio_id}/competidor",
+                json={"nome_competidor": f"j{id_jogador}", "jogador_id": id_jogador},
+            )
+            assert response.status_code == 201
+        response = client.post(
+            f"/tournament/{torneio_id}/competidor",
+            json={"nome_competidor": "fantasma", "jogador_id": 999},
+        )
+        assert response.status_code == 404
+
+        chaves = client.get(f"/tournament/{torneio_id}/match").json["chaveamentos"]
+        final = next(chave for chave in chaves if chave["rodada"] == "Final")
+        client.post(
+            f"/tournament/{torneio_id}/match/{final['id']}",
+            json={"resultado_comp_a": 1, "resultado_comp_b": 3},
+        )
+        ranking = client.get("/ranking?limit=1").json["ranking"]
+        vencedor = final["adversario_b"]["nome"]
+        assert [jogador["nome"] for jogador in ranking] == [
+            "Ana" if vencedor == f"j{ids[0]}" else "Bia"
+        ]
+        assert ranking[0]["rating"] > 1500
+        assert ranking[0]["partidas"] == 1
+
+        result = app.test_cli_runner().invoke(args=["reconstruir-ratings"])
+        assert result.exit_code == 0
+        assert "1 partida(s) de 2 jogador(es)" in result.output
+        assert client.get("/ranking?limit=1").json["ranking"] == ranking
+
+
+def test_resultado_de_jogador_sem_rating(client, db_session, app, criar_torneio):
+    with app.app_context():
+        # Jogadores gravados direto no banco, sem passar pelo POST /player
+        jogadores = [Jogador(nome=nome) for nome in ("Cris", "Davi")]
+        db_session.add_all(jogadores)
+        db_session.commit()
+        torneio_id = criar_torneio(
+            "Sem rating", [jogador.nome for jogador in jogadores]
+        )
+        por_nome = {jogador.nome: jogador.id for jogador in jogadores}
+        for competidor in db_session.query(Competidor).filter_by(torneio_id=torneio_id):
+            competidor.jogador_id = por_nome[competidor.nome_competidor]
+        db_session.commit()
+
+        chaves = client.get(f"/tournament/{torneio_id}/match").json["chaveamentos"]
+        final = next(chave for chave in chaves if chave["rodada"] == "Final")
+        response = client.post(
+            f"/tournament/{torneio_id}/match/{final['id']}",
+            json={"resultado_comp_a": 2, "resultado_comp_b": 0},
+        )
+        assert response.status_code == 201
+        ratings = {
+            linha.jogador_id: linha
+            for linha in db_session.query(Rating).populate_existing()
+        }
+        vencedor, perdedor = (
+            jogadores if final["adversario_a"]["nome"] == "Cris" else jogadores[::-1]
+        )
+        assert ratings[vencedor.id].pontos > 1500 > ratings[perdedor.id].pontos
+        assert ratings[vencedor.id].partidas == ratings[perdedor.id].partidas == 1
+
+
+def test_buscar_chaveamento_binario_igual_ao_json(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Placar", [f"Ção {i}" for i in range(11)])
+        chaves = client.get(f"/tournament/{torneio_id}/match").json["chaveamentos"]
+        partida = next(c for c in chaves if c["adversario_a"] and c["adversario_b"])
+        client.post(
+            f"/tournament/{torneio_id}/match/{partida['id']}",
+            json={"resultado_comp_a": 0, "resultado_comp_b": 3},
+        )
+        completo = client.get(f"/tournament/{torneio_id}/match")
+        binario = client.get(f"/tournament/{torneio_id}/match?formato=binario")
+        assert binario.status_code == 200
+        assert binario.mimetype == TIPO_BINARIO
+        assert binario.headers["ETag"] != completo.headers["ETag"]
+        assert len(binario.data) < len(completo.data)
+
+        snapshot = decodificar_chaveamento(binario.data)
+        assert snapshot.torneio_id == torneio_id
+
+        def adversario(id_competidor):
+            if id_competidor is None:
+                return None
+            return {"id": id_competidor, "nome": snapshot.nomes[id_competidor]}
+
+        rodadas = {0: "Disputa Terceiro Lugar", 1: "Final"}
+        reconstruido = [
+            {
+                "id": chave.id,
+                "adversario_a": adversario(chave.competidor_a_id),
+                "adversario_b": adversario(chave.competidor_b_id),
+                "rodada": rodadas.get(chave.rodada, chave.rodada),
+                "grupo": chave.grupo,
+                "vencedor": adversario(chave.vencedor_id),
+                "is_bye": chave.bye,
+                "resultado_a": chave.resultado_a,
+                "resultado_b": chave.resultado_b,
+            }
+            for chave in snapshot.chaves
+        ]
+        assert reconstruido == completo.json["chaveamentos"]
+
+        etag = binario.headers["ETag"].strip('"')
+        response = client.get(
+            f"/tournament/{torneio_id}/match?formato=binario",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+
+
+def test_buscar_chaveamento_stream_igual_ao_json(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Streaming", [f"Ção {i}" for i in range(10)])
+        chaves = client.get(f"/tournament/{torneio_id}/match").json["chaveamentos"]
+        partida = next(c for c in chaves if c["adversario_a"] and c["adversario_b"])
+        client.post(
+            f"/tournament/{torneio_id}/match/{partida['id']}",
+            json={"resultado_comp_a": 0, "resultado_comp_b": 3},
+        )
+        app.extensions["cache_chaveamento"].limpar()
+        streaming = client.get(f"/tournament/{torneio_id}/match?stream=true")
+        assert streaming.status_code == 200
+        assert streaming.mimetype == "application/json"
+        corpo_streaming = streaming.data
+        completo = client.get(f"/tournament/{torneio_id}/match")
+        # Sem Content-Length: o corpo foi escrito enquanto era lido do banco
+        assert "Content-Length" not in streaming.headers
+        assert "Content-Length" in completo.headers
+        assert corpo_streaming == completo.data
+        assert streaming.headers["ETag"] == completo.headers["ETag"]
+
+
+def test_listar_torneios_paginado(client, app, criar_torneio):
+    with app.app_context():
+        for i in range(3):
+            criar_torneio(f"Torneio {i}")
+        response = client.get("/tournament?limit=2")
+        assert response.status_code == 200
+        assert len(response.json["torneios"]) == 2
+        after_id = response.json["proximo_after_id"]
+        response = client.get(f"/tournament?limit=2&after_id={after_id}")
+        assert len(response.json["torneios"]) == 1
+        assert "proximo_after_id" not in response.json
+
+
+def test_buscar_competidores_ndjson(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Streaming", ["Clara", "Santos", "Frida"])
+        response = client.get(f"/tournament/{torneio_id}/competidores?formato=ndjson")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        linhas = [json.loads(linha) for linha in response.data.splitlines()]
+        assert [linha["nome"] for linha in linhas] == ["Clara", "Santos", "Frida"]
+
+
+def test_buscar_competidores_ndjson_torneio_not_found(client, db_session, app):
+    with app.app_context():
+        response = client.get("/tournament/999/competidores?formato=ndjson")
+        assert response.status_code == 404
+
+
+def test_buscar_chaveamento_etag_e_304(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("ETag", list("abcd"))
+        response = client.get(f"/tournament/{torneio_id}/match")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        response = client.get(
+            f"/tournament/{torneio_id}/match", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.data == b""
+
+        partida = next(
+            chave
+            for chave in client.get(f"/tournament/{torneio_id}/match").json[
+                "chaveamentos"
+            ]
+            if chave["adversario_a"] and chave["adversario_b"]
+        )
+        response = client.post(
+            f"/tournament/{torneio_id}/match/{partida['id']}",
+            json={"resultado_comp_a": 2, "resultado_comp_b": 1},
+        )
+        assert response.status_code == 201
+        response = client.get(
+            f"/tournament/{torneio_id}/match", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        atualizada = next(
+            chave
+            for chave in response.json["chaveamentos"]
+            if chave["id"] == partida["id"]
+        )
+        assert atualizada["vencedor"] == partida["adversario_a"]
+
+
+def test_odds_do_torneio(client, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Bolão", 4)
+
+        response = client.get(f"/tournament/{torneio_id}/odds?simulacoes=1000")
+        assert response.status_code == 200
+        assert response.json["simulacoes"] == 1000
+        odds = response.json["odds"]
+        assert len(odds) == 4
+        for colocacao in ("campeao", "vice", "terceiro", "quarto"):
+            assert abs(sum(item[colocacao] for item in odds) - 1) < 1e-9
+        assert odds == sorted(odds, key=lambda item: -item["campeao"])
+
+        etag = response.headers["ETag"].strip('"')
+        response = client.get(
+            f"/tournament/{torneio_id}/odds?simulacoes=1000",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+
+        chaves = client.get(f"/tournament/{torneio_id}/match").json["chaveamentos"]
+        semi = next(chave for chave in chaves if chave["rodada"] == 2)
+        client.post(
+            f"/tournament/{torneio_id}/match/{semi['id']}",
+            json={"resultado_comp_a": 2, "resultado_comp_b": 0},
+        )
+        response = client.get(
+            f"/tournament/{torneio_id}/odds?simulacoes=1000",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        por_id = {item["competidor"]["id"]: item for item in response.json["odds"]}
+        eliminado = por_id[semi["adversario_b"]["id"]]
+        assert eliminado["campeao"] == eliminado["vice"] == 0
+        assert eliminado["terceiro"] + eliminado["quarto"] == 1
+
+
+def test_odds_mudam_com_ratings_de_outro_torneio(client, db_session, app):
+    ids_jogadores = [
+        client.post("/player", json={"nome": f"j{i}"}).json["id"] for i in range(2)
+    ]
+    ids_torneios = []
+    for nome in ("Odds", "Outro"):
+        id_torneio = client.post("/tournament", json={"nome_torneio": nome}).json["id"]
+        for id_jogador in ids_jogadores:
+            client.post(
+                f"/tournament/{id_torneio}/competidor",
+                json={"nome_competidor": f"j{id_jogador}", "jogador_id": id_jogador},
+            )
+        ids_torneios.append(id_torneio)
+    odds_url = f"/tournament/{ids_torneios[0]}/odds?simulacoes=1000"
+    response = client.get(odds_url)
+    etag = response.headers["ETag"].strip('"')
+    antes = {item["competidor"]["nome"]: item for item in response.json["odds"]}
+
+    chaves = client.get(f"/tournament/{ids_torneios[1]}/match").json["chaveamentos"]
+    final = next(chave for chave in chaves if chave["rodada"] == "Final")
+    client.post(
+        f"/tournament/{ids_torneios[1]}/match/{final['id']}",
+        json={"resultado_comp_a": 1, "resultado_comp_b": 0},
+    )
+    response = client.get(odds_url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    depois = {item["competidor"]["nome"]: item for item in response.json["odds"]}
+    vencedor = final["adversario_a"]["nome"]
+    assert depois[vencedor]["campeao"] > antes[vencedor]["campeao"]
+
+
+def test_odds_simulacoes_limitadas(client, db_session, app, monkeypatch):
+    id_torneio = client.post("/tournament", json={"nome_torneio": "Limite"}).json["id"]
+    for i in range(4):
+        client.post(
+            f"/tournament/{id_torneio}/competidor", json={"nome_competidor": f"c{i}"}
+        )
+    response = client.get(f"/tournament/{id_torneio}/odds?simulacoes=2000")
+    assert response.status_code == 422
+
+    monkeypatch.setitem(app.config, "ODDS_MAX_CELULAS", 4 * 500)
+    response = client.get(f"/tournament/{id_torneio}/odds?simulacoes=1000")
+    assert response.status_code == 200
+    assert response.json["simulacoes"] == 500
+
+
+def test_odds_simulacoes_pedidas_com_1024_competidores(client, criar_torneio):
+    id_torneio = criar_torneio("Grande", 1024)
+    response = client.get(f"/tournament/{id_torneio}/odds?simulacoes=100000")
+    assert response.status_code == 200
+    assert response.json["simulacoes"] == 100000
+
+
+def test_odds_torneio_not_found(client, db_session):
+    response = client.get("/tournament/999/odds")
+    assert response.status_code == 404
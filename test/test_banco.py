@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import text
+
+from torneios import db
+from torneios.banco import opcoes_engine, pragmas_sqlite
+from torneios.config import ProductionConfig, TestingConfig
+
+
+def perfil(classe, **configuracoes):
+    return {
+        nome: getattr(classe, nome) for nome in dir(classe) if nome.isupper()
+    } | configuracoes
+
+
+def test_opcoes_engine_postgres_em_producao():
+    opcoes = opcoes_engine(
+        perfil(
+            ProductionConfig,
+            SQLALCHEMY_DATABASE_URI="postgresql://usuario@localhost/torneios",
+        )
+    )
+    assert opcoes == {
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 5,
+        "connect_args": {"options": "-c statement_timeout=30000"},
+    }
+
+
+def test_opcoes_engine_sqlite_em_memoria_sem_pool():
+    opcoes = opcoes_engine(perfil(TestingConfig, SQLALCHEMY_DATABASE_URI="sqlite://"))
+    assert "pool_size" not in opcoes
+    assert "connect_args" not in opcoes
+
+
+def test_pragmas_sqlite_recusa_valor_desconhecido():
+    with pytest.raises(ValueError, match="SQLITE_JOURNAL_MODE"):
+        pragmas_sqlite(perfil(TestingConfig, SQLITE_JOURNAL_MODE="wal; DROP"))
+
+
+def test_perfil_sqlite_aplicado_em_cada_conexao(criar_app, tmp_path):
+    app = criar_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'perfil.db'}",
+        DB_POOL_SIZE=3,
+        SQLITE_JOURNAL_MODE="wal",
+        SQLITE_SYNCHRONOUS="normal",
+        SQLITE_BUSY_TIMEOUT_MS=1234,
+        SQLALCHEMY_ENGINE_OPTIONS={"max_overflow": 1},
+    )
+    with app.app_context():
+        assert db.engine.pool.size() == 3
+        assert db.engine.pool._max_overflow == 1  # a opção manual prevalece
+        with db.engine.connect() as conexao:
+            assert conexao.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conexao.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conexao.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        db.engine.dispose()
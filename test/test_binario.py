@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from torneios.binario import (
+    CABECALHO,
+    NOME,
+    REGISTRO,
+    codificar_chaveamento,
+    decodificar_chaveamento,
+)
+
+
+def linha(id, competidor_a_id=None, competidor_b_id=None, **campos):
+    valores = {
+        "id": id,
+        "rodada": 2,
+        "grupo": "a",
+        "bye": False,
+        "resultado_comp_a": None,
+        "resultado_comp_b": None,
+        "vencedor_id": None,
+        "competidor_a_id": competidor_a_id,
+        "competidor_a_nome": f"Nº {competidor_a_id}" if competidor_a_id else None,
+        "competidor_b_id": competidor_b_id,
+        "competidor_b_nome": f"Nº {competidor_b_id}" if competidor_b_id else None,
+    }
+    valores.update(campos)
+    return SimpleNamespace(**valores)
+
+
+def test_codificar_e_decodificar_chaveamento():
+    lotes = [
+        [
+            linha(1, 10, 11, resultado_comp_a=0, resultado_comp_b=2, vencedor_id=11),
+            linha(2, 12, bye=True, vencedor_id=12),
+        ],
+        [linha(3, 11, 12, rodada=1, grupo="f")],
+    ]
+    dados = codificar_chaveamento(7, 3, lotes)
+    snapshot = decodificar_chaveamento(dados)
+    assert (snapshot.torneio_id, snapshot.versao) == (7, 3)
+    assert snapshot.nomes == {10: "Nº 10", 11: "Nº 11", 12: "Nº 12"}
+    assert [chave.id for chave in snapshot.chaves] == [1, 2, 3]
+    primeira, bye, final = snapshot.chaves
+    assert (primeira.resultado_a, primeira.resultado_b) == (0, 2)
+    assert primeira.vencedor_id == 11
+    assert bye.bye and bye.competidor_b_id is None and bye.resultado_a is None
+    assert (final.rodada, final.grupo) == (1, "f")
+
+
+def test_decodificar_chaveamento_rejeita_bytes_invalidos():
+    dados = codificar_chaveamento(1, 1, [[linha(1, 10, 11)]])
+    tamanho_nome = NOME.size + len("Nº 10".encode())
+    assert len(dados) == CABECALHO.size + 2 * tamanho_nome + REGISTRO.size
+    with pytest.raises(ValueError):
+        decodificar_chaveamento(b"XXXX" + dados[4:])
+    with pytest.raises(ValueError):
+        decodificar_chaveamento(dados[:-1])
+    with pytest.raises(ValueError):
+        decodificar_chaveamento(dados[:10])
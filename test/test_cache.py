@@ -0,0 +1,38 @@
+from torneios.cache import CacheLRU
+
+
+def test_cache_lru_remove_o_menos_usado():
+    cache = CacheLRU(tamanho_maximo=6)
+    cache.set("a", b"aa")
+    cache.set("b", b"bb")
+    cache.set("c", b"cc")
+    assert cache.get("a") == b"aa"  # "b" passa a ser o menos usado
+    cache.set("d", b"dd")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aa"
+    assert cache.tamanho_atual == 6
+
+
+def test_cache_lru_ignora_valor_maior_que_o_limite():
+    cache = CacheLRU(tamanho_maximo=4)
+    cache.set("a", b"aa")
+    cache.set("grande", b"12345")
+    assert cache.get("grande") is None
+    assert cache.get("a") == b"aa"
+
+
+def test_cache_lru_substitui_valor():
+    cache = CacheLRU(tamanho_maximo=10)
+    cache.set("a", b"aa")
+    cache.set("a", b"aaaa")
+    assert cache.get("a") == b"aaaa"
+    assert cache.tamanho_atual == 4
+    assert len(cache) == 1
+
+
+def test_cache_lru_limpar():
+    cache = CacheLRU(tamanho_maximo=10)
+    cache.set("a", b"aa")
+    cache.limpar()
+    assert cache.get("a") is None
+    assert cache.tamanho_atual == 0
@@ -0,0 +1,113 @@
+from collections import Counter
+
+import pytest
+
+from torneios.chaveamento import montar_chaveamento
+
+
+@pytest.mark.parametrize(
+    "qtd_comp, chaves_por_rodada",
+    [
+        (2, {2: 2, 1: 1, 0: 1}),
+        (8, {3: 4, 2: 2, 1: 1, 0: 1}),
+        (10, {4: 6, 3: 4, 2: 2, 1: 1, 0: 1}),
+        (16, {4: 8, 3: 4, 2: 2, 1: 1, 0: 1}),
+        (20, {5: 10, 4: 6, 3: 4, 2: 2, 1: 1, 0: 1}),
+        (25, {5: 13, 4: 7, 3: 4, 2: 2, 1: 1, 0: 1}),
+        (32, {5: 16, 4: 8, 3: 4, 2: 2, 1: 1, 0: 1}),
+    ],
+)
+def test_montar_chaveamento_qtd_chaves_por_rodada(qtd_comp, chaves_por_rodada):
+    linhas, _ = montar_chaveamento(1, list(range(1, qtd_comp + 1)))
+    assert Counter(linha["rodada"] for linha in linhas) == chaves_por_rodada
+    assert [linha["grupo"] for linha in linhas[-2:]] == ["f", "f"]
+
+
+def test_montar_chaveamento_competidores_uma_vez_na_primeira_rodada():
+    ids = list(range(1, 26))
+    linhas, _ = montar_chaveamento(1, ids)
+    primeira_rodada = [linha for linha in linhas if linha["rodada"] == 5]
+    sorteados = [
+        competidor
+        for linha in primeira_rodada
+        for competidor in (linha["competidor_a_id"], linha["competidor_b_id"])
+        if competidor is not None
+    ]
+    assert sorted(sorteados) == ids
+    assert all(linha["torneio_id"] == 1 for linha in linhas)
+
+
+def test_montar_chaveamento_primeira_rodada_dividida_entre_os_grupos():
+    linhas, _ = montar_chaveamento(1, list(range(1, 17)))
+    primeira_rodada = [linha for linha in linhas if linha["rodada"] == 4]
+    assert Counter(linha["grupo"] for linha in primeira_rodada) == {"a": 4, "b": 4}
+    assert not any(linha["bye"] for linha in primeira_rodada)
+
+
+@pytest.mark.parametrize(
+    "qtd_comp, byes_esperados",
+    [(4, 0), (8, 0), (10, 2), (16, 0), (20, 4), (25, 2)],
+)
+def test_montar_chaveamento_byes_rodadas_subsequentes(qtd_comp, byes_esperados):
+    linhas, _ = montar_chaveamento(1, list(range(qtd_comp)))
+    primeira_rodada = linhas[0]["rodada"]
+    byes = [
+        linha for linha in linhas if linha["bye"] and linha["rodada"] < primeira_rodada
+    ]
+    assert len(byes) == byes_esperados
+
+
+def test_montar_chaveamento_bye_primeira_rodada_ja_tem_vencedor():
+    linhas, ligacoes = montar_chaveamento(1, list(range(1, 8)))  # grupos de 3 e 4
+    byes = [linha for linha in linhas if linha["bye"] and linha["rodada"] == 3]
+    assert len(byes) == 1
+    bye = byes[0]
+    assert bye["vencedor_id"] == (bye["competidor_a_id"] or bye["competidor_b_id"])
+    assert bye["classificado_bye"] is True
+    origem = linhas.index(bye)
+    _, proxima, vaga, _, _ = next(
+        ligacao for ligacao in ligacoes if ligacao[0] == origem
+    )
+    assert linhas[proxima][f"competidor_{vaga}_id"] == bye["vencedor_id"]
+
+
+def test_montar_chaveamento_byes_em_sequencia(monkeypatch):
+    # Grupos de 5 sem embaralhar: o bye da primeira rodada fica na última chave
+    # e cai direto no bye da rodada seguinte
+    monkeypatch.setattr("torneios.chaveamento.random.shuffle", lambda ids: None)
+    linhas, ligacoes = montar_chaveamento(1, list(range(1, 11)))
+    destinos = {origem: (proxima, vaga) for origem, proxima, vaga, _, _ in ligacoes}
+    for grupo in "ab":
+        byes = [
+            indice
+            for indice, linha in enumerate(linhas)
+            if linha["bye"] and linha["grupo"] == grupo
+        ]
+        assert [linhas[indice]["rodada"] for indice in byes] == [4, 3]
+        vencedor = linhas[byes[0]]["vencedor_id"]
+        assert destinos[byes[0]][0] == byes[1]
+        assert linhas[byes[1]]["vencedor_id"] == vencedor
+        assert linhas[byes[1]]["classificado_bye"] is True
+        proxima, vaga = destinos[byes[1]]
+        assert linhas[proxima][f"competidor_{vaga}_id"] == vencedor
+
+
+@pytest.mark.parametrize("qtd_comp", [2, 7, 10, 16, 25])
+def test_montar_chaveamento_ligacoes(qtd_comp):
+    linhas, ligacoes = montar_chaveamento(1, list(range(qtd_comp)))
+    final, terceiro = len(linhas) - 2, len(linhas) - 1
+    assert sorted(origem for origem, *_ in ligacoes) == list(range(len(linhas) - 2))
+    vagas_ocupadas = Counter((proxima, vaga) for _, proxima, vaga, _, _ in ligacoes)
+    assert all(qtd == 1 for qtd in vagas_ocupadas.values())
+    for origem, proxima, vaga, perdedor, vaga_perdedor in ligacoes:
+        assert linhas[proxima]["rodada"] == linhas[origem]["rodada"] - 1
+        if linhas[origem]["rodada"] == 2:
+            assert (proxima, vaga) == (final, linhas[origem]["grupo"])
+            assert (perdedor, vaga_perdedor) == (terceiro, linhas[origem]["grupo"])
+        else:
+            assert linhas[proxima]["grupo"] == linhas[origem]["grupo"]
+            assert perdedor is None
+    for indice, linha in enumerate(linhas[:-2]):
+        alimentadores = [o for o, proxima, *_ in ligacoes if proxima == indice]
+        if linha["rodada"] < linhas[0]["rodada"]:
+            assert linha["bye"] is (len(alimentadores) == 1)
@@ -0,0 +1,180 @@
+import http.client
+import json
+import threading
+from collections import Counter
+
+from werkzeug.serving import make_server
+
+from torneios.eventos import (
+    MANTER_CONEXAO,
+    RECARREGAR,
+    RECONECTAR,
+    Canal,
+    Distribuidor,
+)
+
+
+def ler_eventos(linhas):
+    """(id, tipo, dados) de cada mensagem SSE nas linhas lidas"""
+    eventos, campos = [], {}
+    for linha in linhas:
+        if not linha:
+            if "event" in campos:
+                eventos.append(
+                    (int(campos["id"]), campos["event"], json.loads(campos["data"]))
+                )
+            campos = {}
+        elif not linha.startswith(":"):
+            chave, _, valor = linha.partition(": ")
+            campos[chave] = valor
+    return eventos
+
+
+def jogar_pendentes(client, id_torneio):
+    chaves = client.get(f"/tournament/{id_torneio}/match").json["chaveamentos"]
+    pendentes = [
+        chave["id"]
+        for chave in chaves
+        if chave["adversario_a"] and chave["adversario_b"] and not chave["vencedor"]
+    ]
+    for id_partida in pendentes:
+        response = client.post(
+            f"/tournament/{id_torneio}/match/{id_partida}",
+            json={"resultado_comp_a": 2, "resultado_comp_b": 1},
+        )
+        assert response.status_code == 201
+    return len(pendentes)
+
+
+def test_canal_entrega_a_mesma_mensagem_a_todos_os_assinantes():
+    canal = Canal(capacidade=4)
+    assinantes = [canal.assinar(canal.ultimo, espera=0.01) for _ in range(3)]
+    assert [next(assinante) for assinante in assinantes] == [RECONECTAR] * 3
+    canal.publicar([("resultado", {"chave": 1}), ("classificacao", {"chave": 2})])
+    mensagens = [next(assinante) for assinante in assinantes]
+    assert len(set(mensagens)) == 1
+    assert ler_eventos(mensagens[0].split("\n")) == [
+        (1, "resultado", {"chave": 1}),
+        (2, "classificacao", {"chave": 2}),
+    ]
+    assert next(assinantes[0]) == MANTER_CONEXAO
+
+
+def test_canal_pede_recarga_quando_o_evento_saiu_do_buffer():
+    canal = Canal(capacidade=2)
+    canal.publicar([("resultado", {"chave": chave}) for chave in range(3)])
+    atrasado = canal.assinar(0, espera=0.01)
+    assert next(atrasado) == RECONECTAR
+    assert next(atrasado) == RECARREGAR
+    em_dia = canal.assinar(1, espera=0.01)
+    next(em_dia)
+    assert [id for id, _, _ in ler_eventos(next(em_dia).split("\n"))] == [2, 3]
+
+
+def test_distribuidor_descarta_canais_ociosos():
+    distribuidor = Distribuidor(capacidade=4, max_canais=2)
+    assinante = distribuidor.assinar(1, None, espera=0.01)
+    assert next(assinante) == RECONECTAR
+    for torneio_id in (1, 2, 3):
+        distribuidor.publicar([(torneio_id, "resultado", {"chave": torneio_id})])
+    # O 2 era o ocioso mais antigo; o 1 fica enquanto tiver assinante
+    assert list(distribuidor._canais) == [1, 3]
+    assert ler_eventos(next(assinante).split("\n")) == [(1, "resultado", {"chave": 1})]
+
+    reconectado = distribuidor.assinar(2, 1, espera=0.01)
+    next(reconectado)
+    assert next(reconectado) == RECARREGAR
+    reconectado.close()
+    assinante.close()
+    # O 2 recriado tirou o 3; sem assinantes, o 1 é o próximo a sair
+    distribuidor.publicar([(4, "resultado", {"chave": 4})])
+    assert list(distribuidor._canais) == [2, 4]
+
+
+def test_eventos_do_torneio_por_http(client, app, monkeypatch, criar_torneio):
+    monkeypatch.setitem(app.config, "EVENTOS_KEEPALIVE_S", 0.2)
+    with app.app_context():
+        id_torneio = criar_torneio("Ao vivo", 12)
+        client.get(f"/tournament/{id_torneio}/match")
+
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    conexao = http.client.HTTPConnection("127.0.0.1", servidor.server_port, timeout=5)
+    try:
+        conexao.request("GET", f"/tournament/{id_torneio}/events")
+        response = conexao.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/event-stream")
+
+        with app.app_context():
+            jogadas = 0
+            while rodada := jogar_pendentes(client, id_torneio):
+                jogadas += rodada
+
+        esperados = Counter(resultado=jogadas, colocacao=2)  # final e terceiro
+        eventos = []
+        while Counter(tipo for _, tipo, _ in eventos) & esperados != esperados:
+            linhas = []
+            while not linhas or linhas[-1]:
+                linhas.append(response.readline().decode().rstrip("\n"))
+            eventos += ler_eventos(linhas)
+    finally:
+        conexao.close()
+        servidor.shutdown()
+
+    # O sorteio (evento 1) foi antes da assinatura
+    assert [id for id, _, _ in eventos] == list(range(2, len(eventos) + 2))
+    tipos = {tipo for _, tipo, _ in eventos}
+    assert {"resultado", "classificacao", "bye", "colocacao"} <= tipos
+    colocacoes = [
+        colocacao["posicao"]
+        for _, tipo, dados in eventos
+        if tipo == "colocacao"
+        for colocacao in dados["colocacoes"]
+    ]
+    assert sorted(colocacoes) == [1, 2, 3, 4]
+
+
+def test_eventos_retoma_pelo_last_event_id(client, app, criar_torneio):
+    with app.app_context():
+        id_torneio = criar_torneio("Ao vivo", 4)
+        jogar_pendentes(client, id_torneio)
+        response = client.get(
+            f"/tournament/{id_torneio}/events",
+            headers={"Last-Event-ID": "0"},
+            buffered=False,
+        )
+        mensagens = iter(response.response)
+        assert next(mensagens) == RECONECTAR.encode()
+        eventos = ler_eventos(next(mensagens).decode().split("\n"))
+        response.close()
+    assert [tipo for _, tipo, _ in eventos] == [
+        "sorteio",
+        "resultado",
+        "classificacao",
+        "classificacao",
+        "resultado",
+        "classificacao",
+        "classificacao",
+    ]
+
+
+def test_resultado_recusado_nao_publica_eventos(client, app, criar_torneio):
+    with app.app_context():
+        id_torneio = criar_torneio("Ao vivo", 4)
+        jogar_pendentes(client, id_torneio)
+        canal = app.extensions["eventos"].canal(id_torneio)
+        publicados = canal.ultimo
+        chaves = client.get(f"/tournament/{id_torneio}/match").json["chaveamentos"]
+        jogada = next(chave for chave in chaves if chave["vencedor"])
+        response = client.post(
+            f"/tournament/{id_torneio}/match/{jogada['id']}",
+            json={"resultado_comp_a": 0, "resultado_comp_b": 1},
+        )
+        assert response.status_code == 422
+        assert canal.ultimo == publicados
+
+
+def test_eventos_torneio_not_found(client, db_session):
+    response = client.get("/tournament/999/events")
+    assert response.status_code == 404
@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from torneios import inicio
+from torneios.inicio import EsquemaDesatualizadoError, medir_partida, revisoes_head
+
+
+@pytest.fixture
+def criar_app_verificando(criar_app, monkeypatch, tmp_path):
+    banco = tmp_path / "producao.db"
+    monkeypatch.setattr(
+        inicio, "ARQUIVO_VERIFICACAO", str(tmp_path / "esquema_verificado.json")
+    )
+    monkeypatch.delenv("FLASK_RUN_FROM_CLI", raising=False)
+    engine = create_engine(f"sqlite:///{banco}")
+
+    def criar(revisao=None):
+        with engine.begin() as conexao:
+            conexao.execute(text("DROP TABLE IF EXISTS alembic_version"))
+            if revisao is not None:
+                conexao.execute(text("CREATE TABLE alembic_version (version_num text)"))
+                conexao.execute(
+                    text("INSERT INTO alembic_version VALUES (:revisao)"),
+                    {"revisao": revisao},
+                )
+        return criar_app(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{banco}",
+            ESQUEMA_NA_INICIALIZACAO="verificar",
+        )
+
+    yield criar
+    engine.dispose()
+
+
+def test_revisoes_head(tmp_path):
+    assert revisoes_head() == ["e3b8d5a41c07"]
+
+    (tmp_path / "versions").mkdir()
+    for revisao, anterior in [("a", None), ("b", "a"), ("c", "a"), ("d", ("b", "c"))]:
+        (tmp_path / "versions" / f"{revisao}.py").write_text(
+            f"revision = {revisao!r}\ndown_revision = {anterior!r}\n"
+        )
+    assert revisoes_head(tmp_path) == ["d"]
+    (tmp_path / "versions" / "e.py").write_text(
+        'revision: str = "e"\ndown_revision: str | None = "c"\n'
+    )
+    assert revisoes_head(tmp_path) == ["d", "e"]
+
+
+def test_verificar_esquema_guarda_o_resultado(criar_app_verificando):
+    with pytest.raises(EsquemaDesatualizadoError, match="alembic_version"):
+        criar_app_verificando()
+    with pytest.raises(EsquemaDesatualizadoError, match="b5e13f0c2a9d"):
+        criar_app_verificando("b5e13f0c2a9d")
+
+    app = criar_app_verificando("e3b8d5a41c07")
+    with app.app_context():
+        # Já verificado: o banco nem é consultado, mesmo fora da revisão
+        assert inicio.verificar_esquema(app) is False
+    criar_app_verificando()
+
+
+def test_esquema_desatualizado_pelo_flask_cli_so_libera_o_db(
+    criar_app_verificando, monkeypatch
+):
+    # O app carrega antes de o flask saber o comando
+    monkeypatch.setenv("FLASK_RUN_FROM_CLI", "true")
+    app = criar_app_verificando("b5e13f0c2a9d")
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=["db", "--help"]).exit_code == 0
+
+    result = runner.invoke(args=["reconciliar-competidores"])
+    assert result.exit_code == 1
+    assert "rode flask db upgrade" in result.output
+    # flask run: as requisições recebem o erro
+    with pytest.raises(EsquemaDesatualizadoError):
+        app.test_client().get("/tournament")
+
+
+def test_comando_db_sob_demanda(app):
+    assert "migrate" not in app.extensions
+    result = app.test_cli_runner().invoke(args=["db", "--help"])
+    assert result.exit_code == 0
+    assert "upgrade" in result.output
+    assert "migrate" in app.extensions
+
+
+def test_medir_partida():
+    relatorio = medir_partida("testing", repeticoes=1)
+    assert (
+        relatorio["total_ms"] >= relatorio["proprio_ms"] >= relatorio["create_app_ms"]
+    )
+    assert "torneios" in relatorio["imports_por_pacote"]
+    # Só entram sob demanda
+    assert "numpy" not in relatorio["imports_por_pacote"]
+    assert "alembic" not in relatorio["imports_por_pacote"]
+
+
+def test_comando_startup_profile(app):
+    result = app.test_cli_runner().invoke(
+        args=["startup-profile", "--modo", "testing", "--repeticoes", "1"]
+    )
+    assert result.exit_code == 0
+    assert "partida a frio (testing, mediana de 1)" in result.output
+    assert "torneios e create_app" in result.output
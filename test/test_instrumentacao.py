@@ -0,0 +1,100 @@
+import copy
+import logging
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from torneios import db
+from torneios.instrumentacao import SAVEPOINT_EXPLAIN, explicar
+
+
+@pytest.fixture
+def criar_app_instrumentado(criar_app):
+    def criar(**configuracoes):
+        return criar_app(INSTRUMENTAR_SQL=True, **configuracoes)
+
+    return criar
+
+
+@pytest.fixture
+def app_debug(criar_app_instrumentado, db_session):
+    return criar_app_instrumentado(DEBUG=True)
+
+
+def test_cabecalhos_sql_em_desenvolvimento(app_debug):
+    client = app_debug.test_client()
+    response = client.post("/tournament", json={"nome_torneio": "Instrumentado"})
+    assert response.status_code == 201
+    assert int(response.headers["X-SQL-Queries"]) >= 1
+    assert float(response.headers["X-SQL-Tempo-Ms"]) > 0
+    response = client.get("/apidoc/swagger")
+    assert response.headers["X-SQL-Queries"] == "0"
+
+
+def test_sql_no_log_fora_de_desenvolvimento(
+    criar_app_instrumentado, db_session, caplog
+):
+    app = criar_app_instrumentado(DEBUG=False)
+    with caplog.at_level(logging.INFO, logger=app.logger.name):
+        response = app.test_client().get("/tournament")
+    assert "X-SQL-Queries" not in response.headers
+    mensagens = [registro.getMessage() for registro in caplog.records]
+    assert any("GET /tournament: 1 queries" in mensagem for mensagem in mensagens)
+
+
+def test_consulta_lenta_logada_com_plano(criar_app_instrumentado, db_session, caplog):
+    app = criar_app_instrumentado(SQL_LENTA_MS=0)
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        app.test_client().get("/tournament?nome_torneio=copa&busca=prefixo")
+    mensagens = [registro.getMessage() for registro in caplog.records]
+    lentas = [
+        mensagem
+        for mensagem in mensagens
+        if mensagem.startswith("Consulta lenta") and "FROM torneio" in mensagem
+    ]
+    assert len(lentas) == 1
+    # Plano do SQLite para a busca pelas palavras do nome
+    assert "torneio_termo" in lentas[0].split("Plano:")[1]
+
+
+def test_explain_com_erro_volta_ao_savepoint():
+    executados = []
+
+    class CursorPlano:
+        def execute(self, comando, parametros=None):
+            executados.append(comando.split()[0:2])
+            if comando.startswith("EXPLAIN"):
+                raise RuntimeError("sem permissão")
+
+        def close(self):
+            pass
+
+    cursor = SimpleNamespace(connection=SimpleNamespace(cursor=CursorPlano))
+    conexao = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    plano = explicar(conexao, cursor, "SELECT * FROM torneio", {}, False)
+    assert plano == "(plano indisponível: sem permissão)"
+    # A transação da requisição continua utilizável depois do erro
+    assert executados == [
+        ["SAVEPOINT", SAVEPOINT_EXPLAIN],
+        ["EXPLAIN", "SELECT"],
+        ["ROLLBACK", "TO"],
+        ["RELEASE", "SAVEPOINT"],
+    ]
+
+
+def test_consulta_com_erro_nao_deixa_estado_na_conexao(app_debug):
+    with app_debug.app_context():
+        with db.engine.connect() as conexao:
+            informacoes = copy.deepcopy(conexao.info)
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conexao.execute(text("SELECT * FROM tabela_inexistente"))
+            assert conexao.info == informacoes
+            assert conexao.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_instrumentacao_desligada_por_padrao(client, db_session):
+    response = client.get("/tournament")
+    assert "X-SQL-Queries" not in response.headers
@@ -0,0 +1,81 @@
+import re
+
+from torneios.metricas import Histograma, SERVICOS, cronometrar_servico
+from torneios.models import Competidor, Torneio
+
+
+def valor_metrica(texto, serie):
+    padrao = "^" + re.escape(serie) + r" (\S+)$"
+    return float(re.search(padrao, texto, re.MULTILINE).group(1))
+
+
+def test_histograma_exporta_buckets_acumulados():
+    histograma = Histograma("teste_segundos", "Teste", limites=(0.1, 1.0))
+    serie = histograma.serie(rota="/x")
+    for valor in (0.05, 0.5, 0.7, 3.0):
+        serie.observar(valor)
+    assert list(histograma.exportar()) == [
+        "# HELP teste_segundos Teste",
+        "# TYPE teste_segundos histogram",
+        'teste_segundos_bucket{rota="/x",le="0.1"} 1',
+        'teste_segundos_bucket{rota="/x",le="1.0"} 3',
+        'teste_segundos_bucket{rota="/x",le="+Inf"} 4',
+        'teste_segundos_sum{rota="/x"} 4.25',
+        'teste_segundos_count{rota="/x"} 4',
+    ]
+    assert histograma.serie(rota="/x") is serie
+
+
+def test_cronometrar_servico_mede_metodos_publicos():
+    @cronometrar_servico
+    class ServicoTeste:
+        @staticmethod
+        def somar(a, b):
+            return a + b
+
+        @staticmethod
+        def _interno():
+            return "sem medida"
+
+    assert ServicoTeste.somar(1, 2) == 3
+    assert ServicoTeste._interno() == "sem medida"
+    serie = SERVICOS.serie(metodo="ServicoTeste.somar")
+    assert sum(serie.contagens) == 1
+    assert ("metodo", "ServicoTeste._interno") not in {
+        rotulo for chave in SERVICOS._series for rotulo in chave
+    }
+
+
+def test_metrics_rotas_servicos_contadores_e_pool(client, db_session, app):
+    with app.app_context():
+        antes = client.get("/metrics").text
+        torneio = Torneio(nome_torneio="Métricas")
+        db_session.add(torneio)
+        db_session.commit()
+        for nome in "abcd":
+            db_session.add(Competidor(nome_competidor=nome, torneio_id=torneio.id))
+        db_session.commit()
+        chaves = client.get(f"/tournament/{torneio.id}/match").json["chaveamentos"]
+        partida = next(chave for chave in chaves if chave["rodada"] == 2)
+        client.post(
+            f"/tournament/{torneio.id}/match/{partida['id']}",
+            json={"resultado_comp_a": 1, "resultado_comp_b": 0},
+        )
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    depois = response.text
+    rota = (
+        'torneios_requisicao_segundos_count{metodo="GET",'
+        'rota="/tournament/<int:id_torneio>/match"}'
+    )
+    assert valor_metrica(depois, rota) == valor_metrica(antes, rota) + 1
+    servico = (
+        "torneios_servico_segundos_count"
+        '{metodo="ResultadoService.cadastrar_resultado"}'
+    )
+    assert valor_metrica(depois, servico) == valor_metrica(antes, servico) + 1
+    for contador in ("torneios_sorteios_total", "torneios_resultados_total"):
+        assert valor_metrica(depois, contador) == valor_metrica(antes, contador) + 1
+    assert "# TYPE torneios_pool_em_uso gauge" in depois
+    assert 'torneios_pool_em_uso{banco="primario"}' in depois
@@ -1,4 +1,4 @@
-from torneios.models import Torneio, Competidor
+from torneios.models import Torneio, Competidor, normalizar_nome
 
 
 def test_new_tournament(db_session):
@@ -33,3 +33,14 @@ def test_new_competidor(db_session):
     assert competidor_add.id == competidor.id
     assert competidor_add.torneio_id == torneio.id
     assert competidor_add.nome_competidor == nome
+
+
+def test_normalizar_nome():
+    assert normalizar_nome("  Copa São-João  2024!") == "copa sao joao 2024"
+
+
+def test_new_tournament_nome_normalizado(db_session):
+    torneio = Torneio(nome_torneio="Mata-Mata Ágil")
+    db_session.add(torneio)
+    db_session.commit()
+    assert torneio.nome_normalizado == "mata mata agil"
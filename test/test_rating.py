@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from torneios.rating import PONTOS_INICIAIS, niveis, reconstruir, variacao
+
+
+def test_variacao_elo():
+    assert variacao(1500, 1500, 1) == pytest.approx(16)
+    assert variacao(1500, 1500, 0) == pytest.approx(-16)
+    # Favorito ganha pouco vencendo e perde muito perdendo
+    assert variacao(1700, 1500, 1) < 16 < -variacao(1700, 1500, 0)
+
+
+def test_niveis_sem_jogador_repetido():
+    rng = np.random.default_rng(7)
+    jogador_a = rng.integers(0, 20, 500)
+    jogador_b = (jogador_a + rng.integers(1, 20, 500)) % 20
+    nivel = niveis(jogador_a, jogador_b, 20)
+    for valor in np.unique(nivel):
+        jogadores = np.concatenate(
+            [jogador_a[nivel == valor], jogador_b[nivel == valor]]
+        )
+        assert len(jogadores) == len(np.unique(jogadores))
+
+
+def test_reconstruir_igual_a_sequencia_partida_a_partida():
+    rng = np.random.default_rng(3)
+    qtd_jogadores = 40
+    jogador_a = rng.integers(0, qtd_jogadores, 3000)
+    jogador_b = (jogador_a + rng.integers(1, qtd_jogadores, 3000)) % qtd_jogadores
+    a_venceu = rng.integers(0, 2, 3000)
+
+    esperado = [PONTOS_INICIAIS] * qtd_jogadores
+    for a, b, venceu in zip(jogador_a.tolist(), jogador_b.tolist(), a_venceu):
+        delta = variacao(esperado[a], esperado[b], venceu)
+        esperado[a] += delta
+        esperado[b] -= delta
+
+    pontos, partidas = reconstruir(jogador_a, jogador_b, a_venceu, qtd_jogadores)
+    assert pontos == pytest.approx(esperado)
+    assert pontos.sum() == pytest.approx(PONTOS_INICIAIS * qtd_jogadores)
+    assert partidas.sum() == 2 * 3000
+
+
+def test_reconstruir_sem_partidas():
+    pontos, partidas = reconstruir([], [], [], 3)
+    assert pontos.tolist() == [PONTOS_INICIAIS] * 3
+    assert partidas.tolist() == [0, 0, 0]
@@ -0,0 +1,119 @@
+import shutil
+import time
+
+import pytest
+
+from torneios import db
+from torneios.models import Competidor
+from torneios.replica import COOKIE
+from torneios.service import ChaveamentoService
+
+
+@pytest.fixture
+def app_replica(criar_app, tmp_path):
+    primario, replica = tmp_path / "primario.db", tmp_path / "replica.db"
+    app = criar_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{primario}",
+        REPLICA_DATABASE_URI=f"sqlite:///{replica}",
+        REPLICA_JANELA_S=30,
+        INSTRUMENTAR_SQL=True,
+        METRICAS=True,
+    )
+
+    def fechar_conexoes():
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        app.extensions["replica"].dispose()
+
+    def replicar():
+        # A réplica alcança o primário: o arquivo inteiro é copiado
+        fechar_conexoes()
+        shutil.copy(primario, replica)
+
+    app.replicar = replicar
+    replicar()
+    yield app
+    fechar_conexoes()
+
+
+def nomes_torneios(client):
+    torneios = client.get("/tournament").json["torneios"]
+    return [torneio["nome_torneio"] for torneio in torneios]
+
+
+def chaveado(client, id_torneio):
+    torneios = client.get(f"/tournament?id={id_torneio}").json["torneios"]
+    return torneios[0]["is_chaveado"]
+
+
+def test_get_le_da_replica(app_replica, criar_torneio):
+    criar_torneio("Replicado", app=app_replica)
+    app_replica.replicar()
+    criar_torneio("Só no primário", app=app_replica)
+    assert nomes_torneios(app_replica.test_client()) == ["Replicado"]
+
+
+def test_quem_escreveu_le_do_primario_durante_a_janela(app_replica):
+    escritor, leitor = app_replica.test_client(), app_replica.test_client()
+    response = escritor.post("/tournament", json={"nome_torneio": "Novo"})
+    assert response.status_code == 201
+    assert nomes_torneios(escritor) == ["Novo"]
+    assert nomes_torneios(leitor) == []
+
+    escritor.set_cookie(COOKIE, str(time.time() - 1))
+    assert nomes_torneios(escritor) == []
+
+
+def test_escrita_num_get_volta_ao_primario(app_replica, criar_torneio):
+    # A réplica ainda não tem os competidores: o sorteio e a leitura que vem
+    # depois dele usam o primário
+    id_torneio = criar_torneio("Sorteio", app=app_replica)
+    app_replica.replicar()
+    with app_replica.app_context():
+        for i in range(6):
+            db.session.add(Competidor(nome_competidor=f"c{i}", torneio_id=id_torneio))
+        db.session.commit()
+
+    client = app_replica.test_client()
+    response = client.get(f"/tournament/{id_torneio}/match")
+    assert response.status_code == 200
+    assert len(response.json["chaveamentos"]) > 0
+    # O torneio continua sem sorteio na réplica até ela alcançar o primário
+    assert chaveado(client, id_torneio) is False
+    app_replica.replicar()
+    assert chaveado(client, id_torneio) is True
+
+
+def test_sorteio_no_get_roda_no_primario(app_replica, criar_torneio, monkeypatch):
+    id_torneio = criar_torneio("Sorteio", 4, app=app_replica)
+    app_replica.replicar()
+    sortear = ChaveamentoService.sortear_chaveamento
+    destinos = []
+
+    def sortear_registrando(id_torneio):
+        destinos.append(db.session.info.get("destino"))
+        return sortear(id_torneio)
+
+    monkeypatch.setattr(
+        ChaveamentoService, "sortear_chaveamento", staticmethod(sortear_registrando)
+    )
+    response = app_replica.test_client().get(f"/tournament/{id_torneio}/match")
+    assert response.status_code == 200
+    assert destinos == ["primario"]
+
+
+def test_leituras_da_replica_sao_instrumentadas(
+    app_replica, criar_torneio, monkeypatch
+):
+    criar_torneio("Medido", app=app_replica)
+    app_replica.replicar()
+    monkeypatch.setitem(app_replica.config, "DEBUG", True)
+    client = app_replica.test_client()
+    response = client.get("/tournament")
+    assert response.json["torneios"][0]["nome_torneio"] == "Medido"
+    assert int(response.headers["X-SQL-Queries"]) >= 1
+
+    metricas = client.get("/metrics").text
+    assert 'torneios_pool_em_uso{banco="primario"}' in metricas
+    assert 'torneios_pool_em_uso{banco="replica"}' in metricas
@@ -1,12 +1,26 @@
-from collections import defaultdict
-from torneios import models_pydantic
-from torneios.models import Chave, Torneio, Competidor
+import random
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from sqlalchemy import insert
+from torneios import chaveamento, models_pydantic
+from torneios.models import Chave, Jogador, Rating, Torneio, Competidor
+from torneios.rating import PONTOS_INICIAIS
 from torneios.service import (
+    BracketingWithResultError,
+    ChaveRaiseError,
     ChaveamentoNotAvailableError,
+    ChaveamentoNotFoundError,
+    CompetidoresInsuficientesError,
     CompetidorService,
     ChaveamentoService,
+    JogadorNotFoundError,
+    JogadorService,
+    RatingService,
     ResultadoService,
+    TorneioClosedError,
     TorneioNotClosedError,
+    TorneioNotFoundError,
     TorneioService,
 )
 import pytest
@@ -27,6 +41,66 @@ def test_new_competidor_atualiza_qtd_competidores_em_Torneio(db_session, app):
         assert torneio_modificado.qtd_competidores == 1
 
 
+def test_cadastrar_competidor_nao_carrega_competidores(
+    db_session, app, queries_executadas
+):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Contador")
+        db_session.add(torneio)
+        db_session.commit()
+        queries_executadas.clear()
+        competidor = models_pydantic.CompetidorRequest(nome_competidor="Clara")
+        CompetidorService.cadastrar_competidor(competidor, torneio.id)
+        assert not [
+            query
+            for query in queries_executadas
+            if query.startswith("SELECT") and "FROM competidor" in query
+        ]
+        assert any("qtd_competidores + " in query for query in queries_executadas)
+
+
+def test_cadastrar_competidor_concorrente_conta_todos(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Concorrência")
+        db_session.add(torneio)
+        db_session.commit()
+
+    def cadastrar(numero):
+        competidor = models_pydantic.CompetidorRequest(nome_competidor=f"c{numero}")
+        with app.app_context():
+            CompetidorService.cadastrar_competidor(competidor, torneio.id)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(cadastrar, range(200)))
+    db_session.expire_all()
+    assert db_session.get(Torneio, torneio.id).qtd_competidores == 200
+
+
+def test_reconciliar_qtd_competidores(db_session, app):
+    with app.app_context():
+        certo, errado, vazio = (
+            Torneio(nome_torneio=nome) for nome in ("Certo", "Errado", "Vazio")
+        )
+        db_session.add_all([certo, errado, vazio])
+        db_session.commit()
+        for torneio in (certo, errado):
+            for nome in "abc":
+                db_session.add(Competidor(nome_competidor=nome, torneio_id=torneio.id))
+        certo.qtd_competidores = 3
+        errado.qtd_competidores = 7
+        vazio.qtd_competidores = None
+        db_session.commit()
+
+        result = app.test_cli_runner().invoke(args=["reconciliar-competidores"])
+        assert result.exit_code == 0
+        assert "2 torneio(s) corrigido(s)" in result.output
+        db_session.expire_all()
+        assert [
+            db_session.get(Torneio, torneio.id).qtd_competidores
+            for torneio in (certo, errado, vazio)
+        ] == [3, 3, 0]
+
+
 @pytest.mark.parametrize(
     "compt, rodadas_esperadas",
     [(4, 2), (8, 3), (16, 4), (32, 5), (64, 6), (128, 7), (3, 2), (70, 7)],
@@ -37,6 +111,42 @@ def test_qtd_rodada_por_duplas(compt, rodadas_esperadas):
     assert rodadas == rodadas_esperadas
 
 
+def test_sortear_em_paralelo(db_session, app, criar_torneio):
+    ids = [criar_torneio(f"Lote {qtd}", qtd) for qtd in (4, 9, 16, 33, 1, 7)]
+    *sorteaveis, sozinho, ja_sorteado = ids
+    with app.app_context():
+        ChaveamentoService.sortear_chaveamento(ja_sorteado)
+        sorteios = ChaveamentoService.sortear_em_paralelo(
+            [*ids, 999, ids[0]], workers=4
+        )
+    assert [sorteio[0] for sorteio in sorteios] == [*ids, 999]
+    por_torneio = {id_torneio: resto for id_torneio, *resto in sorteios}
+    for id_torneio in sorteaveis:
+        sorteado, segundos, erro = por_torneio[id_torneio]
+        assert sorteado and erro is None and segundos > 0
+        assert db_session.query(Chave).filter_by(torneio_id=id_torneio).count()
+    assert por_torneio[ja_sorteado][0] is False
+    assert por_torneio[ja_sorteado][2] is None
+    assert isinstance(por_torneio[sozinho][2], CompetidoresInsuficientesError)
+    assert isinstance(por_torneio[999][2], TorneioNotFoundError)
+
+
+def test_comando_sortear_torneios_pendentes(db_session, app, criar_torneio):
+    ids = [criar_torneio(f"Lote {qtd}", qtd) for qtd in (3, 5, 1)]
+    result = app.test_cli_runner().invoke(
+        args=["sortear-torneios", "--pendentes", "--workers", "2"]
+    )
+    assert result.exit_code == 0, result.output
+    assert f"torneio {ids[0]}: sorteado" in result.output
+    assert f"torneio {ids[1]}: sorteado" in result.output
+    assert f"torneio {ids[2]}" not in result.output
+    assert "2 torneio(s)" in result.output
+
+    result = app.test_cli_runner().invoke(args=["sortear-torneios", str(ids[2])])
+    assert result.exit_code == 1
+    assert "falhou: O torneio precisa de ao menos dois competidores" in result.output
+
+
 def test_cadastrar_resultado_classificacao(db_session, app):
     nome_torneio = "Rankeia"
 
@@ -74,63 +184,6 @@ def test_cadastrar_resultado_classificacao(db_session, app):
         assert response.vencedor.id == competidor_a.id
 
 
-def criar_sublista_em_pares(lista):
-    sublista_em_pares = [lista[i : i + 2] for i in range(0, len(lista), 2)]
-    meio = int(len(sublista_em_pares) / 2)
-    dupla_ga = sublista_em_pares[:meio]
-    dupla_gb = sublista_em_pares[meio:]
-    return dupla_ga, dupla_gb
-
-
-def test_inserir_duplas_primeira_rodada_chave_perfeita(db_session, app):
-    nome_torneio = "Rankeia"
-    with app.app_context():
-        torneio = Torneio(nome_torneio=nome_torneio)
-        db_session.add(torneio)
-        db_session.commit()
-        lista_de_competidores = []
-        for nome in "abcdefghijklmnop":
-            i = Competidor(nome_competidor=nome, torneio_id=torneio.id)
-            lista_de_competidores.append(i)
-            db_session.add(i)
-        db_session.commit()
-        dupla_ga, _ = criar_sublista_em_pares(lista_de_competidores)
-        response = ChaveamentoService.inserir_duplas_primeira_rodada(
-            dupla_ga, torneio.id, 4, "a"
-        )
-        assert len(response) == 4
-        assert all(isinstance(chave, Chave) for chave in response)
-        for chave in response:
-            assert chave.torneio_id == torneio.id
-            assert chave.rodada == 4
-            assert chave.grupo == "a"
-
-
-def test_criar_primeira_comp_impar(db_session, app):
-    nome_torneio = "Rankeia"
-    with app.app_context():
-        torneio = Torneio(nome_torneio=nome_torneio)
-        db_session.add(torneio)
-        db_session.commit()
-        lista_de_competidores = []
-        competidor = Competidor(nome_competidor="nome", torneio_id=torneio.id)
-        db_session.add(competidor)
-        db_session.commit()
-        lista_de_competidores.append(competidor)
-        lista_de_competidores.append(None)
-        _, duplas_gb = criar_sublista_em_pares(lista_de_competidores)
-        response = ChaveamentoService.inserir_duplas_primeira_rodada(
-            duplas_gb, torneio.id, 1, "a"
-        )
-        assert len(response) == 1
-        chave = response[0]
-        assert isinstance(chave, Chave)
-        assert chave.torneio_id == torneio.id
-        assert chave.rodada == 1
-        assert chave.grupo != "f"
-        assert chave.vencedor.id == competidor.id
-
-
 def criar_torneio_e_competidores(db_session, app):
     nome_torneio = "Rankeia"
     with app.app_context():
@@ -148,44 +201,6 @@ def criar_torneio_e_competidores(db_session, app):
     return torneio, lista_de_competidores
 
 
-def test_criar_rodadas_subsequentes_chave_perfeita(db_session, app):
-    with app.app_context():
-        torneio = Torneio(nome_torneio="Perola")
-        db_session.add(torneio)
-        db_session.commit()
-        response = ChaveamentoService.criar_rodadas_subsequentes(5, 32, torneio)
-        rodada_4 = response[0]  # chaveamento 3 oitavas
-        rodada_3 = response[1]  # chaveamento 3 quartas
-        rodada_2 = response[2]  # chaveamento 2 semi-final
-        rodada_1 = response[3]  # chaveamento 1 final
-        rodada_terceiro_lugar = response[4]
-        assert len(rodada_4) == 16
-        assert len(rodada_3) == 8
-        assert len(rodada_2) == 4
-        assert rodada_1
-        assert rodada_1.grupo == "f"
-        assert rodada_terceiro_lugar.grupo == "f"
-
-
-def test_criar_rodadas_subsequentes_sem_potencia_dois(db_session, app):
-    with app.app_context():
-        torneio = Torneio(nome_torneio="Perola")
-        db_session.add(torneio)
-        db_session.commit()
-        response = ChaveamentoService.criar_rodadas_subsequentes(5, 20, torneio)
-        rodada_4 = response[0]  # chaveamento 3 oitavas
-        rodada_3 = response[1]  # chaveamento 3 quartas
-        rodada_2 = response[2]  # chaveamento 2 semi-final
-        rodada_1 = response[3]  # chaveamento 1 final
-        rodada_terceiro_lugar = response[4]
-        assert len(rodada_4) == 10
-        assert len(rodada_3) == 6
-        assert len(rodada_2) == 4
-        assert rodada_1
-        assert rodada_1.grupo == "f"
-        assert rodada_terceiro_lugar.grupo == "f"
-
-
 def test_busca_chaveamento_dispara_chaveamento(db_session, app):
     with app.app_context():
         torneio = Torneio(nome_torneio="Perola")
@@ -209,33 +224,6 @@ def test_busca_chaveamento_dispara_chaveamento(db_session, app):
         assert grupo is True
 
 
-def test_sorteia_chaveamento_primeira_fase(db_session, app):
-    with app.app_context():
-        torneio = Torneio(nome_torneio="Perola")
-        db_session.add(torneio)
-        db_session.commit()
-        for nome in "abcdefghijklmnop":
-            i = Competidor(nome_competidor=nome, torneio_id=torneio.id)
-            db_session.add(i)
-        db_session.commit()
-        (
-            numero_primeira_rodada,
-            lista_geral_primeira_rodada,
-            _,
-            _,
-        ) = ChaveamentoService.sorteia_chaveamento_primeira_fase(torneio)
-        assert len(lista_geral_primeira_rodada) == 8
-        assert all(isinstance(chave, Chave) for chave in lista_geral_primeira_rodada)
-        lista_a = []
-        lista_b = []
-        for chave in lista_geral_primeira_rodada:
-            assert chave.torneio_id == torneio.id
-            assert chave.rodada == numero_primeira_rodada
-            lista_a.append(chave) if chave.grupo == "a" else lista_b.append(chave)
-        assert len(lista_a) == 4
-        assert len(lista_b) == 4
-
-
 def test_cadastrar_resultado(db_session, app):
     with app.app_context():
         torneio = Torneio(nome_torneio="Perola")
@@ -499,66 +487,31 @@ def test_filtra_chaves_torneio(db_session, app):
         assert torneio.id in [t.torneio_id for t in resultado]
 
 
-@pytest.mark.parametrize(
-    "qtd_comp, byes_esperados",
-    [
-        (
-            4,
-            0,
-        ),  # Caso com o número mínimo de competidores (caso limite). Potencia de 2 não tem byes.
-        (8, 0),  # Caso com 8 competidores. Potência de 2 não tem byes.
-        (10, 2),  # Caso com 10 competidores, esperando 2 byes para rodadas subsequentes
-        (16, 0),  # Caso com 16 compts. Potência de 2 não tem byes.
-        (
-            20,
-            4,
-        ),  # Caso com 20 competidores, par, mas não é potência de 2. 2 byes para rodadas subsequentes
-        (25, 2),  # Caso com um número ímpar de competidores.
-    ],
-)
-def test_marca_rodadas_bye(qtd_comp, byes_esperados, db_session, app):
-    with app.app_context():
-        torneio = Torneio(nome_torneio="Torneiozao")
-        db_session.add(torneio)
-        db_session.commit()
-        for i in range(qtd_comp):
-            comp = Competidor(nome_competidor=i, torneio_id=torneio.id)
-            db_session.add(comp)
-            db_session.commit()
-        n, lista_g, qa, qb = ChaveamentoService.sorteia_chaveamento_primeira_fase(
-            torneio
-        )
-        ChaveamentoService.criar_rodadas_subsequentes(n, len(lista_g), torneio)
-        count_bye = ChaveamentoService.marca_rodadas_bye(n, qa, qb, torneio.id)
-        assert count_bye == byes_esperados
+def sortear_sem_ponteiros(db_session, torneio_id):
+    """Grava o chaveamento como nos sorteios anteriores aos ponteiros: sem as
+    ligações e com os byes das rodadas seguintes ainda por avançar"""
+    ids_competidores = [
+        competidor.id
+        for competidor in db_session.query(Competidor)
+        .filter_by(torneio_id=torneio_id)
+        .order_by(Competidor.id)
+    ]
+    linhas, _ = chaveamento.montar_chaveamento(torneio_id, ids_competidores)
+    primeira_rodada = linhas[0]["rodada"]
+    for linha in linhas:
+        linha["classificado_bye"] = False
+        if linha["rodada"] < primeira_rodada:
+            linha.update(competidor_a_id=None, competidor_b_id=None, vencedor_id=None)
+    db_session.execute(insert(Chave.__table__), linhas)
+    db_session.get(Torneio, torneio_id).is_chaveado = True
+    db_session.commit()
+    return torneio_id
 
 
 @pytest.fixture
-def torneio_byes(db_session, app):
+def torneio_byes(db_session, app, criar_torneio):
     with app.app_context():
-        torneio = Torneio(nome_torneio="Frida")
-        db_session.add(torneio)
-        db_session.commit()
-        for nome in "abcdefghij":  # 10 competidores
-            i = Competidor(nome_competidor=nome, torneio_id=torneio.id)
-            db_session.add(i)
-        db_session.commit()
-        (
-            n_primeira_rodada,
-            lista_geral_primeira_rodada,
-            qtd_comps_ga,
-            qtd_comps_gb,
-        ) = ChaveamentoService.sorteia_chaveamento_primeira_fase(torneio)
-        ChaveamentoService.criar_rodadas_subsequentes(
-            n_primeira_rodada, len(lista_geral_primeira_rodada), torneio
-        )
-        ChaveamentoService.marca_rodadas_bye(
-            n_primeira_rodada, qtd_comps_ga, qtd_comps_gb, torneio.id
-        )
-        torneio.is_chaveado = True
-        db_session.add(torneio)
-        db_session.commit()
-        return torneio.id
+        return sortear_sem_ponteiros(db_session, criar_torneio("Frida", 10))
 
 
 def test_busca_verificar_passagem_automatica_byebyes(db_session, app, torneio_byes):
@@ -621,31 +574,12 @@ def test_busca_verificar_passagem_automatica_byebyes_segunda_rodada(
                 assert chave.vencedor is None
 
 
-def test_busca_nao_ocorre_passagem_automatica_byebyes_chave_perfeita(db_session, app):
+def test_busca_nao_ocorre_passagem_automatica_byebyes_chave_perfeita(
+    db_session, app, criar_torneio
+):
     with app.app_context():
-        torneio = Torneio(nome_torneio="Frida")
-        db_session.add(torneio)
-        db_session.commit()
-        for nome in "abcdefgh":  # 8 competidores
-            i = Competidor(nome_competidor=nome, torneio_id=torneio.id)
-            db_session.add(i)
-        db_session.commit()
-        (
-            n_primeira_rodada,
-            lista_geral_primeira_rodada,
-            qtd_comps_ga,
-            qtd_comps_gb,
-        ) = ChaveamentoService.sorteia_chaveamento_primeira_fase(torneio)
-        ChaveamentoService.criar_rodadas_subsequentes(
-            n_primeira_rodada, len(lista_geral_primeira_rodada), torneio
-        )
-        ChaveamentoService.marca_rodadas_bye(
-            n_primeira_rodada, qtd_comps_ga, qtd_comps_gb, torneio.id
-        )
-        torneio.is_chaveado = True
-        db_session.add(torneio)
-        db_session.commit()
-        lista_chaveada = ResultadoService.classifica_proxima_rodada_bybye(torneio.id)
+        torneio_id = sortear_sem_ponteiros(db_session, criar_torneio("Frida", 8))
+        lista_chaveada = ResultadoService.classifica_proxima_rodada_bybye(torneio_id)
         for chave in lista_chaveada:
             assert chave.bye is False
             assert chave.vencedor is None
@@ -710,3 +644,552 @@ def test_classificar_proxima_rodada(db_session, app):
         assert response.grupo == "a"
         assert response.competidor_a_id == competidor_a_ja_classificado.id
         assert response.competidor_b_id == competidor_a.id
+
+
+def test_cadastrar_competidores_em_lote_retorna_ids_em_ordem(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Lote")
+        db_session.add(torneio)
+        db_session.commit()
+        nomes = [f"Competidor {i}" for i in range(50)]
+        ids = CompetidorService.cadastrar_competidores_em_lote(
+            models_pydantic.CompetidoresLoteRequest(nomes=nomes), torneio.id
+        )
+        assert len(ids) == 50
+        assert ids == sorted(ids)
+        nomes_por_id = dict(
+            db_session.query(Competidor.id, Competidor.nome_competidor).filter(
+                Competidor.torneio_id == torneio.id
+            )
+        )
+        assert [nomes_por_id[i] for i in ids] == nomes
+        db_session.refresh(torneio)
+        assert torneio.qtd_competidores == 50
+
+
+def test_cadastrar_competidores_em_lote_torneio_chaveado(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Fechado")
+        torneio.is_chaveado = True
+        db_session.add(torneio)
+        db_session.commit()
+        with pytest.raises(TorneioClosedError):
+            CompetidorService.cadastrar_competidores_em_lote(
+                models_pydantic.CompetidoresLoteRequest(nomes=["a"]), torneio.id
+            )
+
+
+def test_sortear_chaveamento_grava_chaves_e_fecha_torneio(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Sorteio")
+        db_session.add(torneio)
+        db_session.commit()
+        for nome in "abcdefghij":
+            db_session.add(Competidor(nome_competidor=nome, torneio_id=torneio.id))
+        db_session.commit()
+        ChaveamentoService.sortear_chaveamento(torneio.id)
+        ChaveamentoService.sortear_chaveamento(torneio.id)  # já sorteado: no-op
+        db_session.refresh(torneio)
+        assert torneio.is_chaveado is True
+        chaves = db_session.query(Chave).filter_by(torneio_id=torneio.id).all()
+        assert len(chaves) == 14
+
+
+def test_sortear_chaveamento_competidores_insuficientes(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Sozinho")
+        db_session.add(torneio)
+        db_session.commit()
+        db_session.add(Competidor(nome_competidor="a", torneio_id=torneio.id))
+        db_session.commit()
+        with pytest.raises(CompetidoresInsuficientesError):
+            ChaveamentoService.sortear_chaveamento(torneio.id)
+
+
+def jogar_torneio(torneio_id):
+    resultado = models_pydantic.ResultadoPartidaRequest(
+        resultado_comp_a=2, resultado_comp_b=1
+    )
+    while True:
+        pendentes = (
+            Chave.query.filter_by(torneio_id=torneio_id, vencedor_id=None)
+            .filter(
+                Chave.competidor_a_id.isnot(None), Chave.competidor_b_id.isnot(None)
+            )
+            .all()
+        )
+        if not pendentes:
+            return
+        for chave in pendentes:
+            ResultadoService.cadastrar_resultado(resultado, torneio_id, chave.id)
+
+
+def test_sortear_chaveamento_grava_ponteiros(db_session, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Ponteiros", 10)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        chaves = db_session.query(Chave).filter_by(torneio_id=torneio_id).all()
+        por_id = {chave.id: chave for chave in chaves}
+        for chave in chaves:
+            if chave.rodada <= 1:
+                assert chave.proxima_chave_id is None
+                continue
+            proxima = por_id[chave.proxima_chave_id]
+            assert proxima.rodada == chave.rodada - 1
+            assert chave.vaga_proxima_chave in ("a", "b")
+            if chave.rodada == 2:
+                assert por_id[chave.chave_perdedor_id].rodada == 0
+                assert chave.vaga_chave_perdedor == chave.grupo
+
+
+def test_cadastrar_resultado_avanca_pelos_ponteiros(db_session, app, criar_torneio):
+    with app.app_context():
+        outro_torneio_id = criar_torneio("Outro", 10)
+        ChaveamentoService.sortear_chaveamento(outro_torneio_id)
+        torneio_id = criar_torneio("Ponteiros", 10)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        colunas = ("id", "competidor_a_id", "competidor_b_id", "vencedor_id")
+        estado_outro = [
+            tuple(getattr(chave, coluna) for coluna in colunas)
+            for chave in Chave.query.filter_by(torneio_id=outro_torneio_id)
+        ]
+        jogar_torneio(torneio_id)
+        classificacao = ResultadoService.buscar_resultado_top(torneio_id)
+        podio = [classificacao[lugar] for lugar in ("Primeiro", "Segundo")]
+        podio += [classificacao[lugar] for lugar in ("Terceiro", "Quarto")]
+        assert all(competidor is not None for competidor in podio)
+        assert len({competidor.id for competidor in podio}) == 4
+        assert all(competidor.torneio_id == torneio_id for competidor in podio)
+        # O outro torneio não recebeu nenhum classificado
+        db_session.expire_all()
+        assert estado_outro == [
+            tuple(getattr(chave, coluna) for coluna in colunas)
+            for chave in Chave.query.filter_by(torneio_id=outro_torneio_id)
+        ]
+
+
+def test_resultado_da_final_nao_varre_o_chaveamento(db_session, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Final", 10)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        with patch.object(
+            ResultadoService,
+            "avancar_byes_sem_ponteiros",
+            wraps=ResultadoService.avancar_byes_sem_ponteiros,
+        ) as avancar:
+            jogar_torneio(torneio_id)
+        final = Chave.query.filter_by(torneio_id=torneio_id, rodada=1).one()
+        assert final.vencedor_id is not None
+        avancar.assert_not_called()
+
+
+def test_cadastrar_resultado_ao_lado_de_bye_avanca_direto(
+    db_session, app, criar_torneio
+):
+    with app.app_context():
+        # Grupos de 6: 3 chaves na primeira rodada e a última chave da rodada
+        # seguinte é um bye alimentado só pela terceira delas
+        torneio_id = criar_torneio("Bye", 12)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        bye = Chave.query.filter_by(torneio_id=torneio_id, grupo="a", bye=True).one()
+        alimentadora = Chave.query.filter_by(proxima_chave_id=bye.id).one()
+        resultado = models_pydantic.ResultadoPartidaRequest(
+            resultado_comp_a=2, resultado_comp_b=1
+        )
+        ResultadoService.cadastrar_resultado(resultado, torneio_id, alimentadora.id)
+        db_session.expire_all()
+        bye = db_session.get(Chave, bye.id)
+        assert bye.vencedor_id == alimentadora.competidor_a_id
+        assert bye.classificado_bye is True
+        semi_final = db_session.get(Chave, bye.proxima_chave_id)
+        assert (
+            getattr(semi_final, f"competidor_{bye.vaga_proxima_chave}_id")
+            == alimentadora.competidor_a_id
+        )
+
+
+def test_cadastrar_resultado_duplicado_recusado(db_session, app, criar_torneio):
+    with app.app_context():
+        torneio_id = criar_torneio("Duplicado", 4)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        chave = Chave.query.filter_by(torneio_id=torneio_id, rodada=2).first()
+        resultado = models_pydantic.ResultadoPartidaRequest(
+            resultado_comp_a=2, resultado_comp_b=1
+        )
+        ResultadoService.cadastrar_resultado(resultado, torneio_id, chave.id)
+        with pytest.raises(BracketingWithResultError):
+            ResultadoService.cadastrar_resultado(resultado, torneio_id, chave.id)
+
+
+def test_cadastrar_resultado_versao_desatualizada_recusado(
+    db_session, app, criar_torneio
+):
+    with app.app_context():
+        torneio_id = criar_torneio("Versão", 4)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        # A sessão do serviço já leu a chave (sem vencedor, versão 1) quando
+        # outro juiz grava o resultado
+        chave = Chave.query.filter_by(torneio_id=torneio_id, rodada=2).first()
+        db_session.execute(
+            Chave.__table__.update()
+            .where(Chave.id == chave.id)
+            .values(vencedor_id=chave.competidor_b_id, versao=Chave.versao + 1)
+        )
+        db_session.commit()
+        resultado = models_pydantic.ResultadoPartidaRequest(
+            resultado_comp_a=2, resultado_comp_b=1
+        )
+        with pytest.raises(BracketingWithResultError):
+            ResultadoService.cadastrar_resultado(resultado, torneio_id, chave.id)
+        chave = db_session.get(Chave, chave.id)
+        assert chave.vencedor_id == chave.competidor_b_id
+        assert chave.resultado_comp_a is None
+
+
+def test_cadastrar_resultado_concorrente_mantem_chaveamento_consistente(
+    db_session, app, criar_torneio
+):
+    with app.app_context():
+        torneio_id = criar_torneio("Concorrência", 100)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+
+    def enviar(id_partida):
+        placar = random.sample(range(10), 2)
+        resultado = models_pydantic.ResultadoPartidaRequest(
+            resultado_comp_a=placar[0], resultado_comp_b=placar[1]
+        )
+        with app.app_context():
+            try:
+                chave = ResultadoService.cadastrar_resultado(
+                    resultado, torneio_id, id_partida
+                )
+                return id_partida, placar, chave.vencedor_id
+            except BracketingWithResultError:
+                return id_partida, None, None
+
+    envios_por_chave = 10
+    aceitos = []
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        while True:
+            with app.app_context():
+                pendentes = [
+                    chave.id
+                    for chave in Chave.query.filter_by(
+                        torneio_id=torneio_id, vencedor_id=None
+                    ).filter(
+                        Chave.competidor_a_id.isnot(None),
+                        Chave.competidor_b_id.isnot(None),
+                    )
+                ]
+            if not pendentes:
+                break
+            envios = pendentes * envios_por_chave
+            random.shuffle(envios)
+            aceitos += [r for r in executor.map(enviar, envios) if r[1] is not None]
+
+    chaves = {
+        chave.id: chave
+        for chave in db_session.query(Chave).filter_by(torneio_id=torneio_id)
+    }
+    # Cada partida aceitou exatamente um resultado, e é ele que está gravado
+    assert Counter(id_partida for id_partida, _, _ in aceitos) == Counter(
+        chave.id for chave in chaves.values() if not chave.bye
+    )
+    for id_partida, placar, vencedor_id in aceitos:
+        chave = chaves[id_partida]
+        assert [chave.resultado_comp_a, chave.resultado_comp_b] == placar
+        assert chave.vencedor_id == vencedor_id
+    # Cada vencedor ocupa a sua vaga na chave seguinte, sem sobrescrever ninguém
+    for chave in chaves.values():
+        assert chave.vencedor_id in (chave.competidor_a_id, chave.competidor_b_id)
+        if chave.proxima_chave_id:
+            proxima = chaves[chave.proxima_chave_id]
+            vaga = chave.vaga_proxima_chave
+            assert getattr(proxima, f"competidor_{vaga}_id") == chave.vencedor_id
+    for rodada in {chave.rodada for chave in chaves.values()}:
+        competidores = [
+            competidor
+            for chave in chaves.values()
+            if chave.rodada == rodada
+            for competidor in (chave.competidor_a_id, chave.competidor_b_id)
+            if competidor is not None
+        ]
+        assert len(competidores) == len(set(competidores))
+
+
+def test_cadastrar_resultados_em_lote_em_ordem_de_dependencia(
+    db_session, app, criar_torneio
+):
+    with app.app_context():
+        torneio_id = criar_torneio("Lote", 8)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        # Da final para a primeira rodada: o lote reordena pelas dependências
+        ids = [
+            chave.id
+            for chave in Chave.query.filter_by(torneio_id=torneio_id).order_by(
+                Chave.rodada, Chave.id
+            )
+        ]
+        lote = models_pydantic.ResultadosLoteRequest(
+            resultados=[
+                {"id_partida": id_partida, "resultado_comp_a": 2, "resultado_comp_b": 1}
+                for id_partida in ids
+            ]
+        )
+        gravados = ResultadoService.cadastrar_resultados_em_lote(lote, torneio_id)
+        assert gravados == [(id_partida, None) for id_partida in ids]
+        classificacao = ResultadoService.buscar_resultado_top(torneio_id)
+        assert all(competidor is not None for competidor in classificacao.values())
+        assert len({competidor.id for competidor in classificacao.values()}) == 4
+
+
+def test_cadastrar_resultados_em_lote_erros_por_item(db_session, app, criar_torneio):
+    with app.app_context():
+        outro_torneio_id = criar_torneio("Outro", 4)
+        ChaveamentoService.sortear_chaveamento(outro_torneio_id)
+        torneio_id = criar_torneio("Lote", 4)
+        ChaveamentoService.sortear_chaveamento(torneio_id)
+        semi_final = Chave.query.filter_by(torneio_id=torneio_id, rodada=2).first()
+        final = Chave.query.filter_by(torneio_id=torneio_id, rodada=1).one()
+        outra = Chave.query.filter_by(torneio_id=outro_torneio_id, rodada=2).first()
+        placar = {"resultado_comp_a": 3, "resultado_comp_b": 0}
+        lote = models_pydantic.ResultadosLoteRequest(
+            resultados=[
+                {"id_partida": semi_final.id, **placar},
+                {"id_partida": semi_final.id, **placar},
+                {"id_partida": final.id, **placar},
+                {"id_partida": outra.id, **placar},
+                {"id_partida": 999, **placar},
+            ]
+        )
+        gravados = ResultadoService.cadastrar_resultados_em_lote(lote, torneio_id)
+        assert [id_partida for id_partida, _ in gravados] == [
+            semi_final.id,
+            semi_final.id,
+            final.id,
+            outra.id,
+            999,
+        ]
+        erros = [type(erro) if erro else None for _, erro in gravados]
+        assert erros == [
+            None,
+            BracketingWithResultError,
+            ChaveamentoNotAvailableError,
+            ChaveRaiseError,
+            ChaveamentoNotFoundError,
+        ]
+        db_session.expire_all()
+        assert db_session.get(Chave, semi_final.id).resultado_comp_a == 3
+        assert db_session.get(Chave, outra.id).vencedor_id is None
+
+
+def test_cadastrar_resultados_em_lote_torneio_not_found(db_session, app):
+    with app.app_context():
+        lote = models_pydantic.ResultadosLoteRequest(
+            resultados=[{"id_partida": 1, "resultado_comp_a": 1, "resultado_comp_b": 0}]
+        )
+        with pytest.raises(TorneioNotFoundError):
+            ResultadoService.cadastrar_resultados_em_lote(lote, 999)
+
+
+def test_buscar_torneio_por_nome_ignora_acentos_e_caixa(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Copa São João")
+        db_session.add(torneio)
+        db_session.add(Torneio(nome_torneio="Copa Sudeste"))
+        db_session.commit()
+        filtros = models_pydantic.FiltroTorneio(nome_torneio="SAO JOAO")
+        result = TorneioService.buscar_torneio(filtros)
+        assert [t.id for t in result] == [torneio.id]
+
+
+def test_buscar_torneio_por_prefixo(db_session, app):
+    with app.app_context():
+        copa_sul = Torneio(nome_torneio="Copa Sul")
+        copa_sudeste = Torneio(nome_torneio="Copa Sudeste")
+        db_session.add(copa_sul)
+        db_session.add(copa_sudeste)
+        super_copa_sul = Torneio(nome_torneio="Super Copa Sul")
+        db_session.add(super_copa_sul)
+        db_session.add(Torneio(nome_torneio="Copa Norte"))
+        db_session.add(Torneio(nome_torneio="Copa São Paulo"))
+        db_session.commit()
+        filtros = models_pydantic.FiltroTorneio(nome_torneio="copa su", busca="prefixo")
+        result = TorneioService.buscar_torneio(filtros)
+        assert [t.id for t in result] == [
+            copa_sul.id,
+            copa_sudeste.id,
+            super_copa_sul.id,
+        ]
+
+
+def test_buscar_torneio_por_prefixo_de_palavra_do_meio(db_session, app):
+    with app.app_context():
+        sao_paulo = Torneio(nome_torneio="Copa São Paulo")
+        db_session.add(sao_paulo)
+        db_session.add(Torneio(nome_torneio="Copa Sul"))
+        db_session.commit()
+        for busca in ("sao", "SÃO pau", "paulo sao"):
+            filtros = models_pydantic.FiltroTorneio(nome_torneio=busca, busca="prefixo")
+            result = TorneioService.buscar_torneio(filtros)
+            assert [t.id for t in result] == [sao_paulo.id]
+
+
+def test_buscar_torneio_paginado(db_session, app):
+    with app.app_context():
+        torneios = [Torneio(nome_torneio=f"Torneio {i}") for i in range(5)]
+        db_session.add_all(torneios)
+        db_session.commit()
+        pagina = TorneioService.buscar_torneio(models_pydantic.FiltroTorneio(limit=2))
+        assert [t.id for t in pagina] == [torneios[0].id, torneios[1].id]
+        pagina = TorneioService.buscar_torneio(
+            models_pydantic.FiltroTorneio(limit=2, after_id=pagina[-1].id)
+        )
+        assert [t.id for t in pagina] == [torneios[2].id, torneios[3].id]
+
+
+def test_buscar_competidores_paginado(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Paginado")
+        db_session.add(torneio)
+        db_session.commit()
+        competidores = [
+            Competidor(nome_competidor=nome, torneio_id=torneio.id) for nome in "abcde"
+        ]
+        db_session.add_all(competidores)
+        db_session.commit()
+        pagina = CompetidorService.buscar_competidores(torneio.id, limit=3).all()
+        assert [c.nome_competidor for c in pagina] == ["a", "b", "c"]
+        pagina = CompetidorService.buscar_competidores(
+            torneio.id, limit=3, after_id=pagina[-1].id
+        ).all()
+        assert [c.nome_competidor for c in pagina] == ["d", "e"]
+
+
+def test_iterar_competidores_em_lotes(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Lotes")
+        db_session.add(torneio)
+        db_session.commit()
+        for nome in "abcdefg":
+            db_session.add(Competidor(nome_competidor=nome, torneio_id=torneio.id))
+        db_session.commit()
+        lotes = list(CompetidorService.iterar_competidores(torneio.id, tamanho_lote=3))
+        assert [len(lote) for lote in lotes] == [3, 3, 1]
+        assert [nome for lote in lotes for _, nome in lote] == list("abcdefg")
+
+
+def inscrever_jogadores(db_session, nome_torneio, ids_jogadores):
+    torneio = Torneio(nome_torneio=nome_torneio)
+    db_session.add(torneio)
+    db_session.commit()
+    for id_jogador in ids_jogadores:
+        CompetidorService.cadastrar_competidor(
+            models_pydantic.CompetidorRequest(
+                nome_competidor=f"j{id_jogador}", jogador_id=id_jogador
+            ),
+            torneio.id,
+        )
+    ChaveamentoService.sortear_chaveamento(torneio.id)
+    return torneio.id
+
+
+def jogar_torneio_sorteando_placar(torneio_id, rng):
+    while True:
+        pendentes = (
+            Chave.query.filter_by(torneio_id=torneio_id, vencedor_id=None)
+            .filter(
+                Chave.competidor_a_id.isnot(None), Chave.competidor_b_id.isnot(None)
+            )
+            .all()
+        )
+        if not pendentes:
+            return
+        for chave in pendentes:
+            placar = rng.sample(range(10), 2)
+            resultado = models_pydantic.ResultadoPartidaRequest(
+                resultado_comp_a=placar[0], resultado_comp_b=placar[1]
+            )
+            ResultadoService.cadastrar_resultado(resultado, torneio_id, chave.id)
+
+
+def test_rating_acompanha_resultados_e_reconstrucao(db_session, app):
+    rng = random.Random(5)
+    with app.app_context():
+        ids_jogadores = [
+            JogadorService.criar_jogador(models_pydantic.JogadorRequest(nome=nome))
+            for nome in "abcdefghij"
+        ]
+        # O mesmo jogador em torneios diferentes, e uma inscrição sem jogador
+        for numero in range(3):
+            torneio_id = inscrever_jogadores(
+                db_session, f"Circuito {numero}", [*rng.sample(ids_jogadores, 7), None]
+            )
+            jogar_torneio_sorteando_placar(torneio_id, rng)
+        incremental = {
+            rating.jogador_id: (rating.pontos, rating.partidas)
+            for rating in db_session.query(Rating)
+        }
+        assert sum(pontos for pontos, _ in incremental.values()) == pytest.approx(
+            PONTOS_INICIAIS * len(ids_jogadores)
+        )
+        jogadores = dict(db_session.query(Competidor.id, Competidor.jogador_id))
+        partidas_com_resultado = sum(
+            1
+            for chave in db_session.query(Chave).filter(
+                Chave.resultado_comp_a.isnot(None)
+            )
+            if jogadores[chave.competidor_a_id] and jogadores[chave.competidor_b_id]
+        )
+        assert sum(qtd for _, qtd in incremental.values()) == 2 * partidas_com_resultado
+
+        db_session.query(Rating).update({"pontos": 0, "partidas": 0})
+        db_session.commit()
+        assert RatingService.reconstruir_ratings() == (
+            partidas_com_resultado,
+            len(ids_jogadores),
+        )
+        db_session.expire_all()
+        for rating in db_session.query(Rating):
+            pontos, partidas = incremental[rating.jogador_id]
+            assert rating.pontos == pytest.approx(pontos)
+            assert rating.partidas == partidas
+
+
+def test_rating_atualizado_em_queries_constantes(db_session, app, queries_executadas):
+    with app.app_context():
+        ids_jogadores = [
+            JogadorService.criar_jogador(models_pydantic.JogadorRequest(nome=nome))
+            for nome in "ab"
+        ]
+        torneio_id = inscrever_jogadores(db_session, "Duelo", ids_jogadores)
+        chave = (
+            db_session.query(Chave)
+            .filter(Chave.torneio_id == torneio_id, Chave.rodada == 1)
+            .one()
+        )
+        queries_executadas.clear()
+        ResultadoService.cadastrar_resultado(
+            models_pydantic.ResultadoPartidaRequest(
+                resultado_comp_a=0, resultado_comp_b=1
+            ),
+            torneio_id,
+            chave.id,
+        )
+        assert sum("rating" in query for query in queries_executadas) == 4
+        vencedor = db_session.get(Rating, ids_jogadores[1])
+        assert vencedor.pontos == pytest.approx(PONTOS_INICIAIS + 16)
+        assert vencedor.partidas == 1
+
+
+def test_cadastrar_competidor_jogador_inexistente(db_session, app):
+    with app.app_context():
+        torneio = Torneio(nome_torneio="Sem jogador")
+        db_session.add(torneio)
+        db_session.commit()
+        with pytest.raises(JogadorNotFoundError):
+            CompetidorService.cadastrar_competidor(
+                models_pydantic.CompetidorRequest(nome_competidor="x", jogador_id=99),
+                torneio.id,
+            )
+        assert db_session.query(Jogador).count() == 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from torneios.chaveamento import RODADA_FINAL, montar_chaveamento
+from torneios.simulacao import chaves_da_montagem, elo, simular, tabela
+
+
+def montar(qtd_competidores):
+    ids = list(range(1, qtd_competidores + 1))
+    return chaves_da_montagem(*montar_chaveamento(1, ids)), ids
+
+
+def test_simular_competidores_iguais():
+    chaves, ids = montar(8)
+    probabilidades = simular(chaves, ids, tabela(np.full((8, 8), 0.5)), 40_000, 1)
+    assert probabilidades.shape == (8, 4)
+    assert probabilidades.sum(axis=0) == pytest.approx([1, 1, 1, 1])
+    assert probabilidades == pytest.approx(np.full((8, 4), 1 / 8), abs=0.01)
+
+
+@pytest.mark.parametrize("qtd_competidores", [2, 3, 5, 10, 37])
+def test_simular_formatos_com_byes(qtd_competidores):
+    chaves, ids = montar(qtd_competidores)
+    probabilidades = simular(chaves, ids, elo([1500] * qtd_competidores), 2000, 1)
+    # Todo torneio tem campeão e vice; terceiro e quarto dependem de haver
+    # perdedores nas duas semi-finais
+    assert probabilidades[:, :2].sum(axis=0) == pytest.approx([1, 1])
+    assert (probabilidades[:, 0] > 0).all()
+
+
+def test_simular_respeita_a_probabilidade_de_cada_partida():
+    chaves, ids = montar(2)
+    probabilidades = simular(chaves, ids, tabela([[0, 0.7], [0.3, 0]]), 20_000, 1)
+    assert probabilidades[:, 0] == pytest.approx([0.7, 0.3], abs=0.02)
+
+
+def test_simular_favorito_pelo_rating_e_reproduzivel():
+    chaves, ids = montar(16)
+    pontos = [1500] * 15 + [1900]
+    probabilidades = simular(chaves, ids, elo(pontos), 5000, semente=(1, 2))
+    assert probabilidades[:, 0].argmax() == 15
+    repetida = simular(chaves, ids, elo(pontos), 5000, semente=(1, 2))
+    assert (repetida == probabilidades).all()
+
+
+def test_simular_mantem_partidas_decididas():
+    chaves, ids = montar(4)
+    final = next(chave for chave in chaves if chave["rodada"] == RODADA_FINAL)
+    final.update(competidor_a_id=1, competidor_b_id=2, vencedor_id=2)
+    probabilidades = simular(chaves, ids, elo([1500] * 4), 1000, 1)
+    assert probabilidades[:, 0].tolist() == [0, 1, 0, 0]
+    assert probabilidades[:, 1].tolist() == [1, 0, 0, 0]
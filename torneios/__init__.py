@@ -1,12 +1,12 @@
 from flask import Flask
-from flask_migrate import Migrate
 from flask_pydantic_spec import FlaskPydanticSpec
 from flask_sqlalchemy import SQLAlchemy
 
+from .cache import CacheLRU
 from .config import config
+from .replica import SessaoRoteada
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": SessaoRoteada})
 
 spec = FlaskPydanticSpec("flask", title="API: Mata-Mata", version="v1")
 
@@ -14,15 +14,46 @@ spec = FlaskPydanticSpec("flask", title="API: Mata-Mata", version="v1")
 def create_app(config_mode):
     app = Flask(__name__)
     app.config.from_object(config[config_mode])
+    from . import banco, inicio, replica
+
+    app.cli = inicio.ComandosApp()
+
+    banco.configurar(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    banco.init_app(app)
+    replica.init_app(app)
     spec.register(app)
+    app.extensions["cache_chaveamento"] = CacheLRU(
+        app.config["CACHE_CHAVEAMENTO_BYTES"]
+    )
+    from . import eventos
+
+    eventos.init_app(app)
+
+    if app.config["INSTRUMENTAR_SQL"]:
+        from . import instrumentacao
+
+        instrumentacao.init_app(app)
 
+    from .comandos import (
+        reconciliar_competidores,
+        reconstruir_ratings,
+        sortear_torneios,
+        startup_profile,
+    )
     from .urls import api_blueprint
 
     app.register_blueprint(api_blueprint)
-    with app.app_context():
-        # Aplicar migrações durante a inicialização
-        db.create_all()
+    app.cli.add_command(reconciliar_competidores)
+    app.cli.add_command(sortear_torneios)
+    app.cli.add_command(reconstruir_ratings)
+    app.cli.add_command(startup_profile)
+    app.cli.add_command(inicio.migracoes)
+    if app.config["METRICAS"]:
+        from . import metricas
+
+        metricas.init_app(app)
+    # create_all, conferência da revisão do Alembic ou nada, conforme a config
+    inicio.preparar_esquema(app)
 
     return app
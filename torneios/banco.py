@@ -0,0 +1,87 @@
+"""Engine do banco a partir do perfil da config (``DB_*`` e ``SQLITE_*``)"""
+from functools import partial
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+from . import db
+
+JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+SYNCHRONOUS = {"off", "normal", "full", "extra"}
+
+
+def _sqlite_em_memoria(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def opcoes_engine(config, uri=None):
+    """Argumentos do ``create_engine`` para o perfil da config"""
+    uri = uri or config.get("SQLALCHEMY_DATABASE_URI")
+    if not uri:
+        return {}
+    url = make_url(uri)
+    opcoes = {
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "pool_recycle": config["DB_POOL_RECYCLE_S"],
+    }
+    # SQLite em memória usa StaticPool, uma conexão só
+    if not _sqlite_em_memoria(url):
+        opcoes.update(
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=config["DB_POOL_TIMEOUT_S"],
+        )
+    if url.get_backend_name() == "postgresql" and config["DB_STATEMENT_TIMEOUT_MS"]:
+        opcoes["connect_args"] = {
+            "options": f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"
+        }
+    return opcoes
+
+
+def pragmas_sqlite(config):
+    """Pragmas de cada conexão SQLite; ``ValueError`` com valor desconhecido"""
+    journal_mode = config["SQLITE_JOURNAL_MODE"].lower()
+    synchronous = config["SQLITE_SYNCHRONOUS"].lower()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE inválido: {journal_mode}")
+    if synchronous not in SYNCHRONOUS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS inválido: {synchronous}")
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+    ]
+
+
+def _aplicar_pragmas(pragmas, conexao_dbapi, registro):
+    cursor = conexao_dbapi.cursor()
+    for pragma in pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def configurar(app):
+    """Chamado antes do ``db.init_app``, que cria as engines"""
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **opcoes_engine(app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+
+
+def _ajustar_conexoes(engine, config):
+    if engine.dialect.name == "sqlite":
+        event.listen(
+            engine, "connect", partial(_aplicar_pragmas, pragmas_sqlite(config))
+        )
+
+
+def criar_engine(config, uri):
+    """Engine avulsa (a da réplica) com o mesmo perfil da principal"""
+    engine = create_engine(uri, **opcoes_engine(config, uri))
+    _ajustar_conexoes(engine, config)
+    return engine
+
+
+def init_app(app):
+    with app.app_context():
+        _ajustar_conexoes(db.engine, app.config)
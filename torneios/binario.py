@@ -0,0 +1,136 @@
+"""Formato binário compacto do chaveamento, para quem busca muitos de uma vez"""
+import struct
+from collections import namedtuple
+
+MAGICO = b"CHVB"
+VERSAO_FORMATO = 1
+TIPO_CONTEUDO = "application/octet-stream"
+
+# Little-endian, sem alinhamento. Cabeçalho: mágico, versão do formato, id do
+# torneio, versão do chaveamento, quantidade de nomes e de chaves. Cada nome: id
+# e tamanho, seguidos do nome em UTF-8. Cada chave: id, rodada (1 é a final e 0 o
+# terceiro lugar), grupo, flags, competidores a e b e vencedor (0 quando vazio)
+# e os dois resultados, válidos só com a flag correspondente
+CABECALHO = struct.Struct("<4sB3xIIII")
+NOME = struct.Struct("<IH")
+REGISTRO = struct.Struct("<IHcBIIIii")
+
+BYE = 0x01
+COM_RESULTADO_A = 0x02
+COM_RESULTADO_B = 0x04
+
+SnapshotChaveamento = namedtuple(
+    "SnapshotChaveamento", ["torneio_id", "versao", "nomes", "chaves"]
+)
+RegistroChave = namedtuple(
+    "RegistroChave",
+    [
+        "id",
+        "rodada",
+        "grupo",
+        "bye",
+        "competidor_a_id",
+        "competidor_b_id",
+        "vencedor_id",
+        "resultado_a",
+        "resultado_b",
+    ],
+)
+
+
+def codificar_chaveamento(torneio_id, versao, lotes):
+    """Snapshot binário a partir dos lotes de ``iterar_chaveamento``"""
+    nomes = {}
+    registros = []
+    for lote in lotes:
+        for linha in lote:
+            flags = BYE if linha.bye else 0
+            if linha.resultado_comp_a is not None:
+                flags |= COM_RESULTADO_A
+            if linha.resultado_comp_b is not None:
+                flags |= COM_RESULTADO_B
+            for vaga in ("a", "b"):
+                id_competidor = getattr(linha, f"competidor_{vaga}_id")
+                if id_competidor is not None:
+                    nomes[id_competidor] = getattr(linha, f"competidor_{vaga}_nome")
+            registros.append(
+                REGISTRO.pack(
+                    linha.id,
+                    linha.rodada,
+                    linha.grupo.encode("ascii"),
+                    flags,
+                    linha.competidor_a_id or 0,
+                    linha.competidor_b_id or 0,
+                    linha.vencedor_id or 0,
+                    linha.resultado_comp_a or 0,
+                    linha.resultado_comp_b or 0,
+                )
+            )
+    partes = [
+        CABECALHO.pack(
+            MAGICO, VERSAO_FORMATO, torneio_id, versao, len(nomes), len(registros)
+        )
+    ]
+    for id_competidor, nome in nomes.items():
+        codificado = (nome or "").encode("utf-8")
+        partes.append(NOME.pack(id_competidor, len(codificado)))
+        partes.append(codificado)
+    partes.extend(registros)
+    return b"".join(partes)
+
+
+def decodificar_chaveamento(dados):
+    """Lê um snapshot; ``ValueError`` se os bytes não estiverem no formato"""
+    dados = memoryview(dados)
+    if len(dados) < CABECALHO.size:
+        raise ValueError("snapshot truncado no cabeçalho")
+    magico, formato, torneio_id, versao, qtd_nomes, qtd_chaves = CABECALHO.unpack_from(
+        dados
+    )
+    if magico != MAGICO:
+        raise ValueError("não é um snapshot de chaveamento")
+    if formato != VERSAO_FORMATO:
+        raise ValueError(f"versão de formato não suportada: {formato}")
+
+    posicao = CABECALHO.size
+    nomes = {}
+    try:
+        for _ in range(qtd_nomes):
+            id_competidor, tamanho = NOME.unpack_from(dados, posicao)
+            posicao += NOME.size
+            nome = dados[posicao : posicao + tamanho]
+            if len(nome) < tamanho:
+                raise ValueError("snapshot truncado na tabela de nomes")
+            nomes[id_competidor] = str(nome, "utf-8")
+            posicao += tamanho
+    except struct.error as exc:
+        raise ValueError("snapshot truncado na tabela de nomes") from exc
+
+    corpo = dados[posicao:]
+    if len(corpo) != qtd_chaves * REGISTRO.size:
+        raise ValueError("tamanho das chaves não confere com o cabeçalho")
+    chaves = [
+        RegistroChave(
+            id_chave,
+            rodada,
+            grupo.decode("ascii"),
+            bool(flags & BYE),
+            competidor_a_id or None,
+            competidor_b_id or None,
+            vencedor_id or None,
+            resultado_a if flags & COM_RESULTADO_A else None,
+            resultado_b if flags & COM_RESULTADO_B else None,
+        )
+        for (
+            id_chave,
+            rodada,
+            grupo,
+            flags,
+            competidor_a_id,
+            competidor_b_id,
+            vencedor_id,
+            resultado_a,
+            resultado_b,
+        ) in REGISTRO.iter_unpack(corpo)
+    ]
+    return SnapshotChaveamento(torneio_id, versao, nomes, chaves)
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class CacheLRU:
+    """LRU em memória do processo, limitado pela soma de ``medir(valor)``"""
+
+    def __init__(self, tamanho_maximo, medir=len):
+        self.tamanho_maximo = tamanho_maximo
+        self.medir = medir
+        self.tamanho_atual = 0
+        self._itens = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        tamanho = self.medir(valor)
+        if tamanho > self.tamanho_maximo:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.tamanho_atual -= self.medir(anterior)
+            self._itens[chave] = valor
+            self.tamanho_atual += tamanho
+            while self.tamanho_atual > self.tamanho_maximo:
+                _, removido = self._itens.popitem(last=False)
+                self.tamanho_atual -= self.medir(removido)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.tamanho_atual = 0
+
+    def __len__(self):
+        return len(self._itens)
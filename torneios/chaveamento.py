@@ -0,0 +1,108 @@
+import math
+import random
+
+GRUPOS = ("a", "b")
+RODADA_FINAL = 1
+RODADA_TERCEIRO = 0
+
+
+def rodada_por_qtd_competidores(total_competidores):
+    return math.ceil(math.log2(total_competidores))
+
+
+def montar_chaveamento(torneio_id, ids_competidores):
+    """Calcula o chaveamento inteiro em memória, sem tocar no banco.
+    Retorna ``(linhas, ligacoes)``, com os byes já resolvidos"""
+    # Com 2 competidores ainda há semi-final (dois byes) para alimentar a final
+    primeira_rodada = max(rodada_por_qtd_competidores(len(ids_competidores)), 2)
+    meio = len(ids_competidores) // 2
+    rodadas_por_grupo = {
+        grupo: _montar_rodadas_grupo(torneio_id, grupo, ids_grupo, primeira_rodada)
+        for grupo, ids_grupo in zip(
+            GRUPOS, (ids_competidores[:meio], ids_competidores[meio:])
+        )
+    }
+
+    linhas = []
+    indices = {}
+    qtd_rodadas_grupo = primeira_rodada - RODADA_FINAL
+    for posicao in range(qtd_rodadas_grupo):
+        for grupo in GRUPOS:
+            for j, linha in enumerate(rodadas_por_grupo[grupo][posicao]):
+                indices[grupo, posicao, j] = len(linhas)
+                linhas.append(linha)
+    final = len(linhas)
+    linhas.append(_nova_linha(torneio_id, RODADA_FINAL, "f"))
+    terceiro = len(linhas)
+    linhas.append(_nova_linha(torneio_id, RODADA_TERCEIRO, "f"))
+
+    ligacoes = []
+    for (grupo, posicao, j), origem in indices.items():
+        if posicao + 1 < qtd_rodadas_grupo:
+            proxima = indices[grupo, posicao + 1, j // 2]
+            ligacoes.append((origem, proxima, "ab"[j % 2], None, None))
+        else:
+            # Semi-final: vencedor vai para a final e perdedor para a disputa de
+            # terceiro, cada grupo na sua vaga
+            ligacoes.append((origem, final, grupo, terceiro, grupo))
+    _propagar_byes(linhas, ligacoes)
+    return linhas, ligacoes
+
+
+def _propagar_byes(linhas, ligacoes):
+    # As linhas estão em ordem de rodada decrescente, então um competidor que
+    # passa por byes seguidos avança até a primeira chave com adversário numa
+    # única passada
+    destinos = {origem: (proxima, vaga) for origem, proxima, vaga, _, _ in ligacoes}
+    for indice, linha in enumerate(linhas):
+        competidor_id = linha["competidor_a_id"] or linha["competidor_b_id"]
+        if not linha["bye"] or competidor_id is None:
+            continue
+        linha["vencedor_id"] = competidor_id
+        linha["classificado_bye"] = True
+        proxima, vaga = destinos[indice]
+        linhas[proxima][f"competidor_{vaga}_id"] = competidor_id
+
+
+def _montar_rodadas_grupo(torneio_id, grupo, ids_grupo, primeira_rodada):
+    ids_grupo = list(ids_grupo)
+    if len(ids_grupo) % 2 != 0:
+        ids_grupo.append(None)
+    random.shuffle(ids_grupo)
+
+    primeira = []
+    for i in range(0, len(ids_grupo), 2):
+        linha = _nova_linha(
+            torneio_id, primeira_rodada, grupo, ids_grupo[i], ids_grupo[i + 1]
+        )
+        if ids_grupo[i] is None or ids_grupo[i + 1] is None:
+            linha["vencedor_id"] = ids_grupo[i] or ids_grupo[i + 1]
+            linha["bye"] = True
+        primeira.append(linha)
+
+    rodadas = [primeira]
+    for rodada in range(primeira_rodada - 1, RODADA_FINAL, -1):
+        disputas_anteriores = len(rodadas[-1])
+        chaves = [
+            _nova_linha(torneio_id, rodada, grupo)
+            for _ in range(math.ceil(disputas_anteriores / 2))
+        ]
+        # Número ímpar de classificados: a última chave recebe um só competidor,
+        # sempre na vaga "a"
+        if chaves and disputas_anteriores % 2 != 0:
+            chaves[-1]["bye"] = True
+        rodadas.append(chaves)
+    return rodadas
+
+
+def _nova_linha(torneio_id, rodada, grupo, competidor_a_id=None, competidor_b_id=None):
+    return {
+        "torneio_id": torneio_id,
+        "rodada": rodada,
+        "grupo": grupo,
+        "competidor_a_id": competidor_a_id,
+        "competidor_b_id": competidor_b_id,
+        "vencedor_id": None,
+        "bye": False,
+        "classificado_bye": False,
+    }
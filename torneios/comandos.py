@@ -0,0 +1,97 @@
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .inicio import DEPENDENCIAS, medir_partida
+from .service import ChaveamentoService, RatingService, TorneioService
+
+
+@click.command("reconciliar-competidores")
+@with_appcontext
+def reconciliar_competidores():
+    """Recalcula qtd_competidores de todos os torneios a partir da tabela."""
+    corrigidos = TorneioService.reconciliar_qtd_competidores()
+    click.echo(f"{corrigidos} torneio(s) corrigido(s)")
+
+
+@click.command("reconstruir-ratings")
+@with_appcontext
+def reconstruir_ratings():
+    """Refaz os ratings de todos os jogadores a partir das partidas gravadas."""
+    inicio = time.perf_counter()
+    partidas, jogadores = RatingService.reconstruir_ratings()
+    click.echo(
+        f"{partidas} partida(s) de {jogadores} jogador(es) "
+        f"em {time.perf_counter() - inicio:.2f} s"
+    )
+
+
+@click.command("sortear-torneios")
+@click.argument("ids", nargs=-1, type=int)
+@click.option(
+    "--pendentes",
+    is_flag=True,
+    help="Inclui todos os torneios não sorteados com dois ou mais competidores.",
+)
+@click.option("--workers", default=4, show_default=True, type=click.IntRange(1, 16))
+@with_appcontext
+def sortear_torneios(ids, pendentes, workers):
+    """Sorteia vários torneios em paralelo, antes do primeiro GET /match."""
+    ids = list(ids)
+    if pendentes:
+        ids += ChaveamentoService.torneios_pendentes_sorteio()
+    if not ids:
+        raise click.UsageError("Informe os ids dos torneios ou --pendentes")
+    inicio = time.perf_counter()
+    sorteios = ChaveamentoService.sortear_em_paralelo(ids, workers)
+    falhas = 0
+    for id_torneio, sorteado, segundos, erro in sorteios:
+        if erro is not None:
+            falhas += 1
+            situacao = f"falhou: {getattr(erro, 'message', repr(erro))}"
+        else:
+            situacao = "sorteado" if sorteado else "já estava sorteado"
+        click.echo(f"torneio {id_torneio}: {situacao} ({segundos * 1000:.1f} ms)")
+    click.echo(
+        f"{len(sorteios)} torneio(s) em {time.perf_counter() - inicio:.2f} s, "
+        f"{falhas} falha(s)"
+    )
+    if falhas:
+        raise SystemExit(1)
+
+
+@click.command("startup-profile")
+@click.option(
+    "--modo",
+    default=lambda: os.getenv("CONFIG_MODE") or "production",
+    help="Config do create_app medido (padrão: CONFIG_MODE ou production).",
+)
+@click.option("--repeticoes", default=5, show_default=True, type=click.IntRange(1))
+@click.option("--pacotes", default=10, show_default=True, help="Imports listados.")
+@click.option("--verificar", is_flag=True, help="Sai com erro acima da meta.")
+@with_appcontext
+def startup_profile(modo, repeticoes, pacotes, verificar):
+    """Mede a partida a frio do app, cada vez num processo Python novo."""
+    relatorio = medir_partida(modo, repeticoes)
+    meta = current_app.config["META_INICIO_MS"]
+    click.echo(
+        f"partida a frio ({modo}, mediana de {repeticoes}): "
+        f"{relatorio['total_ms']:.0f} ms, meta {meta:.0f} ms"
+    )
+    click.echo(f"  interpretador: {relatorio['interpretador_ms']:.0f} ms")
+    click.echo(
+        f"  dependências ({', '.join(DEPENDENCIAS)}): "
+        f"{relatorio['dependencias_ms']:.0f} ms"
+    )
+    click.echo(
+        f"  torneios e create_app: {relatorio['proprio_ms']:.0f} ms "
+        f"(create_app {relatorio['create_app_ms']:.0f} ms)"
+    )
+    click.echo("imports por pacote:")
+    for pacote, ms in list(relatorio["imports_por_pacote"].items())[:pacotes]:
+        click.echo(f"  {pacote}: {ms:.1f} ms")
+    if verificar and relatorio["total_ms"] > meta:
+        raise SystemExit(1)
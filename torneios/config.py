@@ -1,30 +1,109 @@
 import os
 
 
+def _env(nome, padrao, tipo=int):
+    valor = os.getenv(nome)
+    return padrao if valor is None else tipo(valor)
+
+
+def _ligado(valor):
+    return valor == "1"
+
+
 class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = True
+    # Soma dos chaveamentos serializados guardados por processo, em bytes
+    CACHE_CHAVEAMENTO_BYTES = int(
+        os.getenv("CACHE_CHAVEAMENTO_BYTES", 64 * 1024 * 1024)
+    )
+    # Queries e tempo de banco por requisição (ver torneios/instrumentacao.py)
+    INSTRUMENTAR_SQL = os.getenv("INSTRUMENTAR_SQL") == "1"
+    SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", 100))
+    # Endpoint /metrics no formato do Prometheus (ver torneios/metricas.py)
+    METRICAS = os.getenv("METRICAS", "1") == "1"
+    # Eventos guardados por torneio para quem reconecta e intervalo do keepalive
+    # do GET /tournament/<id>/events (ver torneios/eventos.py)
+    EVENTOS_BUFFER = int(os.getenv("EVENTOS_BUFFER", 256))
+    EVENTOS_KEEPALIVE_S = float(os.getenv("EVENTOS_KEEPALIVE_S", 15))
+    # Canais de torneio guardados por processo; os sem assinantes saem primeiro
+    EVENTOS_CANAIS = int(os.getenv("EVENTOS_CANAIS", 1024))
+    # Cabeçalho X-Admin-Token exigido pelas rotas /admin; sem ele, ficam fechadas
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+    # Chaves × simulações de um cálculo de odds: acima disso o chaveamento
+    # simula menos vezes que o pedido. O padrão cobre 100000 simulações com 1024
+    # competidores; a memória é limitada por lote, em simulacao.CELULAS_POR_LOTE
+    ODDS_MAX_CELULAS = int(os.getenv("ODDS_MAX_CELULAS", 2**27))
+
+    # Réplica de leitura para os GET (ver torneios/replica.py) e por quantos
+    # segundos quem escreveu continua lendo do primário
+    REPLICA_DATABASE_URI = os.getenv("REPLICA_DATABASE_URL")
+    REPLICA_JANELA_S = float(os.getenv("REPLICA_JANELA_S", 5))
+
+    # O que o create_app faz com o esquema do banco (ver torneios/inicio.py):
+    # "criar" roda db.create_all(), "verificar" confere a revisão do Alembic e
+    # "nada" não abre conexão. Meta da partida a frio do flask startup-profile
+    ESQUEMA_NA_INICIALIZACAO = os.getenv("ESQUEMA_NA_INICIALIZACAO", "criar")
+    META_INICIO_MS = float(os.getenv("META_INICIO_MS", 200))
+
+    # Perfil da engine do banco (ver torneios/banco.py). Os valores da base são
+    # os padrões do SQLAlchemy, do PostgreSQL e do SQLite; cada ambiente ajusta
+    # os seus, e as variáveis de ambiente de mesmo nome têm a palavra final
+    DB_POOL_SIZE = _env("DB_POOL_SIZE", 5)
+    DB_MAX_OVERFLOW = _env("DB_MAX_OVERFLOW", 10)
+    # Espera por uma conexão livre antes do erro de pool esgotado
+    DB_POOL_TIMEOUT_S = _env("DB_POOL_TIMEOUT_S", 30, float)
+    # Conexões mais velhas que isso são refeitas; -1 desliga
+    DB_POOL_RECYCLE_S = _env("DB_POOL_RECYCLE_S", -1)
+    DB_POOL_PRE_PING = _env("DB_POOL_PRE_PING", False, _ligado)
+    # Só no PostgreSQL: cancela a query que passar disso; 0 desliga
+    DB_STATEMENT_TIMEOUT_MS = _env("DB_STATEMENT_TIMEOUT_MS", 0)
+    # Só no SQLite, aplicados em cada conexão nova
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "delete")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "full")
+    SQLITE_BUSY_TIMEOUT_MS = _env("SQLITE_BUSY_TIMEOUT_MS", 5000)
 
 
 class DevelopmentConfig(Config):
     DEVELOPMENT = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    DB_MAX_OVERFLOW = _env("DB_MAX_OVERFLOW", 5)
+    DB_POOL_PRE_PING = _env("DB_POOL_PRE_PING", True, _ligado)
+    DB_STATEMENT_TIMEOUT_MS = _env("DB_STATEMENT_TIMEOUT_MS", 60_000)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "normal")
 
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL")
-
-
-class StagingConfig(Config):
-    DEVELOPMENT = True
-    DEBUG = True
-    SQLALCHEMY_DATABASE_URI = os.getenv("STAGING_DATABASE_URL")
+    # Journal padrão, sem WAL: a base é apagada entre execuções e um -wal antigo
+    # ao lado de um arquivo novo o corromperia. Durabilidade não importa aqui
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "off")
 
 
 class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    # O esquema vem do flask db upgrade no deploy, não de cada worker
+    ESQUEMA_NA_INICIALIZACAO = os.getenv("ESQUEMA_NA_INICIALIZACAO", "verificar")
+    # Com vários workers, pool × workers precisa caber no max_connections do
+    # banco. Um timeout curto devolve erro em vez de travar o worker
+    DB_POOL_SIZE = _env("DB_POOL_SIZE", 10)
+    DB_MAX_OVERFLOW = _env("DB_MAX_OVERFLOW", 20)
+    DB_POOL_TIMEOUT_S = _env("DB_POOL_TIMEOUT_S", 5, float)
+    DB_POOL_RECYCLE_S = _env("DB_POOL_RECYCLE_S", 1800)
+    DB_POOL_PRE_PING = _env("DB_POOL_PRE_PING", True, _ligado)
+    DB_STATEMENT_TIMEOUT_MS = _env("DB_STATEMENT_TIMEOUT_MS", 30_000)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "normal")
+
+
+class StagingConfig(ProductionConfig):
+    DEVELOPMENT = True
+    DEBUG = True
+    SQLALCHEMY_DATABASE_URI = os.getenv("STAGING_DATABASE_URL")
 
 
 config = {
@@ -0,0 +1,134 @@
+"""Eventos do chaveamento em Server-Sent Events, em GET /tournament/<id>/events"""
+import json
+from collections import OrderedDict, deque
+from itertools import islice
+from threading import Condition, Lock
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from . import db
+
+# Enviado na abertura: cabeçalhos saem na hora e o navegador espera 3 s para
+# reconectar
+RECONECTAR = "retry: 3000\n\n"
+RECARREGAR = "event: recarregar\ndata: {}\n\n"
+MANTER_CONEXAO = ": keepalive\n\n"
+
+
+class Canal:
+    def __init__(self, capacidade):
+        self.condicao = Condition()
+        self.mensagens = deque(maxlen=capacidade)
+        self.ultimo = 0  # id do último evento publicado
+        self.assinantes = 0  # mudado só com a trava do Distribuidor
+
+    def publicar(self, eventos):
+        dados = [(tipo, json.dumps(conteudo)) for tipo, conteudo in eventos]
+        with self.condicao:
+            for tipo, conteudo in dados:
+                self.ultimo += 1
+                self.mensagens.append(
+                    f"id: {self.ultimo}\nevent: {tipo}\ndata: {conteudo}\n\n"
+                )
+            self.condicao.notify_all()
+
+    def _desde(self, visto):
+        # Chamado com a condição travada; None quando parte já saiu do buffer
+        faltam = self.ultimo - visto
+        if faltam < 0 or faltam > len(self.mensagens):
+            return None
+        return list(islice(self.mensagens, len(self.mensagens) - faltam, None))
+
+    def assinar(self, visto, espera):
+        """Mensagens SSE depois do evento ``visto``, com keepalive a cada ``espera``"""
+        yield RECONECTAR
+        while True:
+            with self.condicao:
+                self.condicao.wait_for(lambda: self.ultimo != visto, timeout=espera)
+                mensagens = self._desde(visto)
+                visto = self.ultimo
+            if mensagens is None:
+                yield RECARREGAR
+            elif mensagens:
+                yield "".join(mensagens)
+            else:
+                yield MANTER_CONEXAO
+
+
+class Distribuidor:
+    def __init__(self, capacidade=256, max_canais=1024):
+        self.capacidade = capacidade
+        self.max_canais = max_canais
+        # Do canal usado há mais tempo ao mais recente; além de max_canais, os
+        # mais antigos sem assinantes saem. Quem reconecta a um canal que saiu
+        # recebe recarregar, como se o evento tivesse saído do buffer
+        self._canais = OrderedDict()
+        self._trava = Lock()
+
+    def _canal(self, torneio_id):
+        # Chamado com a trava
+        canal = self._canais.get(torneio_id)
+        if canal is not None:
+            self._canais.move_to_end(torneio_id)
+            return canal
+        canal = self._canais[torneio_id] = Canal(self.capacidade)
+        excesso = len(self._canais) - self.max_canais
+        if excesso > 0:
+            ociosos = (
+                id_ for id_, canal_ in self._canais.items() if not canal_.assinantes
+            )
+            for id_ in list(islice(ociosos, excesso)):
+                del self._canais[id_]
+        return canal
+
+    def canal(self, torneio_id):
+        with self._trava:
+            return self._canal(torneio_id)
+
+    def assinar(self, torneio_id, visto, espera):
+        """``Canal.assinar`` do torneio; sem ``visto``, só o que vier depois"""
+        with self._trava:
+            canal = self._canal(torneio_id)
+            canal.assinantes += 1
+        try:
+            if visto is None:
+                visto = canal.ultimo
+            yield from canal.assinar(visto, espera)
+        finally:
+            with self._trava:
+                canal.assinantes -= 1
+
+    def publicar(self, eventos):
+        por_torneio = {}
+        for torneio_id, tipo, conteudo in eventos:
+            por_torneio.setdefault(torneio_id, []).append((tipo, conteudo))
+        for torneio_id, eventos_torneio in por_torneio.items():
+            self.canal(torneio_id).publicar(eventos_torneio)
+
+
+def registrar(torneio_id, tipo, **conteudo):
+    """Enfileira um evento na transação corrente; sai só no commit"""
+    db.session.info.setdefault("eventos", []).append((torneio_id, tipo, conteudo))
+
+
+@event.listens_for(db.session, "after_commit")
+def _publicar_pendentes(session):
+    eventos = session.info.pop("eventos", None)
+    if eventos and has_app_context():
+        distribuidor = current_app.extensions.get("eventos")
+        if distribuidor is not None:
+            distribuidor.publicar(eventos)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _descartar_pendentes(session, transacao):
+    # Vem depois do after_commit; no rollback ou no close os eventos se perdem
+    if transacao.parent is None:
+        session.info.pop("eventos", None)
+
+
+def init_app(app):
+    app.extensions["eventos"] = Distribuidor(
+        app.config["EVENTOS_BUFFER"], app.config["EVENTOS_CANAIS"]
+    )
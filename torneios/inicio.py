@@ -0,0 +1,237 @@
+"""Partida da aplicação: o esquema do banco no ``create_app`` e o ``flask db``"""
+import ast
+import hashlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, ScriptInfo
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import db
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_MIGRACOES = os.path.join(RAIZ, "migrations")
+ARQUIVO_VERIFICACAO = "esquema_verificado.json"
+MODOS_ESQUEMA = {"criar", "verificar", "nada"}
+ESQUEMA_PENDENTE = "esquema_desatualizado"
+
+_ATRIBUICAO = re.compile(
+    r"^(revision|down_revision)\s*(?::[^=]+)?=\s*(.+?)\s*$", re.MULTILINE
+)
+
+
+class EsquemaDesatualizadoError(RuntimeError):
+    pass
+
+
+def revisoes_head(diretorio=DIRETORIO_MIGRACOES):
+    """Cabeças do histórico de migrações, lidas dos arquivos sem o Alembic"""
+    revisoes, anteriores = set(), set()
+    pasta = os.path.join(diretorio, "versions")
+    for nome in os.listdir(pasta):
+        if not nome.endswith(".py"):
+            continue
+        with open(os.path.join(pasta, nome), encoding="utf-8") as arquivo:
+            atribuicoes = dict(_ATRIBUICAO.findall(arquivo.read()))
+        if "revision" not in atribuicoes:
+            continue
+        revisoes.add(ast.literal_eval(atribuicoes["revision"]))
+        anterior = ast.literal_eval(atribuicoes.get("down_revision", "None"))
+        if isinstance(anterior, str):
+            anterior = (anterior,)
+        anteriores.update(anterior or ())
+    return sorted(revisoes - anteriores)
+
+
+def _assinatura(engine, revisoes):
+    url = engine.url.render_as_string(hide_password=False)
+    return hashlib.sha256(json.dumps([url, revisoes]).encode()).hexdigest()
+
+
+def _ler_verificacao(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo).get("assinatura")
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_verificacao(caminho, assinatura, revisoes):
+    # Sem permissão de escrita (container só leitura) a verificação só não fica
+    # guardada: cada worker consulta o banco
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump({"assinatura": assinatura, "revisoes": revisoes}, arquivo)
+    except OSError:
+        pass
+
+
+def verificar_esquema(app):
+    """Confere a revisão do banco com as migrações do repositório.
+    Retorna ``False`` quando a conferência já estava guardada"""
+    esperadas = revisoes_head()
+    assinatura = _assinatura(db.engine, esperadas)
+    caminho = os.path.join(app.instance_path, ARQUIVO_VERIFICACAO)
+    if _ler_verificacao(caminho) == assinatura:
+        return False
+    try:
+        with db.engine.connect() as conexao:
+            gravadas = sorted(
+                conexao.scalars(text("SELECT version_num FROM alembic_version"))
+            )
+    except SQLAlchemyError as erro:
+        raise EsquemaDesatualizadoError(
+            "Banco sem a tabela alembic_version: rode flask db upgrade"
+        ) from erro
+    if gravadas != esperadas:
+        raise EsquemaDesatualizadoError(
+            f"Banco na revisão {', '.join(gravadas) or 'nenhuma'}, migrações em "
+            f"{', '.join(esperadas)}: rode flask db upgrade"
+        )
+    _gravar_verificacao(caminho, assinatura, esperadas)
+    return True
+
+
+def preparar_esquema(app):
+    modo = app.config["ESQUEMA_NA_INICIALIZACAO"]
+    if modo not in MODOS_ESQUEMA:
+        raise ValueError(f"ESQUEMA_NA_INICIALIZACAO inválido: {modo}")
+    if modo == "nada":
+        return
+    with app.app_context():
+        if modo == "criar":
+            db.create_all()
+            return
+        try:
+            verificar_esquema(app)
+        except EsquemaDesatualizadoError as erro:
+            if os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+                raise
+            app.logger.warning(str(erro))
+            app.extensions[ESQUEMA_PENDENTE] = erro
+            app.before_request(_recusar_requisicao)
+
+
+def _recusar_requisicao():
+    raise current_app.extensions[ESQUEMA_PENDENTE]
+
+
+class ComandosApp(AppGroup):
+    """``app.cli`` que recusa os comandos com o esquema desatualizado, menos o ``db``"""
+
+    def get_command(self, ctx, nome):
+        comando = super().get_command(ctx, nome)
+        if comando is not None and comando is not migracoes:
+            app = ctx.ensure_object(ScriptInfo).load_app()
+            erro = app.extensions.get(ESQUEMA_PENDENTE)
+            if erro is not None:
+                raise click.ClickException(str(erro))
+        return comando
+
+
+class GrupoMigracoes(click.Group):
+    """O grupo ``db`` do Flask-Migrate, importado só quando é chamado"""
+
+    def _grupo(self, ctx):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as grupo
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if "migrate" not in app.extensions:
+            Migrate(app, db)
+        return grupo
+
+    def list_commands(self, ctx):
+        return self._grupo(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, nome):
+        return self._grupo(ctx).get_command(ctx, nome)
+
+
+migracoes = GrupoMigracoes("db", help="Perform database migrations.")
+
+
+# Dependências que toda partida importa, do Flask ao Pydantic: o que vem depois
+# delas (o pacote torneios e o create_app) é a parte da partida que é nossa
+DEPENDENCIAS = ("flask", "flask_sqlalchemy", "sqlalchemy.orm", "flask_pydantic_spec")
+
+_SCRIPT_PARTIDA = """
+import importlib, json, sys, time
+marcas = {"processo": time.time()}
+for dependencia in sys.argv[2:]:
+    importlib.import_module(dependencia)
+marcas["dependencias"] = time.time()
+from torneios import create_app
+marcas["importado"] = time.time()
+create_app(sys.argv[1])
+marcas["pronto"] = time.time()
+print(json.dumps(marcas))
+"""
+
+
+def _rodar_partida(modo, importtime=False):
+    comando = [sys.executable]
+    if importtime:
+        comando += ["-X", "importtime"]
+    # Como um worker, não como o flask da linha de comando
+    ambiente = {
+        nome: valor
+        for nome, valor in os.environ.items()
+        if nome != "FLASK_RUN_FROM_CLI"
+    }
+    inicio = time.time()
+    processo = subprocess.run(
+        [*comando, "-c", _SCRIPT_PARTIDA, modo, *DEPENDENCIAS],
+        cwd=RAIZ,
+        env=ambiente,
+        capture_output=True,
+        text=True,
+    )
+    if processo.returncode:
+        raise click.ClickException(
+            f"create_app({modo!r}) falhou:\n{processo.stderr.strip()[-2000:]}"
+        )
+    marcas = json.loads(processo.stdout.strip().splitlines()[-1])
+    return {
+        "total_ms": (marcas["pronto"] - inicio) * 1000,
+        "interpretador_ms": (marcas["processo"] - inicio) * 1000,
+        "dependencias_ms": (marcas["dependencias"] - marcas["processo"]) * 1000,
+        "proprio_ms": (marcas["pronto"] - marcas["dependencias"]) * 1000,
+        "create_app_ms": (marcas["pronto"] - marcas["importado"]) * 1000,
+    }, processo.stderr
+
+
+def _imports_por_pacote(saida_importtime):
+    """Tempo próprio (sem os filhos) de cada import, somado por pacote raiz"""
+    por_pacote = defaultdict(float)
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        proprio, _, nome = linha.removeprefix("import time:").split("|")
+        if proprio.strip().isdigit():
+            por_pacote[nome.strip().split(".")[0]] += int(proprio) / 1000
+    return dict(sorted(por_pacote.items(), key=lambda item: -item[1]))
+
+
+def medir_partida(modo, repeticoes=5):
+    """Partida a frio de ``create_app(modo)``, cada vez num processo novo"""
+    partidas = [_rodar_partida(modo)[0] for _ in range(repeticoes)]
+    relatorio = {
+        campo: round(statistics.median(p[campo] for p in partidas), 1)
+        for campo in partidas[0]
+    }
+    _, saida = _rodar_partida(modo, importtime=True)
+    relatorio["imports_por_pacote"] = {
+        pacote: round(ms, 1) for pacote, ms in _imports_por_pacote(saida).items()
+    }
+    return relatorio
@@ -0,0 +1,90 @@
+"""Contagem e tempo de SQL por requisição, com log das consultas lentas"""
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from . import db
+from .replica import BIND as REPLICA
+
+PREFIXO_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+SAVEPOINT_EXPLAIN = "explicar_consulta"
+
+
+def init_app(app):
+    # Chamado depois do replica.init_app: as leituras da réplica também contam
+    with app.app_context():
+        engines = [db.engine]
+    if REPLICA in app.extensions:
+        engines.append(app.extensions[REPLICA])
+    limite = app.config["SQL_LENTA_MS"] / 1000
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        # No contexto da execução, que acaba com ela: uma consulta que falha
+        # (sem after_cursor_execute) não deixa nada na conexão do pool
+        if context is not None:
+            context.inicio_consulta = time.perf_counter()
+
+    def depois(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "inicio_consulta", None)
+        if inicio is None:
+            return
+        duracao = time.perf_counter() - inicio
+        if has_request_context():
+            g.sql_queries = g.get("sql_queries", 0) + 1
+            g.sql_tempo = g.get("sql_tempo", 0.0) + duracao
+        if duracao >= limite:
+            app.logger.warning(
+                "Consulta lenta (%.1f ms): %s\nParâmetros: %r\nPlano:\n%s",
+                duracao * 1000,
+                statement,
+                parameters,
+                explicar(conn, cursor, statement, parameters, executemany),
+            )
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", antes)
+        event.listen(engine, "after_cursor_execute", depois)
+
+    @app.after_request
+    def registrar_sql(response):
+        queries = g.get("sql_queries", 0)
+        tempo_ms = g.get("sql_tempo", 0.0) * 1000
+        if app.debug:
+            response.headers["X-SQL-Queries"] = str(queries)
+            response.headers["X-SQL-Tempo-Ms"] = f"{tempo_ms:.3f}"
+        else:
+            app.logger.info(
+                "%s %s: %d queries, %.3f ms de banco",
+                request.method,
+                request.path,
+                queries,
+                tempo_ms,
+            )
+        return response
+
+
+def explicar(conn, cursor, statement, parameters, executemany):
+    prefixo = PREFIXO_EXPLAIN.get(conn.dialect.name)
+    consulta = statement.lstrip().upper().startswith("SELECT")
+    if not prefixo or executemany or not consulta:
+        return "(sem plano)"
+    # Cursor novo direto no driver: não passa pelos eventos nem mexe no resultado
+    # da consulta original. Roda num savepoint porque, no PostgreSQL, um EXPLAIN
+    # que falha abortaria a transação da própria requisição
+    cursor_plano = cursor.connection.cursor()
+    try:
+        cursor_plano.execute(f"SAVEPOINT {SAVEPOINT_EXPLAIN}")
+        try:
+            cursor_plano.execute(prefixo + statement, parameters)
+            plano = "\n".join(str(linha[-1]) for linha in cursor_plano.fetchall())
+        except Exception:
+            cursor_plano.execute(f"ROLLBACK TO SAVEPOINT {SAVEPOINT_EXPLAIN}")
+            raise
+        finally:
+            cursor_plano.execute(f"RELEASE SAVEPOINT {SAVEPOINT_EXPLAIN}")
+        return plano
+    except Exception as exc:  # o plano é só diagnóstico
+        return f"(plano indisponível: {exc})"
+    finally:
+        cursor_plano.close()
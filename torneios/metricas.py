@@ -0,0 +1,199 @@
+"""Métricas do processo no formato de texto do Prometheus, servidas em /metrics"""
+import functools
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from flask import Response, g, request
+
+from . import db
+from .replica import BIND as REPLICA
+
+# Segundos: de 0,5 ms a 10 s
+LIMITES_PADRAO = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+IMPLICITOS = {"HEAD", "OPTIONS"}  # métodos que o Flask acrescenta a toda rota
+
+
+def _rotulos(pares):
+    if not pares:
+        return ""
+    texto = ",".join(
+        '{}="{}"'.format(
+            chave,
+            str(valor).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for chave, valor in pares
+    )
+    return "{" + texto + "}"
+
+
+class Contador:
+    def __init__(self, nome, ajuda):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.valor = 0
+        self._trava = Lock()
+
+    def incrementar(self, quantidade=1):
+        with self._trava:
+            self.valor += quantidade
+
+    def exportar(self):
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} counter"
+        yield f"{self.nome} {self.valor}"
+
+
+class SerieHistograma:
+    __slots__ = ("limites", "rotulos", "contagens", "soma", "_trava")
+
+    def __init__(self, limites, rotulos):
+        self.limites = limites
+        self.rotulos = rotulos
+        self.contagens = [0] * (len(limites) + 1)  # a última é o +Inf
+        self.soma = 0.0
+        self._trava = Lock()
+
+    def observar(self, valor):
+        indice = bisect_left(self.limites, valor)
+        with self._trava:
+            self.contagens[indice] += 1
+            self.soma += valor
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, limites=LIMITES_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.limites = tuple(limites)
+        self._series = {}
+        self._trava = Lock()
+
+    def serie(self, **rotulos):
+        """Série dos rótulos dados, criada na primeira chamada"""
+        chave = tuple(sorted(rotulos.items()))
+        serie = self._series.get(chave)
+        if serie is None:
+            with self._trava:
+                serie = self._series.setdefault(
+                    chave, SerieHistograma(self.limites, chave)
+                )
+        return serie
+
+    def exportar(self):
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} histogram"
+        for serie in list(self._series.values()):
+            with serie._trava:
+                contagens, soma = list(serie.contagens), serie.soma
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ("+Inf",), contagens):
+                acumulado += contagem
+                rotulos = _rotulos(serie.rotulos + (("le", limite),))
+                yield f"{self.nome}_bucket{rotulos} {acumulado}"
+            yield f"{self.nome}_sum{_rotulos(serie.rotulos)} {soma}"
+            yield f"{self.nome}_count{_rotulos(serie.rotulos)} {acumulado}"
+
+
+REQUISICOES = Histograma(
+    "torneios_requisicao_segundos", "Latência das rotas da API, em segundos"
+)
+SERVICOS = Histograma(
+    "torneios_servico_segundos", "Duração dos métodos dos serviços, em segundos"
+)
+SORTEIOS = Contador("torneios_sorteios_total", "Chaveamentos sorteados")
+RESULTADOS = Contador("torneios_resultados_total", "Resultados de partidas gravados")
+METRICAS = (REQUISICOES, SERVICOS, SORTEIOS, RESULTADOS)
+
+
+def cronometrar_servico(classe):
+    """Decorador de classe: mede todos os métodos públicos do serviço"""
+    for nome, atributo in list(vars(classe).items()):
+        if nome.startswith("_"):
+            continue
+        if isinstance(atributo, (staticmethod, classmethod)):
+            serie = SERVICOS.serie(metodo=f"{classe.__name__}.{nome}")
+            funcao = _cronometrar(atributo.__func__, serie)
+            setattr(classe, nome, type(atributo)(funcao))
+    return classe
+
+
+def _cronometrar(funcao, serie):
+    @functools.wraps(funcao)
+    def cronometrada(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            serie.observar(time.perf_counter() - inicio)
+
+    return cronometrada
+
+
+def init_app(app):
+    # Chamado depois do registro do blueprint: uma série por rota, já criada
+    series_rotas = {
+        regra.endpoint: REQUISICOES.serie(
+            rota=regra.rule, metodo=",".join(sorted(regra.methods - IMPLICITOS))
+        )
+        for regra in app.url_map.iter_rules()
+        if regra.endpoint.startswith("api.")
+    }
+
+    @app.before_request
+    def iniciar_cronometro():
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.teardown_request
+    def observar_requisicao(exc):
+        serie = series_rotas.get(request.endpoint)
+        inicio = g.get("inicio_requisicao")
+        if serie is not None and inicio is not None:
+            serie.observar(time.perf_counter() - inicio)
+
+    @app.get("/metrics")
+    def metricas():
+        linhas = [linha for metrica in METRICAS for linha in metrica.exportar()]
+        pools = [("primario", db.engine.pool)]
+        if REPLICA in app.extensions:
+            pools.append((REPLICA, app.extensions[REPLICA].pool))
+        linhas += exportar_pool(pools)
+        return Response("\n".join(linhas) + "\n", content_type=TIPO_CONTEUDO)
+
+
+def exportar_pool(pools):
+    """Gauges de cada ``(banco, pool)``, com o rótulo ``banco``"""
+    # Só o QueuePool tem contadores; StaticPool e NullPool não exportam nada
+    medidas = {
+        "torneios_pool_tamanho": ("Conexões mantidas pelo pool", "size"),
+        "torneios_pool_em_uso": ("Conexões emprestadas", "checkedout"),
+        "torneios_pool_livres": ("Conexões paradas no pool", "checkedin"),
+        "torneios_pool_excedentes": ("Conexões além do tamanho do pool", "overflow"),
+    }
+    for nome, (ajuda, metodo) in medidas.items():
+        valores = [
+            (banco, getattr(pool, metodo)())
+            for banco, pool in pools
+            if hasattr(pool, metodo)
+        ]
+        if valores:
+            yield f"# HELP {nome} {ajuda}"
+            yield f"# TYPE {nome} gauge"
+        for banco, valor in valores:
+            yield f"{nome}{_rotulos([('banco', banco)])} {valor}"
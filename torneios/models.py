@@ -1,37 +1,119 @@
+import re
+import unicodedata
+
 from . import db  # from __init__.py
+from .rating import PONTOS_INICIAIS
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import relationship
 
 
+def normalizar_nome(nome):
+    """Minúsculas, sem acentos e só com letras/dígitos separados por um espaço"""
+    sem_acentos = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore")
+    return " ".join(re.findall(r"[a-z0-9]+", sem_acentos.decode().lower()))
+
+
+def termos_do_nome(nome_normalizado):
+    return sorted(set(nome_normalizado.split()))
+
+
 class Torneio(db.Model):
     __tablename__ = "torneio"
+    __table_args__ = (
+        # Busca por trecho do nome; a busca por prefixo usa ``torneio_termo``
+        db.Index(
+            "ix_torneio_nome_normalizado_trgm",
+            "nome_normalizado",
+            postgresql_using="gin",
+            postgresql_ops={"nome_normalizado": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     nome_torneio = db.Column(db.String())
+    nome_normalizado = db.Column(db.String())
     qtd_competidores = db.Column(db.Integer, default=0)
     is_chaveado = db.Column(db.Boolean, default=False)
     is_finalizado = db.Column(db.Boolean, default=False)
+    # Incrementada a cada escrita no chaveamento (sorteio, resultado, bye)
+    versao_chaveamento = db.Column(db.Integer, default=0, nullable=False)
 
     competidores = relationship("Competidor", back_populates="torneio")
     chaves = relationship("Chave", back_populates="torneio")
+    termos = relationship("TermoTorneio", cascade="all, delete-orphan")
 
     def __init__(self, nome_torneio):
         self.nome_torneio = nome_torneio
+        self.nome_normalizado = normalizar_nome(nome_torneio)
+        self.termos = [
+            TermoTorneio(termo=termo) for termo in termos_do_nome(self.nome_normalizado)
+        ]
 
     def __repr__(self):
         return f"<id {self.id}>"
 
 
+event.listen(
+    Torneio.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+class TermoTorneio(db.Model):
+    """Cada palavra do nome normalizado de um torneio, para a busca por prefixo"""
+
+    __tablename__ = "torneio_termo"
+    # A chave primária começa pelo termo: o prefixo é um intervalo nela. No
+    # PostgreSQL a collation "C" compara byte a byte, como o SQLite
+    termo = db.Column(
+        db.String().with_variant(db.String(collation="C"), "postgresql"),
+        primary_key=True,
+    )
+    torneio_id = db.Column(db.Integer, db.ForeignKey("torneio.id"), primary_key=True)
+
+
+class Jogador(db.Model):
+    """Identidade de quem compete, a mesma em todos os torneios"""
+
+    __tablename__ = "jogador"
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String())
+
+    rating = relationship("Rating", back_populates="jogador", uselist=False)
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __repr__(self):
+        return f"<Jogador(id={self.id}, nome={self.nome})>"
+
+
+class Rating(db.Model):
+    __tablename__ = "rating"
+    __table_args__ = (db.Index("ix_rating_pontos", "pontos"),)
+    jogador_id = db.Column(db.Integer, db.ForeignKey("jogador.id"), primary_key=True)
+    pontos = db.Column(db.Float, nullable=False, default=PONTOS_INICIAIS)
+    partidas = db.Column(db.Integer, nullable=False, default=0)
+
+    jogador = relationship("Jogador", back_populates="rating")
+
+
 class Competidor(db.Model):
     __tablename__ = "competidor"
+    __table_args__ = (db.Index("ix_competidor_torneio_id_id", "torneio_id", "id"),)
     id = db.Column(db.Integer, primary_key=True)
     nome_competidor = db.Column(db.String())
     torneio_id = db.Column(db.Integer, db.ForeignKey("torneio.id"))
+    # Opcional: liga a inscrição ao jogador, para o rating entre torneios
+    jogador_id = db.Column(db.Integer, db.ForeignKey("jogador.id"))
 
     # Adicionando relação entre Equipe e Torneio
     torneio = relationship("Torneio", back_populates="competidores")
 
-    def __init__(self, nome_competidor, torneio_id):
+    def __init__(self, nome_competidor, torneio_id, jogador_id=None):
         self.nome_competidor = nome_competidor
         self.torneio_id = torneio_id
+        self.jogador_id = jogador_id
 
     def __repr__(self):
         return f"<id {self.id}, {self.nome_competidor}>"
@@ -42,6 +124,9 @@ class Competidor(db.Model):
 
 class Chave(db.Model):
     __tablename__ = "chave"
+    __table_args__ = (
+        db.Index("ix_chave_torneio_id_rodada_grupo", "torneio_id", "rodada", "grupo"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     torneio_id = db.Column(db.Integer, db.ForeignKey("torneio.id"))
     competidor_a_id = db.Column(db.Integer, db.ForeignKey("competidor.id"))
@@ -53,12 +138,23 @@ class Chave(db.Model):
     resultado_comp_a = db.Column(db.Integer)
     resultado_comp_b = db.Column(db.Integer)
     vencedor_id = db.Column(db.Integer, db.ForeignKey("competidor.id"))
+    # Para onde vão o vencedor e (na semi-final) o perdedor, preenchidos no sorteio
+    proxima_chave_id = db.Column(db.Integer, db.ForeignKey("chave.id"))
+    vaga_proxima_chave = db.Column(db.String(1))
+    chave_perdedor_id = db.Column(db.Integer, db.ForeignKey("chave.id"))
+    vaga_chave_perdedor = db.Column(db.String(1))
+    # Quando o resultado foi gravado: a ordem da reconstrução dos ratings
+    registrado_em = db.Column(db.DateTime)
+    # Trava otimista: todo UPDATE pelo ORM confere e incrementa a versão lida
+    versao = db.Column(db.Integer, nullable=False, server_default="1")
 
     competidor_a = relationship("Competidor", foreign_keys=[competidor_a_id])
     competidor_b = relationship("Competidor", foreign_keys=[competidor_b_id])
     vencedor = relationship("Competidor", foreign_keys=[vencedor_id])
     torneio = relationship("Torneio", back_populates="chaves")
 
+    __mapper_args__ = {"version_id_col": versao}
+
     def __init__(
         self, torneio_id, rodada, grupo, competidor_a_id=None, competidor_b_id=None
     ):
@@ -1,6 +1,6 @@
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conint, conlist, validator
 
 
 class Message(BaseModel):
@@ -19,9 +19,18 @@ class Torneio(BaseModel):
     nome_torneio: str
 
 
-class FiltroTorneio(BaseModel):
+class Paginacao(BaseModel):
+    limit: conint(ge=1, le=1000) = 100
+    after_id: Optional[int]
+
+
+class FiltroTorneio(Paginacao):
     id: Optional[str]
     nome_torneio: Optional[str]
+    # "prefixo" acha os nomes com alguma palavra começando por cada palavra
+    # buscada, com índice em qualquer banco; "contem" só tem índice (trigram) no
+    # PostgreSQL
+    busca: Literal["contem", "prefixo"] = "contem"
 
 
 class FiltroChave(BaseModel):
@@ -32,10 +41,21 @@ class FiltroChave(BaseModel):
 
 class TorneioResponse(BaseModel):
     torneios: List[Torneio]
+    proximo_after_id: Optional[int]
 
 
 class CompetidorRequest(BaseModel):
     nome_competidor: str
+    # Liga a inscrição a um jogador (POST /player) para o ranking entre torneios
+    jogador_id: Optional[int]
+
+
+class CompetidoresLoteRequest(BaseModel):
+    nomes: conlist(str, min_items=1)
+
+
+class IdsResponse(BaseModel):
+    ids: List[int]
 
 
 class CompetidorR(BaseModel):
@@ -43,8 +63,14 @@ class CompetidorR(BaseModel):
     nome: str
 
 
+class FiltroCompetidores(Paginacao):
+    # "ndjson" devolve todos os competidores em streaming, um JSON por linha
+    formato: Literal["json", "ndjson"] = "json"
+
+
 class CompetidoresResponse(BaseModel):
     competidores: List[CompetidorR]
+    proximo_after_id: Optional[int]
 
 
 class ChaveCreate(BaseModel):
@@ -63,6 +89,40 @@ class ChaveSerializada(BaseModel):
     vencedor: Optional[CompetidorR] = None
 
 
+class FiltroChaveamento(BaseModel):
+    # Corpo escrito aos poucos, direto do cursor, para chaveamentos grandes
+    stream: bool = False
+    # "binario" devolve o snapshot compacto de torneios/binario.py
+    formato: Literal["json", "binario"] = "json"
+
+
+# Poucos valores, cada um uma entrada de cache por estado do torneio
+SIMULACOES_ODDS = (1_000, 10_000, 100_000)
+
+
+class FiltroOdds(BaseModel):
+    simulacoes: int = 10_000
+
+    @validator("simulacoes")
+    def simulacoes_permitidas(cls, valor):
+        if valor not in SIMULACOES_ODDS:
+            raise ValueError(f"simulacoes deve ser um de {SIMULACOES_ODDS}")
+        return valor
+
+
+class OddsCompetidor(BaseModel):
+    competidor: CompetidorR
+    campeao: float
+    vice: float
+    terceiro: float
+    quarto: float
+
+
+class OddsResponse(BaseModel):
+    simulacoes: int
+    odds: List[OddsCompetidor]
+
+
 class ChaveamentoResponse(BaseModel):
     chaveamentos: List[ChaveSerializada]
 
@@ -76,6 +136,61 @@ class ResultadoPartidaRequest(BaseModel):
     resultado_comp_b: int
 
 
+class ResultadoLoteItem(ResultadoPartidaRequest):
+    id_partida: int
+
+
+class ResultadosLoteRequest(BaseModel):
+    resultados: conlist(ResultadoLoteItem, min_items=1)
+
+
+class ResultadoLoteItemResponse(BaseModel):
+    id_partida: int
+    status_code: int
+    message: str
+
+
+class ResultadosLoteResponse(BaseModel):
+    resultados: List[ResultadoLoteItemResponse]
+
+
+class SorteioLoteRequest(BaseModel):
+    ids: conlist(int, min_items=1, max_items=1000)
+    # Cada worker usa uma conexão do pool
+    workers: conint(ge=1, le=16) = 4
+
+
+class SorteioLoteItemResponse(BaseModel):
+    id_torneio: int
+    status_code: int
+    message: str
+    segundos: float
+
+
+class SorteioLoteResponse(BaseModel):
+    resultados: List[SorteioLoteItemResponse]
+    segundos: float
+
+
+class JogadorRequest(BaseModel):
+    nome: str
+
+
+class FiltroRanking(BaseModel):
+    limit: conint(ge=1, le=1000) = 100
+
+
+class JogadorRanking(BaseModel):
+    jogador_id: int
+    nome: str
+    rating: float
+    partidas: int
+
+
+class RankingResponse(BaseModel):
+    ranking: List[JogadorRanking]
+
+
 class ResultadoCreate(BaseModel):
     resultado_comp_a: int
     resultado_comp_b: int
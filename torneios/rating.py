@@ -0,0 +1,53 @@
+PONTOS_INICIAIS = 1500.0
+FATOR_K = 32.0
+ESCALA = 400.0
+
+
+def esperado(pontos_a, pontos_b):
+    """Chance de ``a`` vencer ``b`` pelo Elo; escalares ou arrays"""
+    return 1 / (1 + 10 ** ((pontos_b - pontos_a) / ESCALA))
+
+
+def variacao(pontos_a, pontos_b, a_venceu):
+    """Pontos que ``a`` ganha (e ``b`` perde) na partida, pelo Elo"""
+    return FATOR_K * (a_venceu - esperado(pontos_a, pontos_b))
+
+
+def niveis(jogador_a, jogador_b, qtd_jogadores):
+    """Nível de cada partida: uma depois de todas as anteriores dos dois jogadores"""
+    import numpy as np
+
+    ultimo = [0] * qtd_jogadores
+    resultado = np.empty(len(jogador_a), dtype=np.int64)
+    for indice, (a, b) in enumerate(zip(jogador_a.tolist(), jogador_b.tolist())):
+        nivel = max(ultimo[a], ultimo[b]) + 1
+        ultimo[a] = ultimo[b] = nivel
+        resultado[indice] = nivel
+    return resultado
+
+
+def reconstruir(jogador_a, jogador_b, a_venceu, qtd_jogadores):
+    """Pontos e partidas de cada jogador refazendo o histórico do zero"""
+    import numpy as np
+
+    jogador_a = np.asarray(jogador_a, dtype=np.int64)
+    jogador_b = np.asarray(jogador_b, dtype=np.int64)
+    a_venceu = np.asarray(a_venceu, dtype=np.float64)
+    pontos = np.full(qtd_jogadores, PONTOS_INICIAIS)
+    partidas = np.bincount(
+        np.concatenate([jogador_a, jogador_b]), minlength=qtd_jogadores
+    )
+    if not len(jogador_a):
+        return pontos, partidas
+
+    nivel = niveis(jogador_a, jogador_b, qtd_jogadores)
+    ordem = np.argsort(nivel, kind="stable")
+    inicios = np.flatnonzero(np.diff(nivel[ordem])) + 1
+    for partidas_nivel in np.split(ordem, inicios):
+        a = jogador_a[partidas_nivel]
+        b = jogador_b[partidas_nivel]
+        delta = variacao(pontos[a], pontos[b], a_venceu[partidas_nivel])
+        # Sem jogador repetido no nível: a atribuição indexada não perde soma
+        pontos[a] += delta
+        pontos[b] -= delta
+    return pontos, partidas
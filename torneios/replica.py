@@ -0,0 +1,85 @@
+"""Leituras dos GET numa réplica do banco (``REPLICA_DATABASE_URI``)"""
+import functools
+import time
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+BIND = "replica"
+COOKIE = "leitura_primaria_ate"
+METODOS_LEITURA = {"GET", "HEAD"}
+
+
+class SessaoRoteada(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("destino") == BIND:
+            if (
+                self._flushing
+                or clause is None
+                or clause.is_dml
+                or getattr(clause, "_for_update_arg", None) is not None
+            ):
+                self.info["destino"] = "primario"
+            else:
+                return current_app.extensions[BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _pode_usar_replica():
+    if not has_request_context() or request.method not in METODOS_LEITURA:
+        return False
+    if BIND not in current_app.extensions:
+        return False
+    try:
+        leitura_primaria_ate = float(request.cookies.get(COOKIE, 0))
+    except ValueError:
+        leitura_primaria_ate = 0
+    return leitura_primaria_ate <= time.time()
+
+
+def leitura_replica(funcao):
+    """Marca um método só de leitura: num GET, a sessão passa a ler da réplica"""
+
+    @functools.wraps(funcao)
+    def roteada(*args, **kwargs):
+        sessao = current_app.extensions["sqlalchemy"].session
+        if "destino" not in sessao.info and _pode_usar_replica():
+            sessao.info["destino"] = BIND
+        return funcao(*args, **kwargs)
+
+    return roteada
+
+
+def usar_primario():
+    """Fixa a sessão no primário até o fim da requisição, antes de uma escrita"""
+    if BIND in current_app.extensions:
+        current_app.extensions["sqlalchemy"].session.info["destino"] = "primario"
+
+
+def _marcar_escrita(resposta):
+    if request.method not in METODOS_LEITURA and resposta.status_code < 400:
+        janela = current_app.config["REPLICA_JANELA_S"]
+        resposta.set_cookie(
+            COOKIE, f"{time.time() + janela:.3f}", max_age=janela, httponly=True
+        )
+    return resposta
+
+
+def _esquecer_destino(exc):
+    # A sessão é do contexto da aplicação, que pode durar mais que a requisição
+    sessoes = current_app.extensions["sqlalchemy"].session
+    if sessoes.registry.has():
+        sessoes.info.pop("destino", None)
+
+
+def init_app(app):
+    uri = app.config["REPLICA_DATABASE_URI"]
+    if not uri:
+        return
+    from . import banco
+
+    # Engine própria, fora dos binds do Flask-SQLAlchemy: nenhum modelo é da
+    # réplica, ela só recebe as consultas roteadas pela sessão
+    app.extensions[BIND] = banco.criar_engine(app.config, uri)
+    app.after_request(_marcar_escrita)
+    app.teardown_request(_esquecer_destino)
@@ -1,14 +1,49 @@
-import math
-import random
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain
+from operator import itemgetter
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, case, func, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.exc import StaleDataError
 
 from . import db  # from __init__.py
-from . import models_pydantic
-from .models import Chave, Torneio, Competidor
+from . import chaveamento, models_pydantic, rating
+from .eventos import registrar as registrar_evento
+from .metricas import RESULTADOS, SORTEIOS, cronometrar_servico
+from .replica import leitura_replica, usar_primario
+from .models import (
+    Chave,
+    Competidor,
+    Jogador,
+    Rating,
+    TermoTorneio,
+    Torneio,
+    normalizar_nome,
+    termos_do_nome,
+)
 
 CHAVEAMENTO = {16: "OITAVAS", 8: "QUARTAS", 4: "SEMI-FINAL", 2: "FINAL"}
 
 
+def _executar_em_massa(instrucao, linhas):
+    # executemany direto no driver: para dezenas de milhares de linhas o
+    # processamento de parâmetros por linha do SQLAlchemy domina o tempo
+    conexao = db.session.connection()
+    compilado = instrucao.compile(dialect=conexao.dialect, column_keys=list(linhas[0]))
+    if compilado.positional:
+        parametros = list(map(itemgetter(*compilado.positiontup), linhas))
+    else:
+        parametros = linhas
+    conexao.exec_driver_sql(compilado.string, parametros)
+
+
+@cronometrar_servico
 class TorneioService:
     @staticmethod
     def criar_torneio(torneio: models_pydantic.Torneio) -> str:
@@ -21,29 +56,77 @@ class TorneioService:
             raise CreateError from exc
 
     @staticmethod
+    @leitura_replica
     def buscar_torneio(filtros):
         query = Torneio.query
         if filtros.id:
-            if query.filter(Torneio.id == filtros.id).count():
-                return query.filter(Torneio.id == filtros.id).all()
-            else:
+            result = query.filter(Torneio.id == filtros.id).all()
+            if not result:
                 raise TorneioNotFoundError
-        if filtros.nome_torneio:
-            query = query.filter(
-                Torneio.nome_torneio.ilike(f"%{filtros.nome_torneio}%")
+            return result
+        termo = normalizar_nome(filtros.nome_torneio or "")
+        if termo:
+            query = query.filter(TorneioService.filtro_nome(termo, filtros.busca))
+        if filtros.after_id:
+            query = query.filter(Torneio.id > filtros.after_id)
+        return query.order_by(Torneio.id).limit(filtros.limit).all()
+
+    @staticmethod
+    def filtro_nome(termo, busca):
+        if busca == "prefixo":
+            # Cada palavra buscada começa alguma palavra do nome. O intervalo
+            # [palavra, sucessor) usa a chave primária de torneio_termo; as
+            # palavras normalizadas só têm ASCII
+            return and_(
+                *(
+                    Torneio.id.in_(
+                        select(TermoTorneio.torneio_id).where(
+                            TermoTorneio.termo >= palavra,
+                            TermoTorneio.termo
+                            < palavra[:-1] + chr(ord(palavra[-1]) + 1),
+                        )
+                    )
+                    for palavra in termos_do_nome(termo)
+                )
             )
-        result = query.all()
-        if not result:
-            return []
-        return result
+        return Torneio.nome_normalizado.like(f"%{termo}%")
+
+    @staticmethod
+    def incrementar_versao_chaveamento(id_torneio):
+        db.session.execute(
+            update(Torneio)
+            .where(Torneio.id == id_torneio)
+            .values(versao_chaveamento=Torneio.versao_chaveamento + 1)
+        )
 
     @staticmethod
-    def atualizar_qtd_competidores(torneio):
-        torneio.qtd_competidores = len(torneio.competidores)
-        db.session.add(torneio)
+    def incrementar_qtd_competidores(id_torneio, quantidade=1):
+        # Incremento no próprio UPDATE: cadastros simultâneos não se sobrescrevem
+        db.session.execute(
+            update(Torneio)
+            .where(Torneio.id == id_torneio)
+            .values(qtd_competidores=Torneio.qtd_competidores + quantidade)
+        )
+
+    @staticmethod
+    def reconciliar_qtd_competidores():
+        """Recalcula o contador de todos os torneios; retorna quantos estavam errados"""
+        contagem = (
+            select(func.count(Competidor.id))
+            .where(Competidor.torneio_id == Torneio.id)
+            .scalar_subquery()
+        )
+        corrigidos = db.session.execute(
+            update(Torneio)
+            .where(Torneio.qtd_competidores.is_distinct_from(contagem))
+            .values(qtd_competidores=contagem)
+            .execution_options(synchronize_session=False)
+        ).rowcount
         db.session.commit()
+        return corrigidos
 
 
+@cronometrar_servico
 class CompetidorService:
     @staticmethod
     def cadastrar_competidor(
@@ -55,200 +138,362 @@ class CompetidorService:
             raise TorneioNotFoundError
         if torneio.is_chaveado:
             raise TorneioClosedError
+        if competidor.jogador_id and not db.session.get(Jogador, competidor.jogador_id):
+            raise JogadorNotFoundError
         try:
             nova_equipe = Competidor(
-                nome_competidor=competidor.nome_competidor, torneio_id=id_torneio
+                nome_competidor=competidor.nome_competidor,
+                torneio_id=id_torneio,
+                jogador_id=competidor.jogador_id,
             )
             db.session.add(nova_equipe)
+            TorneioService.incrementar_qtd_competidores(id_torneio)
+            # O id já veio no flush do UPDATE; lido depois do commit
+            # recarregaria o competidor
+            id_competidor = nova_equipe.id
             db.session.commit()
 
         except SQLAlchemyError as exc:
             db.session.rollback()
             raise CreateError from exc
 
-        TorneioService.atualizar_qtd_competidores(torneio)
-        return nova_equipe.id
+        return id_competidor
+
+    @staticmethod
+    def cadastrar_competidores_em_lote(
+        competidores: models_pydantic.CompetidoresLoteRequest, id_torneio: int
+    ) -> list:
+        torneio = db.session.get(Torneio, id_torneio)
+
+        if not torneio:
+            raise TorneioNotFoundError
+        if torneio.is_chaveado:
+            raise TorneioClosedError
+        try:
+            # Um único INSERT multi-linha (Core, sem o custo do bulk do ORM);
+            # os ids voltam na ordem dos nomes enviados
+            tabela = Competidor.__table__
+            ids = (
+                db.session.execute(
+                    insert(tabela).returning(tabela.c.id, sort_by_parameter_order=True),
+                    [
+                        {"nome_competidor": nome, "torneio_id": id_torneio}
+                        for nome in competidores.nomes
+                    ],
+                )
+                .scalars()
+                .all()
+            )
+            TorneioService.incrementar_qtd_competidores(id_torneio, len(ids))
+            db.session.commit()
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            raise CreateError from exc
+        return ids
 
     @staticmethod
-    def buscar_competidores(torneio_id):
+    @leitura_replica
+    def buscar_competidores(torneio_id, limit=None, after_id=None):
         filtro = models_pydantic.FiltroTorneio(id=torneio_id)
         TorneioService.buscar_torneio(filtro)
         competidores = Competidor.query.filter_by(torneio_id=torneio_id)
         if not competidores:
             raise CompetidoresNotFoundError
+        if after_id:
+            competidores = competidores.filter(Competidor.id > after_id)
+        competidores = competidores.order_by(Competidor.id)
+        if limit:
+            competidores = competidores.limit(limit)
         return competidores
 
+    @staticmethod
+    @leitura_replica
+    def iterar_competidores(torneio_id, tamanho_lote=1000):
+        filtro = models_pydantic.FiltroTorneio(id=torneio_id)
+        TorneioService.buscar_torneio(filtro)
+        return CompetidorService._lotes_competidores(torneio_id, tamanho_lote)
 
+    @staticmethod
+    def _lotes_competidores(torneio_id, tamanho_lote):
+        # Cada lote é uma consulta curta pelo índice (torneio_id, id): nenhum
+        # cursor fica aberto entre lotes e só colunas são carregadas, sem
+        # acumular objetos na sessão
+        after_id = 0
+        while True:
+            lote = db.session.execute(
+                select(Competidor.id, Competidor.nome_competidor)
+                .where(Competidor.torneio_id == torneio_id, Competidor.id > after_id)
+                .order_by(Competidor.id)
+                .limit(tamanho_lote)
+            ).all()
+            if not lote:
+                return
+            yield lote
+            after_id = lote[-1].id
+
+
+@cronometrar_servico
 class ChaveamentoService:
     @staticmethod
+    @leitura_replica
     def get_chavemaneto_sorteado(id_torneio):  # se é get, pega só um
         return Chave.query.filter_by(torneio_id=id_torneio).all()
 
     @staticmethod
-    def busca_chaveamento(id_torneio: int) -> int:
-        torneio = Torneio.query.get(id_torneio)
-        if torneio is None:
-            raise TorneioNotFoundError
-        if not torneio.is_chaveado:
-            (
-                n_primeira_rodada,
-                lista_geral_primeira_rodada,
-                qtd_comps_ga,
-                qtd_comps_gb,
-            ) = ChaveamentoService.sorteia_chaveamento_primeira_fase(torneio)
-            ChaveamentoService.criar_rodadas_subsequentes(
-                n_primeira_rodada, len(lista_geral_primeira_rodada), torneio
+    @leitura_replica
+    def buscar_chaveamento_completo(id_torneio):
+        # Uma única query: as chaves e os competidores referenciados vêm juntos
+        # via LEFT JOIN, sem lazy load por chave na serialização
+        return (
+            Chave.query.options(
+                joinedload(Chave.competidor_a),
+                joinedload(Chave.competidor_b),
+                joinedload(Chave.vencedor),
             )
-            ChaveamentoService.marca_rodadas_bye(
-                n_primeira_rodada, qtd_comps_ga, qtd_comps_gb, torneio.id
+            .filter_by(torneio_id=id_torneio)
+            .order_by(Chave.id)
+            .all()
+        )
+
+    @staticmethod
+    @leitura_replica
+    def iterar_chaveamento(id_torneio, tamanho_lote=1000):
+        """Linhas do chaveamento com os nomes dos competidores, em lotes"""
+        competidor_a, competidor_b = aliased(Competidor), aliased(Competidor)
+        consulta = (
+            select(
+                Chave.id,
+                Chave.rodada,
+                Chave.grupo,
+                Chave.bye,
+                Chave.resultado_comp_a,
+                Chave.resultado_comp_b,
+                Chave.vencedor_id,
+                competidor_a.id.label("competidor_a_id"),
+                competidor_a.nome_competidor.label("competidor_a_nome"),
+                competidor_b.id.label("competidor_b_id"),
+                competidor_b.nome_competidor.label("competidor_b_nome"),
             )
-            torneio.is_chaveado = True
-            db.session.add(torneio)
-            db.session.commit()
-        ResultadoService.classifica_proxima_rodada_bybye(torneio.id)
-        lista_chaveamentos_torneio = ChaveamentoService.get_chavemaneto_sorteado(
+            .outerjoin(competidor_a, Chave.competidor_a_id == competidor_a.id)
+            .outerjoin(competidor_b, Chave.competidor_b_id == competidor_b.id)
+            .where(Chave.torneio_id == id_torneio)
+            .order_by(Chave.id)
+            .execution_options(yield_per=tamanho_lote)
+        )
+        yield from db.session.execute(consulta).partitions()
+
+    @staticmethod
+    def busca_chaveamento(id_torneio: int) -> int:
+        ChaveamentoService.preparar_chaveamento(id_torneio)
+        lista_chaveamentos_torneio = ChaveamentoService.buscar_chaveamento_completo(
             id_torneio
         )
         return lista_chaveamentos_torneio
 
     @staticmethod
-    def marca_rodadas_bye(n_primeira_rodada, qtd_comps_ga, qtd_comps_gb, torneio_id):
-        count = 0
-        rodada_atual = n_primeira_rodada - 1
-        while rodada_atual > 1:
-            qtd_comps_ga = math.ceil(qtd_comps_ga / 2)
-            qtd_comps_gb = math.ceil(qtd_comps_gb / 2)
-            if qtd_comps_ga % 2 != 0:
-                ChaveamentoService.sorteia_rodada_como_bye(
-                    torneio_id, rodada_atual, "a"
-                )
-                count += 1
-            if qtd_comps_gb % 2 != 0:
-                ChaveamentoService.sorteia_rodada_como_bye(
-                    torneio_id, rodada_atual, "b"
-                )
-                count += 1
-            rodada_atual -= 1
-
-        return count
+    def preparar_chaveamento(id_torneio: int) -> int:
+        """Sorteia o torneio se preciso e devolve a versão atual do chaveamento"""
+        if not ChaveamentoService.torneio_chaveado(id_torneio):
+            # O sorteio escreve: ele e o resto da requisição vão para o primário
+            usar_primario()
+            ChaveamentoService.sortear_chaveamento(id_torneio)
+        return ChaveamentoService.versao_chaveamento(id_torneio)
 
     @staticmethod
-    def sorteia_rodada_como_bye(torneio_id, n_rodada, grupo):
-        filtros = models_pydantic.FiltroChave(
-            torneio_id=torneio_id, rodada=n_rodada, grupo=grupo
-        )
-        rodadas = ChaveamentoService.filtra_chaves_rodada(filtros)
-        random.shuffle(rodadas)
-        rodada_bye = rodadas[0]
-        rodada_bye.bye = True
-        db.session.commit()
+    @leitura_replica
+    def torneio_chaveado(id_torneio):
+        torneio = Torneio.query.get(id_torneio)
+        if torneio is None:
+            raise TorneioNotFoundError
+        return torneio.is_chaveado
 
     @staticmethod
-    def sorteia_chaveamento_primeira_fase(torneio):
-        competidores_torneio = Competidor.query.filter(
-            Competidor.torneio_id == torneio.id
-        ).all()
-        meio = int(len(competidores_torneio) / 2)
-        grupo_a = competidores_torneio[:meio]
-        grupo_b = competidores_torneio[meio:]
-        numero_primeira_rodada = ChaveamentoService.rodada_por_qtd_competidores(
-            len(competidores_torneio)
-        )
-        qtd_comps_ga = len(grupo_a)
-        qtd_comps_gb = len(grupo_b)
-        if qtd_comps_ga % 2 != 0:
-            grupo_a.append(None)
-        if qtd_comps_gb % 2 != 0:
-            grupo_b.append(None)
-        duplas_ga = ChaveamentoService.sortea_duplas_grupo(grupo_a)
-        duplas_gb = ChaveamentoService.sortea_duplas_grupo(grupo_b)
-        lista_grupo_a = ChaveamentoService.inserir_duplas_primeira_rodada(
-            duplas=duplas_ga,
-            torneio_id=torneio.id,
-            rodada=numero_primeira_rodada,
-            grupo="a",
-        )
-        lista_grupo_b = ChaveamentoService.inserir_duplas_primeira_rodada(
-            duplas=duplas_gb,
-            torneio_id=torneio.id,
-            rodada=numero_primeira_rodada,
-            grupo="b",
-        )
-        lista_geral_primeira_rodada = lista_grupo_a + lista_grupo_b
-        return (
-            numero_primeira_rodada,
-            lista_geral_primeira_rodada,
-            qtd_comps_ga,
-            qtd_comps_gb,
-        )
+    def versao_chaveamento(id_torneio):
+        return db.session.execute(
+            select(Torneio.versao_chaveamento).where(Torneio.id == id_torneio)
+        ).scalar_one()
 
     @staticmethod
-    def rodada_por_qtd_competidores(total_competidores):
-        return math.ceil(math.log2(total_competidores))
+    @leitura_replica
+    def estado_odds(id_torneio, simulacoes):
+        """Simulações dentro de ``ODDS_MAX_CELULAS`` e marca dos ratings"""
+        inscritos = db.session.execute(
+            select(Competidor.jogador_id, Rating.pontos)
+            .outerjoin(Rating, Rating.jogador_id == Competidor.jogador_id)
+            .where(Competidor.torneio_id == id_torneio)
+            .order_by(Competidor.id)
+        ).all()
+        # Uma chave por inscrito, aproximadamente
+        limite = current_app.config["ODDS_MAX_CELULAS"] // max(len(inscritos), 1)
+        # Resultados de outros torneios mudam os ratings sem mudar a versão
+        # deste chaveamento
+        marca = hashlib.sha1(repr([tuple(linha) for linha in inscritos]).encode())
+        return max(1, min(simulacoes, limite)), marca.hexdigest()[:16]
 
     @staticmethod
-    def sortea_duplas_grupo(grupo):
-        duplas = []
-        random.shuffle(grupo)
-        for i in range(0, len(grupo), 2):
-            dupla = [grupo[i], grupo[i + 1]]
-            duplas.append(dupla)
+    def calcular_odds(id_torneio, simulacoes, semente=None):
+        """Chance de cada competidor terminar em 1º, 2º, 3º e 4º lugar.
+        Retorna ``(competidores, probabilidades)``"""
+        # NumPy só é importado por quem simula ou reconstrói ratings, não na
+        # partida dos workers
+        from . import simulacao
 
-        return duplas
+        chaves = [
+            linha._asdict()
+            for linha in db.session.execute(
+                select(
+                    Chave.id,
+                    Chave.rodada,
+                    Chave.competidor_a_id,
+                    Chave.competidor_b_id,
+                    Chave.vencedor_id,
+                    Chave.proxima_chave_id,
+                    Chave.vaga_proxima_chave,
+                    Chave.chave_perdedor_id,
+                    Chave.vaga_chave_perdedor,
+                ).where(Chave.torneio_id == id_torneio)
+            )
+        ]
+        # Sorteios anteriores aos ponteiros não dizem para onde vai o vencedor
+        if any(
+            chave["proxima_chave_id"] is None
+            and chave["rodada"] > chaveamento.RODADA_FINAL
+            for chave in chaves
+        ):
+            raise ChaveamentoSemPonteirosError
+        competidores = db.session.execute(
+            select(Competidor.id, Competidor.nome_competidor, Rating.pontos)
+            .outerjoin(Rating, Rating.jogador_id == Competidor.jogador_id)
+            .where(Competidor.torneio_id == id_torneio)
+            .order_by(Competidor.id)
+        ).all()
+        pontos = [
+            rating.PONTOS_INICIAIS if competidor.pontos is None else competidor.pontos
+            for competidor in competidores
+        ]
+        probabilidades = simulacao.simular(
+            chaves,
+            [competidor.id for competidor in competidores],
+            simulacao.elo(pontos),
+            simulacoes,
+            semente,
+        )
+        return competidores, probabilidades
 
     @staticmethod
-    def inserir_duplas_primeira_rodada(duplas, torneio_id, rodada, grupo):
-        lista_primeira_partida = []
-        for dupla in duplas:
-            chave_obj = Chave(
-                torneio_id=torneio_id,
-                rodada=rodada,
-                grupo=grupo,
+    def sortear_chaveamento(id_torneio):
+        ids_competidores = (
+            db.session.connection()
+            .execute(
+                select(Competidor.id)
+                .where(Competidor.torneio_id == id_torneio)
+                .order_by(Competidor.id)
             )
-            if dupla[0]:
-                chave_obj.competidor_a_id = dupla[0].id
-            if dupla[1]:
-                chave_obj.competidor_b_id = dupla[1].id
-            if dupla[0] is None or dupla[1] is None:
-                chave_obj.vencedor = db.session.merge(dupla[0] or dupla[1])
-                chave_obj.bye = True
-            db.session.add(chave_obj)
-            lista_primeira_partida.append(chave_obj)
-        db.session.commit()
-        return lista_primeira_partida
-
-    @staticmethod
-    def criar_rodadas_subsequentes(rodada, total_disputas_primeira_fase, torneio):
-        total_disputas_ultimas_rodada = total_disputas_primeira_fase
-        rodada_atual = rodada - 1
-        lista_chaves_criadas = []
-        while rodada_atual > 1:
-            duplas_por_grupo = total_disputas_ultimas_rodada / 4
-            vagas_duplas_por_grupo = math.ceil(duplas_por_grupo)
-            chaveamento_atual = []
-            for _ in range(vagas_duplas_por_grupo):
-                for grupo in ["a", "b"]:
-                    nova_chave = Chave(
-                        torneio_id=torneio.id, rodada=rodada_atual, grupo=grupo
-                    )
-                    db.session.add(nova_chave)
-                    chaveamento_atual.append(nova_chave)
-            lista_chaves_criadas.append(chaveamento_atual)
+            .scalars()
+            .all()
+        )
+        if len(ids_competidores) < 2:
+            raise CompetidoresInsuficientesError
+        linhas, ligacoes = chaveamento.montar_chaveamento(id_torneio, ids_competidores)
+        try:
+            # Marca o torneio como chaveado na mesma transação do insert; se outra
+            # requisição sorteou antes, nada é gravado
+            reivindicado = db.session.execute(
+                update(Torneio)
+                .where(Torneio.id == id_torneio, Torneio.is_chaveado.is_(False))
+                .values(
+                    is_chaveado=True,
+                    versao_chaveamento=Torneio.versao_chaveamento + 1,
+                )
+            ).rowcount
+            if not reivindicado:
+                db.session.rollback()
+                return False
+            _executar_em_massa(insert(Chave.__table__), linhas)
+            # Numa única transação os ids crescem na ordem do insert
+            ids_chaves = (
+                db.session.connection()
+                .execute(
+                    select(Chave.id)
+                    .where(Chave.torneio_id == id_torneio)
+                    .order_by(Chave.id)
+                )
+                .scalars()
+                .all()
+            )
+            _executar_em_massa(
+                update(Chave.__table__).where(Chave.id == bindparam("id_chave")),
+                [
+                    {
+                        "proxima_chave_id": ids_chaves[proxima],
+                        "vaga_proxima_chave": vaga,
+                        "chave_perdedor_id": (
+                            ids_chaves[perdedor] if perdedor is not None else None
+                        ),
+                        "vaga_chave_perdedor": vaga_perdedor,
+                        "id_chave": ids_chaves[origem],
+                    }
+                    for origem, proxima, vaga, perdedor, vaga_perdedor in ligacoes
+                ],
+            )
+            registrar_evento(id_torneio, "sorteio", chaves=len(ids_chaves))
             db.session.commit()
-            rodada_atual -= 1
-            total_disputas_ultimas_rodada = vagas_duplas_por_grupo * 2
+            SORTEIOS.incrementar()
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            raise CreateError from exc
+        return True
 
-        chave_final = Chave(torneio_id=torneio.id, rodada=rodada_atual, grupo="f")
-        lista_chaves_criadas.append(chave_final)
+    @staticmethod
+    def sortear_se_pendente(id_torneio):
+        """Sorteia o torneio se ainda não foi; retorna se o sorteio foi feito aqui"""
+        torneio = db.session.get(Torneio, id_torneio)
+        if torneio is None:
+            raise TorneioNotFoundError
+        if torneio.is_chaveado:
+            return False
+        return ChaveamentoService.sortear_chaveamento(id_torneio)
 
-        chave_terceiro = Chave(torneio_id=torneio.id, rodada=0, grupo="f")
-        lista_chaves_criadas.append(chave_terceiro)
+    @staticmethod
+    def sortear_em_paralelo(ids_torneios, workers=4):
+        """Sorteia vários torneios ao mesmo tempo, antes do primeiro GET /match.
+        Retorna ``(id_torneio, sorteado, segundos, erro)`` na ordem recebida"""
+        app = current_app._get_current_object()
 
-        db.session.add(chave_final)
-        db.session.add(chave_terceiro)
-        db.session.commit()
+        def sortear(id_torneio):
+            inicio = time.perf_counter()
+            with app.app_context():
+                try:
+                    sorteado = ChaveamentoService.sortear_se_pendente(id_torneio)
+                    erro = None
+                except Exception as exc:
+                    # Erros sem mensagem própria (banco, bug) ficam no log
+                    if not hasattr(exc, "message"):
+                        app.logger.exception(
+                            "Falha no sorteio do torneio %s", id_torneio
+                        )
+                    sorteado, erro = False, exc
+            return id_torneio, sorteado, time.perf_counter() - inicio, erro
 
-        return lista_chaves_criadas
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(sortear, dict.fromkeys(ids_torneios)))
+
+    @staticmethod
+    def torneios_pendentes_sorteio():
+        """Ids dos torneios ainda não sorteados e com competidores suficientes"""
+        return (
+            db.session.execute(
+                select(Torneio.id)
+                .where(Torneio.is_chaveado.is_not(True), Torneio.qtd_competidores >= 2)
+                .order_by(Torneio.id)
+            )
+            .scalars()
+            .all()
+        )
+
+    @staticmethod
+    def rodada_por_qtd_competidores(total_competidores):
+        return chaveamento.rodada_por_qtd_competidores(total_competidores)
 
     @staticmethod
     def filtra_chaves_rodada(filtros):
@@ -267,6 +512,7 @@ class ChaveamentoService:
         return query.all()
 
 
+@cronometrar_servico
 class ResultadoService:
     @staticmethod
     def cadastrar_resultado(
@@ -274,12 +520,103 @@ class ResultadoService:
         id_torneio: int,
         id_partida: int,
     ) -> int:
-        chaveamento_obj = Chave.query.get(id_partida)
+        # Leitura, validação, gravação e avanço numa única transação. No
+        # PostgreSQL a chave fica travada (SELECT ... FOR UPDATE) até o commit;
+        # nos demais bancos a coluna versao da chave barra a segunda gravação
+        try:
+            chaveamento_obj = (
+                Chave.query.filter_by(id=id_partida).with_for_update().one_or_none()
+            )
+            ResultadoService.gravar_resultado(resultado, id_torneio, chaveamento_obj)
+            # Só depois do avanço: quem ler a nova versão já vê o chaveamento
+            # completo
+            TorneioService.incrementar_versao_chaveamento(id_torneio)
+            db.session.commit()
+            RESULTADOS.incrementar()
+        except StaleDataError as exc:
+            db.session.rollback()
+            raise BracketingWithResultError from exc
+        except Exception:
+            db.session.rollback()
+            raise
+        return chaveamento_obj
+
+    @staticmethod
+    def cadastrar_resultados_em_lote(
+        resultados: models_pydantic.ResultadosLoteRequest, id_torneio: int
+    ):
+        """Grava vários resultados numa única transação.
+        Retorna ``(id_partida, erro)`` na ordem recebida"""
+        try:
+            if not db.session.get(Torneio, id_torneio):
+                raise TorneioNotFoundError
+            ids = {item.id_partida for item in resultados.resultados}
+            chaves = {
+                chave.id: chave
+                for chave in Chave.query.filter(Chave.id.in_(ids))
+                .order_by(Chave.id)
+                .with_for_update()
+            }
+            # As chaves de destino entram no mesmo dicionário: o avanço as acha
+            # no mapa de identidade da sessão em vez de buscá-las uma a uma
+            ids_destino = {
+                chave.proxima_chave_id
+                for chave in chaves.values()
+                if chave.proxima_chave_id
+            } - chaves.keys()
+            chaves.update(
+                (chave.id, chave)
+                for chave in Chave.query.filter(Chave.id.in_(ids_destino))
+                .order_by(Chave.id)
+                .with_for_update()
+            )
+
+            def rodada(item):
+                chave = chaves.get(item.id_partida)
+                return -chave.rodada if chave else 0
+
+            erros = {}
+            for item in sorted(resultados.resultados, key=rodada):
+                try:
+                    # As validações vêm antes de qualquer escrita: um item
+                    # recusado não deixa nada na transação
+                    ResultadoService.gravar_resultado(
+                        item, id_torneio, chaves.get(item.id_partida)
+                    )
+                except (
+                    ChaveRaiseError,
+                    BracketingWithResultError,
+                    ChaveamentoNotFoundError,
+                    ChaveamentoNotAvailableError,
+                ) as exc:
+                    erros[id(item)] = exc
+            gravados = len(resultados.resultados) - len(erros)
+            if gravados:
+                TorneioService.incrementar_versao_chaveamento(id_torneio)
+            db.session.commit()
+            RESULTADOS.incrementar(gravados)
+        except StaleDataError as exc:
+            db.session.rollback()
+            raise BracketingWithResultError from exc
+        except Exception:
+            db.session.rollback()
+            raise
+        return [
+            (item.id_partida, erros.get(id(item))) for item in resultados.resultados
+        ]
+
+    @staticmethod
+    def gravar_resultado(
+        resultado: models_pydantic.ResultadoPartidaRequest,
+        id_torneio: int,
+        chaveamento_obj: Chave,
+    ) -> Chave:
+        """Grava o resultado na chave e avança o chaveamento, sem commit"""
         if not chaveamento_obj:
             raise ChaveamentoNotFoundError
         if not chaveamento_obj.torneio_id == id_torneio:
             raise ChaveRaiseError
-        if chaveamento_obj.vencedor:
+        if chaveamento_obj.vencedor_id:
             raise BracketingWithResultError
         if not chaveamento_obj.competidor_a_id or not chaveamento_obj.competidor_b_id:
             raise ChaveamentoNotAvailableError
@@ -296,54 +633,175 @@ class ResultadoService:
 
         chaveamento_obj.resultado_comp_a = resultado.resultado_comp_a
         chaveamento_obj.resultado_comp_b = resultado.resultado_comp_b
+        # No flush vira compare-and-set: UPDATE ... WHERE versao = <versão lida>
         chaveamento_obj.vencedor_id = vencedor_id
-        db.session.commit()
+        chaveamento_obj.registrado_em = datetime.now(timezone.utc)
+        RatingService.registrar_partida(vencedor_id, perdedor_id)
+        registrar_evento(
+            id_torneio,
+            "resultado",
+            chave=chaveamento_obj.id,
+            resultado_a=resultado.resultado_comp_a,
+            resultado_b=resultado.resultado_comp_b,
+            vencedor_id=vencedor_id,
+        )
+        if chaveamento_obj.rodada in (0, 1):
+            # Final ou disputa de terceiro: o resultado já define as colocações
+            melhor = 1 if chaveamento_obj.rodada == 1 else 3
+            registrar_evento(
+                id_torneio,
+                "colocacao",
+                chave=chaveamento_obj.id,
+                colocacoes=[
+                    {"posicao": melhor, "competidor_id": vencedor_id},
+                    {"posicao": melhor + 1, "competidor_id": perdedor_id},
+                ],
+            )
         ResultadoService.classificar_proxima_rodada(
             vencedor_id, perdedor_id, chaveamento_obj, id_torneio
         )
+        if (
+            chaveamento_obj.proxima_chave_id is None
+            and chaveamento_obj.rodada > chaveamento.RODADA_FINAL
+        ):
+            # Chaveamentos sorteados antes dos ponteiros: byes avançam aqui, e
+            # não mais a cada leitura do chaveamento. A final e a disputa de
+            # terceiro não têm ponteiro em nenhum chaveamento e não alimentam byes
+            ResultadoService.avancar_byes_sem_ponteiros(id_torneio)
         return chaveamento_obj
 
     @staticmethod
     def classificar_proxima_rodada(
         vencedor_id, perdedor_id, chaveamento_obj, id_torneio
     ):
+        if chaveamento_obj.proxima_chave_id:
+            return ResultadoService.classificar_por_ponteiros(
+                vencedor_id, perdedor_id, chaveamento_obj
+            )
         torneio = Torneio.query.get(id_torneio)
         proxima_rodada = chaveamento_obj.rodada - 1
         if proxima_rodada == 1:
             return ResultadoService.classificao_das_finais(
                 chaveamento_obj, vencedor_id, perdedor_id, torneio
             )
-        if proxima_rodada == 0:
+        if proxima_rodada <= 0:
             return
 
+        # Sem ponteiros a vaga é a primeira livre; a trava impede que duas
+        # chaves irmãs escolham a mesma
         proxima_chave = (
-            Chave.query.filter_by(rodada=proxima_rodada, grupo=chaveamento_obj.grupo)
+            Chave.query.filter_by(
+                torneio_id=id_torneio,
+                rodada=proxima_rodada,
+                grupo=chaveamento_obj.grupo,
+            )
             .filter(
                 (Chave.competidor_a_id.is_(None)) | (Chave.competidor_b_id.is_(None))
             )
+            .order_by(Chave.id)
+            .with_for_update()
             .first()
         )
-        if not proxima_chave.competidor_a_id:
-            proxima_chave.competidor_a_id = vencedor_id
-        else:
-            proxima_chave.competidor_b_id = vencedor_id
-        db.session.commit()
+        vaga = "b" if proxima_chave.competidor_a_id else "a"
+        ResultadoService.ocupar_vaga(id_torneio, proxima_chave.id, vaga, vencedor_id)
+        db.session.flush()
 
         return proxima_chave
 
+    @staticmethod
+    def classificar_por_ponteiros(vencedor_id, perdedor_id, chaveamento_obj):
+        # Vaga de destino definida no sorteio: update direto pela chave primária
+        id_torneio = chaveamento_obj.torneio_id
+        ResultadoService.ocupar_vaga(
+            id_torneio,
+            chaveamento_obj.proxima_chave_id,
+            chaveamento_obj.vaga_proxima_chave,
+            vencedor_id,
+        )
+        if chaveamento_obj.chave_perdedor_id and perdedor_id:
+            ResultadoService.ocupar_vaga(
+                id_torneio,
+                chaveamento_obj.chave_perdedor_id,
+                chaveamento_obj.vaga_chave_perdedor,
+                perdedor_id,
+            )
+        ResultadoService.resolver_byes(
+            id_torneio, chaveamento_obj.proxima_chave_id, vencedor_id
+        )
+        return chaveamento_obj.proxima_chave_id
+
+    @staticmethod
+    def resolver_byes(id_torneio, id_chave, competidor_id):
+        # O competidor caiu numa chave sem adversário: já é o vencedor dela e
+        # segue adiante, possivelmente por outros byes
+        chave = db.session.get(Chave, id_chave)
+        while chave is not None and chave.bye and not chave.classificado_bye:
+            chave.vencedor_id = competidor_id
+            chave.classificado_bye = True
+            registrar_evento(
+                id_torneio, "bye", chave=chave.id, vencedor_id=competidor_id
+            )
+            if not chave.proxima_chave_id:
+                return
+            ResultadoService.ocupar_vaga(
+                id_torneio,
+                chave.proxima_chave_id,
+                chave.vaga_proxima_chave,
+                competidor_id,
+            )
+            chave = db.session.get(Chave, chave.proxima_chave_id)
+
+    @staticmethod
+    def ocupar_vaga(id_torneio, id_chave, vaga, competidor_id):
+        coluna = f"competidor_{vaga}_id"
+        registrar_evento(
+            id_torneio,
+            "classificacao",
+            chave=id_chave,
+            vaga=vaga,
+            competidor_id=competidor_id,
+        )
+        chave = db.session.identity_map.get(identity_key(Chave, id_chave))
+        if chave is not None:
+            setattr(chave, coluna, competidor_id)
+            return
+        # Sem sincronizar a sessão: avaliar o critério em todo o mapa de
+        # identidade a cada vaga deixa o lançamento de uma rodada quadrático
+        db.session.execute(
+            update(Chave).where(Chave.id == id_chave).values({coluna: competidor_id}),
+            execution_options={"synchronize_session": False},
+        )
+
     @staticmethod
     def classifica_proxima_rodada_bybye(torneio_id):
+        if ResultadoService.avancar_byes_sem_ponteiros(torneio_id):
+            TorneioService.incrementar_versao_chaveamento(torneio_id)
+        db.session.commit()
+        return ChaveamentoService.get_chavemaneto_sorteado(torneio_id)
+
+    @staticmethod
+    def avancar_byes_sem_ponteiros(torneio_id):
+        """Avança os byes já alimentados, sem commit. Retorna se houve avanço"""
         lista_chaveamentos_torneio = ChaveamentoService.get_chavemaneto_sorteado(
             torneio_id
         )
+        houve_avanco = False
         for chave in lista_chaveamentos_torneio.copy():
             if chave.bye and chave.rodada > 1 and not chave.classificado_bye:
                 if not chave.competidor_a and not chave.competidor_b:
                     continue
+                houve_avanco = True
                 vencedor_bye = chave.competidor_a or chave.competidor_b
                 chave.vencedor = vencedor_bye
                 chave.classificado_bye = True
-                db.session.commit()
+                registrar_evento(
+                    torneio_id, "bye", chave=chave.id, vencedor_id=vencedor_bye.id
+                )
+                if chave.proxima_chave_id:
+                    ResultadoService.classificar_por_ponteiros(
+                        vencedor_bye.id, None, chave
+                    )
+                    continue
                 proxima_rodada = chave.rodada - 1
                 proxima_chave = Chave.query.filter_by(
                     rodada=proxima_rodada,
@@ -351,27 +809,35 @@ class ResultadoService:
                     bye=False,
                     torneio_id=torneio_id,
                 ).first()
-                if chave.grupo == "a":
-                    proxima_chave.competidor_a = vencedor_bye
-                else:
-                    proxima_chave.competidor_b = vencedor_bye
-                db.session.commit()
-        return lista_chaveamentos_torneio
+                ResultadoService.ocupar_vaga(
+                    torneio_id,
+                    proxima_chave.id,
+                    "a" if chave.grupo == "a" else "b",
+                    vencedor_bye.id,
+                )
+        db.session.flush()
+        return houve_avanco
 
     @classmethod
     def classificao_das_finais(cls, chaveamento_obj, vencedor_id, perdedor_id, torneio):
-        chave_final = Chave.query.filter_by(rodada=1).first()
-        disputa_terceiro = Chave.query.filter_by(rodada=0).first()
-        if chaveamento_obj.grupo == "a":
-            chave_final.competidor_a_id = vencedor_id
-            disputa_terceiro.competidor_a_id = perdedor_id
-        else:
-            chave_final.competidor_b_id = vencedor_id
-            disputa_terceiro.competidor_a_id = perdedor_id
-        db.session.commit()
+        chave_final = (
+            Chave.query.filter_by(torneio_id=torneio.id, rodada=1)
+            .with_for_update()
+            .first()
+        )
+        disputa_terceiro = (
+            Chave.query.filter_by(torneio_id=torneio.id, rodada=0)
+            .with_for_update()
+            .first()
+        )
+        vaga = "a" if chaveamento_obj.grupo == "a" else "b"
+        ResultadoService.ocupar_vaga(torneio.id, chave_final.id, vaga, vencedor_id)
+        ResultadoService.ocupar_vaga(torneio.id, disputa_terceiro.id, vaga, perdedor_id)
+        db.session.flush()
         return "Classificação das finais"
 
     @staticmethod
+    @leitura_replica
     def buscar_resultado_top(torneio_id):
         torneio = Torneio.query.get(torneio_id)
         if not torneio:
@@ -405,6 +871,163 @@ class ResultadoService:
         return dict_classificacao
 
 
+@cronometrar_servico
+class JogadorService:
+    @staticmethod
+    def criar_jogador(jogador: models_pydantic.JogadorRequest) -> int:
+        try:
+            obj = Jogador(nome=jogador.nome)
+            obj.rating = Rating(pontos=rating.PONTOS_INICIAIS, partidas=0)
+            db.session.add(obj)
+            db.session.commit()
+            return obj.id
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            raise CreateError from exc
+
+    @staticmethod
+    @leitura_replica
+    def ranking(limit):
+        return db.session.execute(
+            select(Jogador.id, Jogador.nome, Rating.pontos, Rating.partidas)
+            .join(Rating, Rating.jogador_id == Jogador.id)
+            .order_by(Rating.pontos.desc(), Jogador.id)
+            .limit(limit)
+        ).all()
+
+
+@cronometrar_servico
+class RatingService:
+    @staticmethod
+    def registrar_partida(vencedor_id, perdedor_id):
+        """Atualiza o rating dos jogadores da partida, sem commit"""
+        jogadores = dict(
+            db.session.execute(
+                select(Competidor.id, Competidor.jogador_id).where(
+                    Competidor.id.in_((vencedor_id, perdedor_id))
+                )
+            ).all()
+        )
+        vencedor, perdedor = jogadores.get(vencedor_id), jogadores.get(perdedor_id)
+        if vencedor is None or perdedor is None or vencedor == perdedor:
+            return
+        # Escreve antes de ler: o UPDATE trava a linha (no SQLite, o banco) e os
+        # pontos devolvidos já são os definitivos. Em ordem de id, duas partidas
+        # com os mesmos jogadores não se travam mutuamente
+        pontos = {}
+        for jogador_id in sorted((vencedor, perdedor)):
+            contar_partida = (
+                update(Rating)
+                .where(Rating.jogador_id == jogador_id)
+                .values(partidas=Rating.partidas + 1)
+                .returning(Rating.pontos)
+            )
+            opcoes = {"synchronize_session": False}
+            pontos[jogador_id] = db.session.execute(
+                contar_partida, execution_options=opcoes
+            ).scalar_one_or_none()
+            if pontos[jogador_id] is None:
+                # Jogador criado por fora do JogadorService, ainda sem rating
+                RatingService._criar_rating_se_ausente(jogador_id)
+                pontos[jogador_id] = db.session.execute(
+                    contar_partida, execution_options=opcoes
+                ).scalar_one()
+        delta = rating.variacao(pontos[vencedor], pontos[perdedor], 1)
+        for jogador_id, novos_pontos in (
+            (vencedor, pontos[vencedor] + delta),
+            (perdedor, pontos[perdedor] - delta),
+        ):
+            db.session.execute(
+                update(Rating)
+                .where(Rating.jogador_id == jogador_id)
+                .values(pontos=novos_pontos),
+                execution_options={"synchronize_session": False},
+            )
+
+    @staticmethod
+    def _criar_rating_se_ausente(jogador_id):
+        # ON CONFLICT: outra transação pode criar o mesmo rating ao mesmo tempo
+        if db.session.connection().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        db.session.execute(
+            insert_dialeto(Rating.__table__)
+            .values(jogador_id=jogador_id, pontos=rating.PONTOS_INICIAIS, partidas=0)
+            .on_conflict_do_nothing()
+        )
+
+    @staticmethod
+    def reconstruir_ratings(tamanho_lote=100_000):
+        """Refaz todos os ratings a partir das partidas gravadas, com commit.
+        Retorna ``(partidas, jogadores)``"""
+        import numpy as np
+
+        # No PostgreSQL, resultados gravados durante a reconstrução esperam o
+        # commit dela e se aplicam sobre os pontos refeitos
+        com_rating = set(
+            db.session.scalars(select(Rating.jogador_id).with_for_update())
+        )
+        ids_jogadores = np.array(
+            db.session.scalars(select(Jogador.id).order_by(Jogador.id)).all(),
+            dtype=np.int64,
+        )
+        competidor_a, competidor_b = aliased(Competidor), aliased(Competidor)
+        consulta = (
+            select(
+                competidor_a.jogador_id,
+                competidor_b.jogador_id,
+                case((Chave.vencedor_id == Chave.competidor_a_id, 1), else_=0),
+            )
+            .join(competidor_a, Chave.competidor_a_id == competidor_a.id)
+            .join(competidor_b, Chave.competidor_b_id == competidor_b.id)
+            .where(
+                Chave.resultado_comp_a.is_not(None),
+                Chave.vencedor_id.is_not(None),
+                competidor_a.jogador_id.is_not(None),
+                competidor_b.jogador_id.is_not(None),
+                competidor_a.jogador_id != competidor_b.jogador_id,
+            )
+            .order_by(Chave.registrado_em.nulls_first(), Chave.id)
+            .execution_options(yield_per=tamanho_lote)
+        )
+        # Linhas achatadas direto para o array: np.array sobre Row sonda os
+        # atributos de cada linha e custa dez vezes mais
+        lotes = [
+            np.fromiter(chain.from_iterable(lote), np.int64, 3 * len(lote))
+            for lote in db.session.connection().execute(consulta).partitions()
+        ]
+        colunas = np.concatenate(lotes or [np.empty(0, np.int64)]).reshape(-1, 3)
+        # Ids do banco viram índices 0..n-1 dos arrays
+        jogador_a = np.searchsorted(ids_jogadores, colunas[:, 0])
+        jogador_b = np.searchsorted(ids_jogadores, colunas[:, 1])
+        pontos, partidas = rating.reconstruir(
+            jogador_a, jogador_b, colunas[:, 2], len(ids_jogadores)
+        )
+
+        atualizar, inserir = [], []
+        for id_jogador, valor, qtd in zip(
+            ids_jogadores.tolist(), pontos.tolist(), partidas.tolist()
+        ):
+            linha = {"pontos": valor, "partidas": qtd}
+            if id_jogador in com_rating:
+                atualizar.append({"id_jogador": id_jogador, **linha})
+            else:
+                # Jogador criado por fora do JogadorService, ainda sem rating
+                inserir.append({"jogador_id": id_jogador, **linha})
+        if atualizar:
+            _executar_em_massa(
+                update(Rating.__table__).where(
+                    Rating.jogador_id == bindparam("id_jogador")
+                ),
+                atualizar,
+            )
+        if inserir:
+            _executar_em_massa(insert(Rating.__table__), inserir)
+        db.session.commit()
+        return len(colunas), len(ids_jogadores)
+
+
 class CreateError(RuntimeError):
     ...
 
@@ -449,6 +1072,21 @@ class ChaveamentoNotAvailableError(Exception):
     status_code = 422
 
 
+class ChaveamentoSemPonteirosError(Exception):
+    message = "O chaveamento foi sorteado sem os ponteiros e não pode ser simulado"
+    status_code = 422
+
+
+class CompetidoresInsuficientesError(Exception):
+    message = "O torneio precisa de ao menos dois competidores para o chaveamento"
+    status_code = 422
+
+
+class JogadorNotFoundError(Exception):
+    message = "Jogador não encontrado"
+    status_code = 404
+
+
 class CompetidoresNotFoundError(Exception):
     message = "Não foram encontrados competidores nesse torneio"
     status_code = 401
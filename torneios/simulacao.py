@@ -0,0 +1,153 @@
+"""Simulação de Monte Carlo do que falta jogar num chaveamento"""
+import numpy as np
+
+from .chaveamento import RODADA_FINAL, RODADA_TERCEIRO
+from .rating import esperado
+
+# Chaves × simulações por lote: cerca de 16 MB por matriz de vagas, qualquer
+# que seja o tamanho do chaveamento
+CELULAS_POR_LOTE = 2**21
+COLOCACOES = ("campeao", "vice", "terceiro", "quarto")
+
+
+def elo(pontos):
+    """Probabilidade de vitória pelo rating (Elo) de cada competidor"""
+    # A vaga vazia tem -inf pontos: qualquer competidor a vence com certeza
+    pontos = np.append(np.asarray(pontos, dtype=np.float32), -np.inf)
+
+    def probabilidade(a, b):
+        with np.errstate(invalid="ignore"):
+            return esperado(pontos[a], pontos[b])
+
+    return probabilidade
+
+
+def tabela(matriz):
+    """Probabilidade de vitória dada por ``matriz[i, j]``: i vence j"""
+    qtd = len(matriz)
+    completa = np.zeros((qtd + 1, qtd + 1), dtype=np.float32)
+    completa[:qtd, :qtd] = matriz
+    completa[:, qtd] = 1
+    completa[qtd, qtd] = 0
+
+    def probabilidade(a, b):
+        return completa[a, b]
+
+    return probabilidade
+
+
+def chaves_da_montagem(linhas, ligacoes):
+    """Chaves de ``montar_chaveamento`` no formato de ``simular``"""
+    chaves = [
+        dict(
+            linha,
+            id=indice,
+            proxima_chave_id=None,
+            vaga_proxima_chave=None,
+            chave_perdedor_id=None,
+            vaga_chave_perdedor=None,
+        )
+        for indice, linha in enumerate(linhas)
+    ]
+    for origem, proxima, vaga, chave_perdedor, vaga_perdedor in ligacoes:
+        chaves[origem].update(
+            proxima_chave_id=proxima,
+            vaga_proxima_chave=vaga,
+            chave_perdedor_id=chave_perdedor,
+            vaga_chave_perdedor=vaga_perdedor,
+        )
+    return chaves
+
+
+def _planejar(chaves, indices, vazio):
+    # Chaves em ordem de rodada decrescente: cada rodada é uma fatia contígua da
+    # matriz de vagas e só alimenta fatias posteriores
+    ordem = sorted(chaves, key=lambda chave: (-chave["rodada"], chave["id"]))
+    posicoes = {chave["id"]: posicao for posicao, chave in enumerate(ordem)}
+
+    def coluna(nome):
+        return np.array(
+            [vazio if chave[nome] is None else indices[chave[nome]] for chave in ordem],
+            dtype=np.intp,
+        )
+
+    vagas_a, vagas_b = coluna("competidor_a_id"), coluna("competidor_b_id")
+    vencedores = coluna("vencedor_id")
+    perdedores = np.where(vencedores == vagas_b, vagas_a, vagas_b)
+
+    rodadas = [chave["rodada"] for chave in ordem]
+    plano = []
+    inicio = 0
+    while inicio < len(ordem):
+        fim = inicio
+        while fim < len(ordem) and rodadas[fim] == rodadas[inicio]:
+            fim += 1
+        decididas = vencedores[inicio:fim] != vazio
+        destinos = []
+        for quem, coluna_id, coluna_vaga in (
+            (0, "proxima_chave_id", "vaga_proxima_chave"),
+            (1, "chave_perdedor_id", "vaga_chave_perdedor"),
+        ):
+            for vaga in ("a", "b"):
+                origens = [
+                    posicao - inicio
+                    for posicao in range(inicio, fim)
+                    if ordem[posicao][coluna_id] is not None
+                    and ordem[posicao][coluna_vaga] == vaga
+                ]
+                if origens:
+                    alvos = [posicoes[ordem[inicio + o][coluna_id]] for o in origens]
+                    destinos.append((quem, vaga, np.array(origens), np.array(alvos)))
+        colocacoes = [
+            (posicao - inicio, 0 if rodadas[posicao] == RODADA_FINAL else 2)
+            for posicao in range(inicio, fim)
+            if rodadas[posicao] in (RODADA_FINAL, RODADA_TERCEIRO)
+        ]
+        plano.append(
+            (
+                slice(inicio, fim),
+                decididas,
+                vencedores[inicio:fim][decididas, None],
+                perdedores[inicio:fim][decididas, None],
+                destinos,
+                colocacoes,
+            )
+        )
+        inicio = fim
+    return vagas_a, vagas_b, plano
+
+
+def simular(
+    chaves,
+    competidores,
+    probabilidade,
+    simulacoes,
+    semente=None,
+    celulas_por_lote=CELULAS_POR_LOTE,
+):
+    """Chance de cada competidor terminar em cada colocação"""
+    rng = np.random.default_rng(semente)
+    indices = {id_competidor: i for i, id_competidor in enumerate(competidores)}
+    vazio = len(competidores)
+    vagas_a, vagas_b, plano = _planejar(chaves, indices, vazio)
+
+    contagem = np.zeros((len(COLOCACOES), vazio + 1), dtype=np.int64)
+    tamanho_lote = max(1, celulas_por_lote // max(len(chaves), 1))
+    for inicio in range(0, simulacoes, tamanho_lote):
+        qtd = min(tamanho_lote, simulacoes - inicio)
+        a_lote = np.repeat(vagas_a[:, None], qtd, axis=1)
+        b_lote = np.repeat(vagas_b[:, None], qtd, axis=1)
+        for fatia, decididas, vencedores, perdedores, destinos, colocacoes in plano:
+            a, b = a_lote[fatia], b_lote[fatia]
+            ganha_a = rng.random(a.shape, dtype=np.float32) < probabilidade(a, b)
+            resultado = (np.where(ganha_a, a, b), np.where(ganha_a, b, a))
+            resultado[0][decididas] = vencedores
+            resultado[1][decididas] = perdedores
+            for quem, vaga, origens, alvos in destinos:
+                (a_lote if vaga == "a" else b_lote)[alvos] = resultado[quem][origens]
+            for linha, colocacao in colocacoes:
+                for quem in (0, 1):
+                    contagem[colocacao + quem] += np.bincount(
+                        resultado[quem][linha], minlength=vazio + 1
+                    )
+    return (contagem[:, :vazio] / simulacoes).T
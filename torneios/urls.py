@@ -1,7 +1,14 @@
-from flask import Blueprint, request
+import hmac
+import json
+import time
+
+from flask import Blueprint, current_app, request, stream_with_context
+from flask import Response as FlaskResponse
 from flask_pydantic_spec import Request, Response
 
 from . import spec
+from .binario import TIPO_CONTEUDO as TIPO_BINARIO
+from .binario import codificar_chaveamento
 from .models_pydantic import (
     ChaveamentoResponse,
     ClassificationResponse,
@@ -9,10 +16,23 @@ from .models_pydantic import (
     FiltroTorneio,
     ResultadoPartidaRequest,
     ResultadoResponse,
+    ResultadosLoteRequest,
+    ResultadosLoteResponse,
+    SorteioLoteRequest,
+    SorteioLoteResponse,
     Torneio,
     CompetidorRequest,
+    CompetidoresLoteRequest,
+    FiltroChaveamento,
+    FiltroCompetidores,
+    FiltroOdds,
+    FiltroRanking,
+    JogadorRequest,
+    OddsResponse,
+    RankingResponse,
     TorneioResponse,
     IdResponse,
+    IdsResponse,
     CompetidoresResponse,
 )
 from .service import (
@@ -20,9 +40,13 @@ from .service import (
     ChaveRaiseError,
     ChaveamentoNotAvailableError,
     ChaveamentoNotFoundError,
+    ChaveamentoSemPonteirosError,
     ChaveamentoService,
+    CompetidoresInsuficientesError,
     CompetidoresNotFoundError,
     CreateError,
+    JogadorNotFoundError,
+    JogadorService,
     PendingClassification,
     ResultadoService,
     TorneioClosedError,
@@ -53,8 +77,9 @@ def torneio():
     query=FiltroTorneio, resp=Response(HTTP_200=TorneioResponse, HTTP_404=ErrorResponse)
 )
 def liste_torneios():
+    filtros: FiltroTorneio = request.context.query
     try:
-        lista_torneios_objs = TorneioService.buscar_torneio(request.context.query)
+        lista_torneios_objs = TorneioService.buscar_torneio(filtros)
     except TorneioNotFoundError as exc:
         return {"message": exc.message}, exc.status_code
     json_lista_objetos_torneios = [
@@ -66,69 +91,308 @@ def liste_torneios():
         }
         for torneio in lista_torneios_objs
     ]
-    return {"torneios": json_lista_objetos_torneios}, 200
+    resposta = {"torneios": json_lista_objetos_torneios}
+    if len(lista_torneios_objs) == filtros.limit:
+        resposta["proximo_after_id"] = lista_torneios_objs[-1].id
+    return resposta, 200
 
 
 @api_blueprint.post("/tournament/<int:id_torneio>/competidor")
 @spec.validate(
     body=Request(CompetidorRequest),
-    resp=Response(HTTP_201=IdResponse, HTTP_401=ErrorResponse, HTTP_403=ErrorResponse),
+    resp=Response(
+        HTTP_201=IdResponse,
+        HTTP_401=ErrorResponse,
+        HTTP_403=ErrorResponse,
+        HTTP_404=ErrorResponse,
+    ),
 )
 def cadastrar_competidor(id_torneio: int):
     data: CompetidorRequest = request.context.body
     try:
         response = CompetidorService.cadastrar_competidor(data, id_torneio)
-    except (TorneioClosedError, TorneioNotFoundError) as exc:
+    except (TorneioClosedError, TorneioNotFoundError, JogadorNotFoundError) as exc:
         return {"message": exc.message}, exc.status_code
     return {"id": response}, 201
 
 
+@api_blueprint.post("/tournament/<int:id_torneio>/competidores:bulk")
+@spec.validate(
+    body=Request(CompetidoresLoteRequest),
+    resp=Response(
+        HTTP_201=IdsResponse,
+        HTTP_403=ErrorResponse,
+        HTTP_404=ErrorResponse,
+        HTTP_500=ErrorResponse,
+    ),
+)
+def cadastrar_competidores_em_lote(id_torneio: int):
+    data: CompetidoresLoteRequest = request.context.body
+    try:
+        ids = CompetidorService.cadastrar_competidores_em_lote(data, id_torneio)
+    except (TorneioClosedError, TorneioNotFoundError) as exc:
+        return {"message": exc.message}, exc.status_code
+    except CreateError:
+        return {"message": "Error"}, 500
+    return {"ids": ids}, 201
+
+
 @api_blueprint.get("/tournament/<int:id_torneio>/competidores")
 @spec.validate(
+    query=FiltroCompetidores,
     resp=Response(
-        HTTP_200=CompetidoresResponse, HTTP_404=ErrorResponse, HTTP_401=ErrorResponse
-    )
+        HTTP_200=CompetidoresResponse,
+        HTTP_404=ErrorResponse,
+        HTTP_401=ErrorResponse,
+        validate=False,  # a resposta ndjson é um stream
+    ),
 )
 def buscar_competidores_torneio(id_torneio: int):
+    filtros: FiltroCompetidores = request.context.query
     try:
-        lista_competidores_objs = CompetidorService.buscar_competidores(id_torneio)
+        if filtros.formato == "ndjson":
+            lotes = CompetidorService.iterar_competidores(id_torneio)
+            return FlaskResponse(
+                stream_with_context(gerar_ndjson_competidores(lotes)),
+                mimetype="application/x-ndjson",
+            )
+        lista_competidores_objs = CompetidorService.buscar_competidores(
+            id_torneio, filtros.limit, filtros.after_id
+        ).all()
     except (TorneioNotFoundError, CompetidoresNotFoundError) as exc:
         return {"message": exc.message}, exc.status_code
     json_lista_competidores_objs = [
         {"id": competidor.id, "nome": competidor.nome_competidor}
         for competidor in lista_competidores_objs
     ]
-    return {"competidores": json_lista_competidores_objs}, 200
+    resposta = {"competidores": json_lista_competidores_objs}
+    if len(lista_competidores_objs) == filtros.limit:
+        resposta["proximo_after_id"] = lista_competidores_objs[-1].id
+    return resposta, 200
+
+
+def gerar_ndjson_competidores(lotes):
+    for lote in lotes:
+        yield "".join(
+            json.dumps({"id": id_competidor, "nome": nome}, ensure_ascii=False) + "\n"
+            for id_competidor, nome in lote
+        )
 
 
 @api_blueprint.get("/tournament/<int:id_torneio>/match")
-@spec.validate(resp=Response(HTTP_200=ChaveamentoResponse, HTTP_404=ErrorResponse))
+@spec.validate(
+    query=FiltroChaveamento,
+    resp=Response(
+        "HTTP_304",
+        HTTP_200=ChaveamentoResponse,
+        HTTP_404=ErrorResponse,
+        HTTP_422=ErrorResponse,
+        validate=False,  # o corpo vem pronto do cache ou em streaming
+    ),
+)
 def buscar_chaveamento(id_torneio: int):
+    filtros: FiltroChaveamento = request.context.query
     try:
-        chaveamentos_obj = ChaveamentoService.busca_chaveamento(id_torneio)
+        versao = ChaveamentoService.preparar_chaveamento(id_torneio)
+    except (TorneioNotFoundError, CompetidoresInsuficientesError) as exc:
+        return {"message": exc.message}, exc.status_code
+    binario = filtros.formato == "binario"
+    # Cada representação tem sua própria ETag
+    etag = f"{id_torneio}-{versao}" + ("-bin" if binario else "")
+    if request.if_none_match.contains(etag):
+        resposta = FlaskResponse(status=304)
+        resposta.set_etag(etag)
+        return resposta
+    cache = current_app.extensions["cache_chaveamento"]
+    if binario:
+        corpo = cache.get((id_torneio, versao, "binario"))
+        if corpo is None:
+            lotes = ChaveamentoService.iterar_chaveamento(id_torneio)
+            corpo = codificar_chaveamento(id_torneio, versao, lotes)
+            cache.set((id_torneio, versao, "binario"), corpo)
+        resposta = FlaskResponse(corpo, mimetype=TIPO_BINARIO)
+        resposta.set_etag(etag)
+        return resposta
+    corpo = cache.get((id_torneio, versao))
+    if corpo is None and filtros.stream:
+        lotes = ChaveamentoService.iterar_chaveamento(id_torneio)
+        corpo = stream_with_context(gerar_json_chaveamento(lotes))
+    elif corpo is None:
+        chaveamentos_obj = ChaveamentoService.buscar_chaveamento_completo(id_torneio)
+        corpo = json.dumps(
+            {"chaveamentos": [serializar_chave(chave) for chave in chaveamentos_obj]}
+        ).encode()
+        cache.set((id_torneio, versao), corpo)
+    resposta = FlaskResponse(corpo, mimetype="application/json")
+    resposta.set_etag(etag)
+    return resposta
+
+
+def gerar_json_chaveamento(lotes):
+    # Mesmo texto que o json.dumps do corpo completo, escrito lote a lote
+    yield '{"chaveamentos": ['
+    separador = ""
+    for lote in lotes:
+        partes = []
+        for linha in lote:
+            partes.append(separador + json.dumps(serializar_linha_chave(linha)))
+            separador = ", "
+        yield "".join(partes)
+    yield "]}"
+
+
+def serializar_linha_chave(linha):
+    adversarios = {}
+    for vaga in ("a", "b"):
+        id_competidor = getattr(linha, f"competidor_{vaga}_id")
+        adversarios[vaga] = (
+            {"id": id_competidor, "nome": getattr(linha, f"competidor_{vaga}_nome")}
+            if id_competidor is not None
+            else None
+        )
+    vencedor = next(
+        (
+            adversario
+            for adversario in adversarios.values()
+            if adversario and adversario["id"] == linha.vencedor_id
+        ),
+        None,
+    )
+    return {
+        "id": linha.id,
+        "adversario_a": adversarios["a"],
+        "adversario_b": adversarios["b"],
+        "rodada": (CLASSIFICACAO[linha.rodada] if linha.rodada < 2 else linha.rodada),
+        "grupo": linha.grupo,
+        "vencedor": vencedor,
+        "is_bye": linha.bye,
+        "resultado_a": linha.resultado_comp_a,
+        "resultado_b": linha.resultado_comp_b,
+    }
+
+
+def serializar_chave(chave):
+    return {
+        "id": chave.id,
+        "adversario_a": chave.competidor_a.to_dict() if chave.competidor_a else None,
+        "adversario_b": chave.competidor_b.to_dict() if chave.competidor_b else None,
+        "rodada": (CLASSIFICACAO[chave.rodada] if chave.rodada < 2 else chave.rodada),
+        "grupo": chave.grupo,
+        "vencedor": chave.vencedor.to_dict() if chave.vencedor else None,
+        "is_bye": chave.bye,
+        "resultado_a": chave.resultado_comp_a,
+        "resultado_b": chave.resultado_comp_b,
+    }
+
+
+@api_blueprint.get("/tournament/<int:id_torneio>/odds")
+@spec.validate(
+    query=FiltroOdds,
+    resp=Response(
+        "HTTP_304",
+        HTTP_200=OddsResponse,
+        HTTP_404=ErrorResponse,
+        HTTP_422=ErrorResponse,
+        validate=False,  # o corpo vem pronto do cache
+    ),
+)
+def calcular_odds(id_torneio: int):
+    filtros: FiltroOdds = request.context.query
+    try:
+        versao = ChaveamentoService.preparar_chaveamento(id_torneio)
+    except (TorneioNotFoundError, CompetidoresInsuficientesError) as exc:
+        return {"message": exc.message}, exc.status_code
+    simulacoes, marca_ratings = ChaveamentoService.estado_odds(
+        id_torneio, filtros.simulacoes
+    )
+    # Muda com o chaveamento e com os ratings dos inscritos: a semente sai da
+    # versão, então todos os workers calculam as mesmas odds para o mesmo estado
+    etag = f"{id_torneio}-{versao}-odds-{simulacoes}-{marca_ratings}"
+    if request.if_none_match.contains(etag):
+        resposta = FlaskResponse(status=304)
+        resposta.set_etag(etag)
+        return resposta
+    cache = current_app.extensions["cache_chaveamento"]
+    chave_cache = (id_torneio, versao, "odds", simulacoes, marca_ratings)
+    corpo = cache.get(chave_cache)
+    if corpo is None:
+        # Como no serviço: simulacao (e o NumPy) só entram na primeira odds
+        from .simulacao import COLOCACOES
+
+        try:
+            competidores, probabilidades = ChaveamentoService.calcular_odds(
+                id_torneio, simulacoes, semente=(id_torneio, versao)
+            )
+        except ChaveamentoSemPonteirosError as exc:
+            return {"message": exc.message}, exc.status_code
+        odds = [
+            {
+                "competidor": {"id": competidor.id, "nome": competidor.nome_competidor},
+                **dict(zip(COLOCACOES, linha)),
+            }
+            for competidor, linha in zip(competidores, probabilidades.tolist())
+        ]
+        odds.sort(key=lambda item: [-item[colocacao] for colocacao in COLOCACOES])
+        corpo = json.dumps({"simulacoes": simulacoes, "odds": odds}).encode()
+        cache.set(chave_cache, corpo)
+    resposta = FlaskResponse(corpo, mimetype="application/json")
+    resposta.set_etag(etag)
+    return resposta
+
+
+@api_blueprint.post("/admin/tournament/match:draw")
+@spec.validate(
+    body=Request(SorteioLoteRequest),
+    resp=Response(HTTP_200=SorteioLoteResponse, HTTP_403=ErrorResponse),
+)
+def sortear_torneios_em_lote():
+    token = current_app.config["ADMIN_TOKEN"]
+    enviado = request.headers.get("X-Admin-Token", "")
+    if not token or not hmac.compare_digest(enviado.encode(), token.encode()):
+        return {"message": "Acesso negado"}, 403
+    data: SorteioLoteRequest = request.context.body
+    inicio = time.perf_counter()
+    sorteios = ChaveamentoService.sortear_em_paralelo(data.ids, data.workers)
+    resultados = []
+    for id_torneio, sorteado, segundos, erro in sorteios:
+        if erro is not None:
+            item = {
+                "status_code": getattr(erro, "status_code", 500),
+                "message": getattr(erro, "message", "Error"),
+            }
+        elif sorteado:
+            item = {"status_code": 201, "message": "Chaveamento sorteado"}
+        else:
+            item = {"status_code": 200, "message": "Chaveamento já estava sorteado"}
+        resultados.append({"id_torneio": id_torneio, "segundos": segundos, **item})
+    return {"resultados": resultados, "segundos": time.perf_counter() - inicio}, 200
+
+
+@api_blueprint.get("/tournament/<int:id_torneio>/events")
+@spec.validate(
+    resp=Response(
+        "HTTP_200",
+        HTTP_404=ErrorResponse,
+        validate=False,  # text/event-stream
+    ),
+)
+def eventos_chaveamento(id_torneio: int):
+    try:
+        TorneioService.buscar_torneio(FiltroTorneio(id=id_torneio))
     except TorneioNotFoundError as exc:
         return {"message": exc.message}, exc.status_code
-    json_chaveamentos_obj = [
-        {
-            "id": chave.id,
-            "adversario_a": chave.competidor_a.to_dict()
-            if chave.competidor_a
-            else None,
-            "adversario_b": chave.competidor_b.to_dict()
-            if chave.competidor_b
-            else None,
-            "rodada": (
-                CLASSIFICACAO[chave.rodada] if chave.rodada < 2 else chave.rodada
-            ),
-            "grupo": chave.grupo,
-            "vencedor": chave.vencedor.to_dict() if chave.vencedor else None,
-            "is_bye": chave.bye,
-            "resultado_a": chave.resultado_comp_a,
-            "resultado_b": chave.resultado_comp_b,
-        }
-        for chave in chaveamentos_obj
-    ]
-    return {"chaveamentos": json_chaveamentos_obj}, 200
+    # Sem Last-Event-ID, só o que for publicado a partir desta requisição
+    visto = request.headers.get("Last-Event-ID", type=int)
+    # Sem stream_with_context: a sessão do banco é devolvida antes do stream, que
+    # pode durar horas
+    resposta = FlaskResponse(
+        current_app.extensions["eventos"].assinar(
+            id_torneio, visto, current_app.config["EVENTOS_KEEPALIVE_S"]
+        ),
+        mimetype="text/event-stream",
+    )
+    resposta.headers["Cache-Control"] = "no-cache"
+    return resposta
 
 
 @api_blueprint.post("/tournament/<int:id_torneio>/match/<int:id_partida>")
@@ -152,6 +416,61 @@ def inserir_resultado_partida(id_torneio: int, id_partida: int):
     return {"message": "Resultado registrado"}, 201
 
 
+@api_blueprint.post("/tournament/<int:id_torneio>/match:bulk")
+@spec.validate(
+    body=Request(ResultadosLoteRequest),
+    resp=Response(
+        HTTP_200=ResultadosLoteResponse, HTTP_404=ErrorResponse, HTTP_422=ErrorResponse
+    ),
+)
+def inserir_resultados_em_lote(id_torneio: int):
+    data: ResultadosLoteRequest = request.context.body
+    try:
+        gravados = ResultadoService.cadastrar_resultados_em_lote(data, id_torneio)
+    except (TorneioNotFoundError, BracketingWithResultError) as exc:
+        return {"message": exc.message}, exc.status_code
+    resultados = []
+    for id_partida, erro in gravados:
+        if erro is None:
+            item = {"status_code": 201, "message": "Resultado registrado"}
+        else:
+            item = {"status_code": erro.status_code, "message": erro.message}
+        resultados.append({"id_partida": id_partida, **item})
+    return {"resultados": resultados}, 200
+
+
+@api_blueprint.post("/player")
+@spec.validate(
+    body=Request(JogadorRequest),
+    resp=Response(HTTP_201=IdResponse, HTTP_500=ErrorResponse),
+)
+def criar_jogador():
+    data: JogadorRequest = request.context.body
+    try:
+        jogador_id = JogadorService.criar_jogador(data)
+    except CreateError:
+        return {"message": "Error"}, 500
+    return {"id": jogador_id}, 201
+
+
+@api_blueprint.get("/ranking")
+@spec.validate(query=FiltroRanking, resp=Response(HTTP_200=RankingResponse))
+def ranking():
+    filtros: FiltroRanking = request.context.query
+    jogadores = JogadorService.ranking(filtros.limit)
+    return {
+        "ranking": [
+            {
+                "jogador_id": jogador.id,
+                "nome": jogador.nome,
+                "rating": jogador.pontos,
+                "partidas": jogador.partidas,
+            }
+            for jogador in jogadores
+        ]
+    }, 200
+
+
 @api_blueprint.get("/tournament/<int:id_torneio>/result")
 @spec.validate(resp=Response(HTTP_200=ClassificationResponse, HTTP_401=ErrorResponse))
 def buscar_topquatro(id_torneio: int):